@@ -0,0 +1,53 @@
+"""Structured answer format of the answer models and parsing of their replies into ResponseFormat."""
+import json
+from typing import Optional
+from pydantic import ValidationError
+from prometheus_client import Counter
+from model.model import ResponseFormat
+
+# Метрики разбора ответов LLM
+RESPONSE_PARSES = Counter("llm_response_parses_total", "LLM answers by how they were parsed", ["result"])
+
+# Answers are constrained to the ResponseFormat schema (structured outputs), so the reply is
+# always a valid object and parse_answer only has to fall back for other OpenAI-compatible servers
+ANSWER_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "ResponseFormat",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "response": {"type": "string"},
+                "category": {"type": "integer", "enum": [0, 1, 2, 3]},
+            },
+            "required": ["response", "category"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def parse_answer(text: str) -> Optional[ResponseFormat]:
+    """
+    Reads an LLM reply into a ResponseFormat. Replies constrained by ANSWER_RESPONSE_FORMAT are
+    validated directly; otherwise the outermost {...} is taken, which drops code fences and text
+    around the object, and control characters inside strings are allowed. None when both fail.
+    """
+    try:
+        answer = ResponseFormat.model_validate_json(text)
+        RESPONSE_PARSES.labels(result="strict").inc()
+        return answer
+    except ValidationError:
+        pass
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            answer = ResponseFormat.model_validate(json.loads(text[start:end + 1], strict=False))
+            RESPONSE_PARSES.labels(result="repaired").inc()
+            return answer
+        except ValueError:
+            # ValidationError is a ValueError too
+            pass
+    RESPONSE_PARSES.labels(result="failed").inc()
+    return None
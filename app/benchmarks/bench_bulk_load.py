@@ -0,0 +1,64 @@
+"""
+Times the COPY-based bulk loader with synthetic Q&A pairs and random embeddings.
+
+Run from the app directory:
+    python -m benchmarks.bench_bulk_load --pairs 1000000 --dim 1536
+"""
+import argparse, json, time, uuid
+import numpy as np
+from utils import db_connection
+from vdb_utils import get_collection_id
+from qa_format import build_vector_text
+from embedding_cache import content_hash
+from bulk_loader import bulk_load_pairs
+
+
+def iter_synthetic_pairs(count: int, dim: int, file_id: int, file_name: str, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        question, answer = f"Синтетический вопрос {i}?", f"Синтетический ответ {i}."
+        vector_text = build_vector_text(question, answer)
+        embedding = rng.standard_normal(dim, dtype=np.float32)
+        embedding /= np.linalg.norm(embedding)
+        yield (f"{file_name}-{uuid.uuid4()}", file_id, question, answer, "bench",
+               content_hash(vector_text), vector_text, embedding)
+
+
+def create_bench_file(cur, file_name: str) -> int:
+    cur.execute("INSERT INTO categories (category_name) VALUES (%s) RETURNING category_id", (file_name,))
+    category_id = cur.fetchone()["category_id"]
+    cur.execute("INSERT INTO files (category_id, file_name) VALUES (%s, %s) RETURNING file_id", (category_id, file_name))
+    return cur.fetchone()["file_id"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    conn = db_connection.get_connection()
+    file_name = f"bench-load-{uuid.uuid4().hex[:8]}"
+    with conn.cursor() as cur:
+        file_id = create_bench_file(cur, file_name)
+        collection_id = get_collection_id(cur)
+    conn.commit()
+
+    start = time.perf_counter()
+    loaded = bulk_load_pairs(conn, iter_synthetic_pairs(args.pairs, args.dim, file_id, file_name), collection_id,
+                             batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "benchmark": "bulk_load",
+        "pairs": loaded,
+        "dim": args.dim,
+        "seconds": round(elapsed, 3),
+        "pairs_per_sec": round(loaded / elapsed, 1),
+        "file_id": file_id,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Times the set-based category delete on a synthetic category.
+
+Run from the app directory:
+    python -m benchmarks.bench_category_delete --files 10000 --texts-per-file 5
+"""
+import argparse, json, random, time, uuid
+from psycopg2.extras import execute_values
+from utils import db_connection
+from vdb_utils import get_collection_id, delete_category_in_db
+from embedding_cache import to_pgvector
+
+
+def seed_category(files: int, texts_per_file: int, dim: int) -> int:
+    conn = db_connection.get_connection()
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO categories (category_name) VALUES (%s) RETURNING category_id",
+            (f"bench-delete-{uuid.uuid4()}",)
+        )
+        category_id = cur.fetchone()["category_id"]
+        execute_values(
+            cur,
+            "INSERT INTO files (category_id, file_name) VALUES %s",
+            [(category_id, f"bench-{i}") for i in range(files)],
+            page_size=1000
+        )
+        cur.execute("SELECT file_id, file_name FROM files WHERE category_id = %s", (category_id,))
+        file_rows = cur.fetchall()
+        collection_id = get_collection_id(cur)
+
+        texts, vectors = [], []
+        for file_row in file_rows:
+            for _ in range(texts_per_file):
+                text_id = f"{file_row['file_name']}-{uuid.uuid4()}"
+                texts.append((text_id, file_row["file_id"], "Вопрос", "Ответ", "bench"))
+                vectors.append((text_id, collection_id, to_pgvector([random.random() for _ in range(dim)]), "Вопрос: Вопрос Ответ: Ответ"))
+        execute_values(
+            cur,
+            "INSERT INTO qa_texts (text_id, file_id, text_question, text_answer, text_author) VALUES %s",
+            texts, page_size=1000
+        )
+        execute_values(
+            cur,
+            "INSERT INTO langchain_pg_embedding (id, collection_id, embedding, document, cmetadata) VALUES %s",
+            vectors, template="(%s, %s::uuid, %s::vector, %s, '{}'::jsonb)", page_size=1000
+        )
+    conn.commit()
+    return category_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--texts-per-file", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    seed_start = time.perf_counter()
+    category_id = seed_category(args.files, args.texts_per_file, args.dim)
+    seed_time = time.perf_counter() - seed_start
+
+    delete_start = time.perf_counter()
+    counts = delete_category_in_db(category_id)
+    delete_time = time.perf_counter() - delete_start
+
+    print(json.dumps({
+        "benchmark": "category_delete",
+        "files": args.files,
+        "texts_per_file": args.texts_per_file,
+        "seed_seconds": round(seed_time, 3),
+        "delete_seconds": round(delete_time, 3),
+        **counts
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Recall-vs-latency report for two-stage compact search against exact full-precision search.
+Compact indexes that do not exist yet are created first.
+
+Run from the app directory:
+    python -m benchmarks.bench_compact_search --queries 200 --dimensions 256 512 1536 --candidates 20 50 100 200
+"""
+import argparse, json, time
+from typing import List
+import numpy as np
+from utils import execute_query, get_db_cursor
+from embedding_cache import to_pgvector
+from embeddings import emb_model
+from compact_search import COMPACT_MODES, active_collection_id, create_compact_index, get_storage_sizes, two_stage_search, compact_index_name
+
+
+def exact_search(embedding: List[float], k: int) -> List[str]:
+    with get_db_cursor() as cur:
+        cur.execute("SET LOCAL enable_indexscan = off")
+        cur.execute(
+            "SELECT id FROM langchain_pg_embedding WHERE collection_id = %s ORDER BY embedding <=> %s::vector LIMIT %s",
+            (active_collection_id(), to_pgvector(embedding), k)
+        )
+        return [row["id"] for row in cur.fetchall()]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def latency_ms(values: List[float]) -> dict:
+    return {"p50": round(float(np.percentile(values, 50)) * 1000, 2), "p95": round(float(np.percentile(values, 95)) * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200, help="Number of stored questions used as queries")
+    parser.add_argument("--k", type=int, default=20, help="Results compared against exact search (fetch_k of the retriever)")
+    parser.add_argument("--modes", nargs="+", choices=COMPACT_MODES, default=list(COMPACT_MODES))
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[256, 512, 1536])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[20, 50, 100, 200])
+    args = parser.parse_args()
+
+    questions = [row["text_question"] for row in execute_query(
+        "SELECT text_question FROM qa_texts WHERE deleted_at IS NULL ORDER BY md5(text_id) LIMIT %s", (args.queries,)
+    )]
+    embeddings = emb_model.embed_documents(questions)
+
+    exact, exact_times = [], []
+    for embedding in embeddings:
+        ids, seconds = timed(exact_search, embedding, args.k)
+        exact.append(set(ids))
+        exact_times.append(seconds)
+    print(json.dumps({"search": "exact", "k": args.k, "latency_ms": latency_ms(exact_times)}))
+
+    for mode in args.modes:
+        for dimensions in args.dimensions:
+            create_compact_index(mode, dimensions)
+            for candidates in args.candidates:
+                recalls, times = [], []
+                for embedding, truth in zip(embeddings, exact):
+                    rows, seconds = timed(two_stage_search, embedding, args.k, mode, dimensions, candidates)
+                    recalls.append(len(truth & {row["id"] for row in rows}) / max(len(truth), 1))
+                    times.append(seconds)
+                print(json.dumps({
+                    "search": "two_stage", "mode": mode, "dimensions": dimensions, "candidates": candidates, "k": args.k,
+                    "recall": round(float(np.mean(recalls)), 4), "latency_ms": latency_ms(times),
+                }))
+
+    sizes = get_storage_sizes()
+    full = sizes.pop("full_vectors")
+    print(json.dumps({
+        "full_vectors_bytes": full,
+        "indexes": {
+            name: {"bytes": size, "reduction": round(full / size, 2) if size else None}
+            for name, size in sizes.items()
+            if name in {compact_index_name(m, d) for m in args.modes for d in args.dimensions}
+        },
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares embedding backends on the live Q&A set: single-query latency, concurrent query throughput
+(exercises micro-batching), document throughput and retrieval recall per language.
+
+Run from the app directory:
+    python -m benchmarks.bench_embeddings --backends openai local --texts 2000
+    python -m benchmarks.bench_embeddings --queries eval_queries.jsonl   # {"query": ..., "text_id": ...} per line
+"""
+import argparse, json, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from utils import execute_query
+from qa_format import build_vector_text
+from language import identify_language
+from embeddings import create_embeddings
+
+
+def load_texts(limit: int) -> List[Dict[str, str]]:
+    return execute_query(
+        """
+        SELECT text_id, text_question, text_answer FROM qa_texts
+        WHERE deleted_at IS NULL ORDER BY md5(text_id) LIMIT %s
+        """,
+        (limit,)
+    )
+
+
+def load_queries(path: Optional[str], texts: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Labelled queries from a JSONL file, or the stored questions of the sampled texts."""
+    if not path:
+        return [{"query": t["text_question"], "text_id": t["text_id"]} for t in texts]
+    known = {t["text_id"] for t in texts}
+    with open(path, encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    return [q for q in queries if q["text_id"] in known]
+
+
+def percentile(values: List[float], q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 2) if values else 0.0
+
+
+def embed_in_batches(model, texts: List[str], batch_size: int) -> np.ndarray:
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(model.embed_documents(texts[i:i + batch_size]))
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def bench_backend(name: str, texts: List[Dict[str, str]], queries: List[Dict[str, str]], args) -> Dict:
+    model = create_embeddings(name)
+    model.embed_query("warmup")
+
+    documents = [build_vector_text(t["text_question"], t["text_answer"]) for t in texts]
+    start = time.perf_counter()
+    doc_matrix = embed_in_batches(model, documents, args.batch_size)
+    doc_seconds = time.perf_counter() - start
+
+    sample = [q["query"] for q in queries[:args.latency_queries]]
+    latencies = []
+    for query in sample:
+        start = time.perf_counter()
+        model.embed_query(query)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(model.embed_query, sample))
+    concurrent_seconds = time.perf_counter() - start
+
+    query_matrix = embed_in_batches(model, [q["query"] for q in queries], args.batch_size)
+    index_of = {t["text_id"]: i for i, t in enumerate(texts)}
+    targets = np.array([index_of[q["text_id"]] for q in queries])
+    scores = query_matrix @ doc_matrix.T
+    target_scores = scores[np.arange(len(queries)), targets]
+    ranks = (scores > target_scores[:, None]).sum(axis=1)
+
+    languages = np.array([identify_language(q["query"]) for q in queries])
+    recall = {}
+    for lang in ["all", *sorted(set(languages))]:
+        mask = np.ones(len(queries), dtype=bool) if lang == "all" else languages == lang
+        recall[lang] = {f"recall@{k}": round(float((ranks[mask] < k).mean()), 4) for k in args.k}
+        recall[lang]["queries"] = int(mask.sum())
+
+    return {
+        "backend": name,
+        "dimensions": int(doc_matrix.shape[1]),
+        "documents_per_sec": round(len(documents) / doc_seconds, 1),
+        "query_latency_ms": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95)},
+        "concurrent_queries_per_sec": round(len(sample) / concurrent_seconds, 1),
+        "recall": recall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["openai", "local"])
+    parser.add_argument("--texts", type=int, default=2000, help="Number of live texts used as the document set")
+    parser.add_argument("--queries", help="Optional JSONL file with labelled queries")
+    parser.add_argument("--latency-queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10])
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts)
+    queries = load_queries(args.queries, texts)
+    for name in args.backends:
+        print(json.dumps(bench_backend(name, texts, queries, args), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Latency and cost of every answer model tier and of the model router, on the same questions and
+retrieved contexts. Intended to run against benchmarks.fake_openai (OPENAI_BASE_URL) with per-model
+latency profiles and category 0 / malformed answer rates; prices come from MODEL_TIERS.
+
+Run from the app directory:
+    python -m benchmarks.bench_model_router --questions 200
+    python -m benchmarks.bench_model_router --eval-set eval.jsonl --questions 500
+"""
+import argparse, json, time
+from collections import Counter
+from typing import Dict, List
+import numpy as np
+from chat_metrics import ChatTimings
+from hedging import Deadline
+from benchmarks.eval_retrieval import load_eval_set
+from chain import (
+    ANSWER_PROMPT, LANG_NAMES, MODEL_TIERS, emb_model, initialize_retriever, search_by_vector,
+    choose_model_tier, complete_with_tiers, escalation_reason, parse_answer, InvalidAnswer
+)
+import chain
+
+PRICES = {spec["model"]: spec for spec in MODEL_TIERS.values()}
+
+
+def cost_usd(timings: ChatTimings) -> float:
+    return sum(
+        count * PRICES[model]["input_price" if kind == "prompt" else "output_price"] / 1_000_000
+        for (kind, model), count in timings.tokens.items() if model in PRICES
+    )
+
+
+def summarize(setting: str, runs: List[Dict]) -> Dict:
+    seconds = [run["seconds"] for run in runs]
+    reasons = Counter(run["outcome"] for run in runs)
+    cost = sum(run["cost"] for run in runs)
+    summary = {
+        "setting": setting,
+        "questions": len(runs),
+        "latency_ms": {
+            "p50": round(float(np.percentile(seconds, 50)) * 1000, 1),
+            "p95": round(float(np.percentile(seconds, 95)) * 1000, 1),
+            "p99": round(float(np.percentile(seconds, 99)) * 1000, 1),
+        },
+        "cost_usd": round(cost, 6),
+        "cost_per_1k_questions_usd": round(cost / len(runs) * 1000, 4),
+        "answered_share": round(reasons["answered"] / len(runs), 4),
+        "no_answer_share": round(reasons["no_answer"] / len(runs), 4),
+        "invalid_json_share": round(reasons["invalid_json"] / len(runs), 4),
+    }
+    if "tier" in runs[0]:
+        summary["first_tier_share"] = dict(Counter(run["tier"] for run in runs))
+        summary["escalated_share"] = round(sum(run["escalated"] for run in runs) / len(runs), 4)
+    return summary
+
+
+def run_question(prompt_value, tier: str, escalate: bool) -> Dict:
+    timings = ChatTimings()
+    start = time.perf_counter()
+    if escalate:
+        try:
+            answer = complete_with_tiers(prompt_value, tier, timings, Deadline())
+        except InvalidAnswer:
+            answer = None
+    else:
+        answer = parse_answer(chain.answer_clients[tier].complete(prompt_value, timings, Deadline()))
+    run = {"seconds": time.perf_counter() - start, "cost": cost_usd(timings), "outcome": escalation_reason(answer) or "answered"}
+    if escalate:
+        # Every tier that answered left its token usage under its own model name
+        run.update(tier=tier, escalated=len({model for _, model in timings.tokens}) > 1)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eval-set", help="JSONL file with question and text_id")
+    parser.add_argument("--questions", type=int, default=200)
+    args = parser.parse_args()
+
+    items = load_eval_set(args.eval_set, args.questions)
+    retriever = initialize_retriever()
+    prompts = []
+    for item in items:
+        docs = search_by_vector(retriever, emb_model.embed_query(item["question"]))
+        prompt_value = ANSWER_PROMPT.invoke({
+            "question": item["question"], "context": "\n".join(doc.page_content for doc in docs), "history": [], "language": LANG_NAMES["ru"]
+        })
+        prompts.append((item["question"], docs, prompt_value))
+
+    for tier in MODEL_TIERS:
+        print(json.dumps(summarize(f"tier:{tier}", [run_question(prompt_value, tier, escalate=False) for _, _, prompt_value in prompts])))
+
+    # The router decision is made with routing on, whatever MODEL_ROUTER_ENABLED says
+    chain.MODEL_ROUTER_ENABLED = True
+    runs = [run_question(prompt_value, choose_model_tier(question, docs, []), escalate=True) for question, docs, prompt_value in prompts]
+    print(json.dumps(summarize("router", runs)))
+
+
+if __name__ == "__main__":
+    main()
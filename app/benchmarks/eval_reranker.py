@@ -0,0 +1,92 @@
+"""
+Offline evaluation of the cross-encoder reranker: context recall of the expected Q&A pair, context
+tokens and reranking latency for several top_n/cutoff settings against plain retrieval. With
+--llm-sample the answer LLM is also timed on full and reranked contexts.
+
+Run from the app directory:
+    python -m benchmarks.eval_reranker --questions 300
+    python -m benchmarks.eval_reranker --eval-set eval.jsonl --llm-sample 50   # {"question": ..., "text_id": ...} per line
+"""
+import argparse, json, time
+from typing import Dict, List
+import numpy as np
+import tiktoken
+from langchain_core.output_parsers import StrOutputParser
+from chain import ANSWER_PROMPT, ANSWER_RESPONSE_FORMAT, LANG_NAMES, create_llm, initialize_retriever, parse_answer
+from reranker import reranker
+from benchmarks.eval_retrieval import load_eval_set
+
+encoding = tiktoken.get_encoding("o200k_base")
+
+
+def select(ranked: List[tuple], top_n: int, cutoff: float, min_documents: int) -> List[str]:
+    return [content for i, (score, content) in enumerate(ranked[:top_n]) if score >= cutoff or i < min_documents]
+
+
+def time_llm(question: str, context: str) -> tuple:
+    llm = create_llm('gpt-4.1-mini', 500, ANSWER_RESPONSE_FORMAT)
+    start = time.perf_counter()
+    response = (ANSWER_PROMPT | llm | StrOutputParser()).invoke(
+        {"question": question, "context": context, "history": [], "language": LANG_NAMES["ru"]}
+    )
+    answer = parse_answer(response)
+    return time.perf_counter() - start, answer.category if answer else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eval-set", help="JSONL file with question and expected text_id")
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument("--top-n", type=int, nargs="+", default=[3, 4, 5])
+    parser.add_argument("--cutoffs", type=float, nargs="+", default=[0.0, 0.1, 0.2, 0.4])
+    parser.add_argument("--llm-sample", type=int, default=0, help="Questions answered by the LLM with full and reranked context")
+    args = parser.parse_args()
+
+    items = load_eval_set(args.eval_set, args.questions)
+    retriever = initialize_retriever()
+    runs, rerank_times = [], []
+    for item in items:
+        docs = retriever.invoke(item["question"])
+        start = time.perf_counter()
+        scores = reranker.score(item["question"], docs)
+        rerank_times.append(time.perf_counter() - start)
+        ranked = sorted(zip(scores, [doc.page_content for doc in docs]), key=lambda pair: pair[0], reverse=True)
+        runs.append({"item": item, "retrieved": [doc.page_content for doc in docs], "ranked": ranked})
+
+    def summarize(contexts: List[List[str]]) -> Dict:
+        tokens = [len(encoding.encode("\n".join(context))) for context in contexts]
+        return {
+            "context_recall": round(float(np.mean([run["item"]["expected"] in context for run, context in zip(runs, contexts)])), 4),
+            "documents": round(float(np.mean([len(context) for context in contexts])), 2),
+            "context_tokens": round(float(np.mean(tokens)), 1),
+        }
+
+    baseline = summarize([run["retrieved"] for run in runs])
+    print(json.dumps({"setting": "retrieval_only", "questions": len(runs), **baseline}))
+    print(json.dumps({"rerank_latency_ms": {
+        "p50": round(float(np.percentile(rerank_times, 50)) * 1000, 2),
+        "p95": round(float(np.percentile(rerank_times, 95)) * 1000, 2),
+    }}))
+    for top_n in args.top_n:
+        for cutoff in args.cutoffs:
+            summary = summarize([select(run["ranked"], top_n, cutoff, reranker.min_documents) for run in runs])
+            summary["token_reduction"] = round(1 - summary["context_tokens"] / baseline["context_tokens"], 4) if baseline["context_tokens"] else 0.0
+            print(json.dumps({"setting": "reranked", "top_n": top_n, "cutoff": cutoff, **summary}))
+
+    if args.llm_sample:
+        results = {"retrieval_only": [], "reranked": []}
+        for run in runs[:args.llm_sample]:
+            reranked = select(run["ranked"], reranker.top_n, reranker.score_cutoff, reranker.min_documents)
+            results["retrieval_only"].append(time_llm(run["item"]["question"], "\n".join(run["retrieved"])))
+            results["reranked"].append(time_llm(run["item"]["question"], "\n".join(reranked)))
+        for setting, values in results.items():
+            seconds = [value[0] for value in values]
+            print(json.dumps({
+                "setting": setting, "llm_questions": len(values),
+                "llm_latency_ms": {"p50": round(float(np.percentile(seconds, 50)) * 1000, 1), "p95": round(float(np.percentile(seconds, 95)) * 1000, 1)},
+                "answered_share": round(float(np.mean([value[1] == 1 for value in values])), 4),
+            }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Offline evaluation of the chat retriever. A labelled set of questions with the text_id of the Q&A
+pair that answers them is built from the stored questions plus LLM paraphrases; every combination
+of k, fetch_k and lambda_mult is then scored by recall@k, MRR and search latency, and the cheapest
+configuration (fewest documents, then lowest p95 latency) that reaches --min-recall is reported.
+
+Run from the app directory:
+    python -m benchmarks.eval_retrieval build --questions 300 --paraphrases 2 --output eval.jsonl
+    python -m benchmarks.eval_retrieval run --eval-set eval.jsonl --k 4 6 10 --fetch-k 20 40 --lambda-mult 0.4 0.7 1.0
+"""
+import argparse, itertools, json, time
+from typing import Dict, List
+import numpy as np
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+from utils import execute_query
+from qa_format import build_vector_text
+from chain import config, emb_model, initialize_retriever, search_by_vector
+
+PARAPHRASE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ('system', """Ты помогаешь тестировать поиск банковского чат-бота. Перефразируй вопрос клиента {count} разными способами
+        на том же языке, как его мог бы задать реальный клиент: другими словами, иногда короче или разговорнее, без новых деталей.
+        Верни только JSON-массив строк."""),
+        ('human', '{question}'),
+    ]
+)
+
+
+def load_eval_set(path: str, limit: int) -> List[Dict]:
+    """Labelled questions with the vector text of their expected Q&A pair."""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            items = [json.loads(line) for line in f if line.strip()][:limit]
+    else:
+        items = [{"question": row["text_question"], "text_id": row["text_id"], "kind": "stored"} for row in execute_query(
+            "SELECT text_id, text_question FROM qa_texts WHERE deleted_at IS NULL ORDER BY md5(text_id) LIMIT %s", (limit,)
+        )]
+    texts = {row["text_id"]: build_vector_text(row["text_question"], row["text_answer"]) for row in execute_query(
+        "SELECT text_id, text_question, text_answer FROM qa_texts WHERE text_id = ANY(%s) AND deleted_at IS NULL",
+        ([i["text_id"] for i in items],)
+    )}
+    return [{"kind": "stored", **item, "expected": texts[item["text_id"]]} for item in items if item["text_id"] in texts]
+
+
+def paraphrase(llm, question: str, count: int) -> List[str]:
+    try:
+        variants = json.loads((PARAPHRASE_PROMPT | llm).invoke({"question": question, "count": count}).content)
+    except ValueError:
+        return []
+    return [v.strip() for v in variants if isinstance(v, str) and v.strip() and v.strip() != question][:count]
+
+
+def build(args):
+    rows = execute_query(
+        "SELECT text_id, text_question FROM qa_texts WHERE deleted_at IS NULL ORDER BY md5(text_id || %s) LIMIT %s",
+        (str(args.seed), args.questions)
+    )
+    llm = ChatOpenAI(model='gpt-4.1-mini', api_key=config.api_key.openai_api_key, base_url=config.api_key.base_url, temperature=0.7)
+    written = {"stored": 0, "paraphrase": 0}
+    with open(args.output, "w", encoding="utf-8") as f:
+        for row in rows:
+            items = [{"question": row["text_question"], "text_id": row["text_id"], "kind": "stored"}]
+            if args.paraphrases:
+                items += [{"question": q, "text_id": row["text_id"], "kind": "paraphrase"} for q in paraphrase(llm, row["text_question"], args.paraphrases)]
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                written[item["kind"]] += 1
+    print(json.dumps({"eval_set": args.output, **written}))
+
+
+def latency_ms(values: List[float]) -> Dict:
+    return {"p50": round(float(np.percentile(values, 50)) * 1000, 2), "p95": round(float(np.percentile(values, 95)) * 1000, 2)}
+
+
+def score(ranks: List[int], k: int) -> Dict:
+    """Recall@k and MRR from the 1-based rank of the expected document (0 when it was not returned)."""
+    ranks = np.asarray(ranks)
+    return {
+        "recall_at_k": round(float(((ranks > 0) & (ranks <= k)).mean()), 4),
+        "recall_at_1": round(float((ranks == 1).mean()), 4),
+        "mrr": round(float(np.where(ranks > 0, 1 / np.maximum(ranks, 1), 0).mean()), 4),
+    }
+
+
+def run(args):
+    items = load_eval_set(args.eval_set, args.questions)
+    embeddings, embed_times = [], []
+    for item in items:
+        start = time.perf_counter()
+        embeddings.append(emb_model.embed_query(item["question"]))
+        embed_times.append(time.perf_counter() - start)
+    print(json.dumps({"questions": len(items), "kinds": {kind: sum(i["kind"] == kind for i in items) for kind in sorted({i["kind"] for i in items})},
+                      "embedding_latency_ms": latency_ms(embed_times)}, ensure_ascii=False))
+
+    reports = []
+    for k, fetch_k, lambda_mult in itertools.product(args.k, args.fetch_k, args.lambda_mult):
+        if fetch_k < k: continue
+        retriever = initialize_retriever(k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+        ranks, times = [], []
+        for item, embedding in zip(items, embeddings):
+            start = time.perf_counter()
+            docs = search_by_vector(retriever, embedding)
+            times.append(time.perf_counter() - start)
+            contents = [doc.page_content for doc in docs]
+            ranks.append(contents.index(item["expected"]) + 1 if item["expected"] in contents else 0)
+        report = {
+            "k": k, "fetch_k": fetch_k, "lambda_mult": lambda_mult,
+            **score(ranks, k),
+            "by_kind": {kind: score([r for r, i in zip(ranks, items) if i["kind"] == kind], k) for kind in sorted({i["kind"] for i in items})},
+            "search_latency_ms": latency_ms(times),
+        }
+        print(json.dumps(report))
+        reports.append(report)
+
+    passing = [r for r in reports if r["recall_at_k"] >= args.min_recall]
+    best = min(passing, key=lambda r: (r["k"], r["search_latency_ms"]["p95"])) if passing else None
+    recommended = {key: best[key] for key in ("k", "fetch_k", "lambda_mult", "recall_at_k", "mrr", "search_latency_ms")} if best else None
+    print(json.dumps({"min_recall": args.min_recall, "recommended": recommended}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Write a labelled eval set of stored questions and paraphrases")
+    build_parser.add_argument("--questions", type=int, default=300)
+    build_parser.add_argument("--paraphrases", type=int, default=2, help="LLM paraphrases per stored question")
+    build_parser.add_argument("--seed", type=int, default=0)
+    build_parser.add_argument("--output", default="eval.jsonl")
+
+    run_parser = commands.add_parser("run", help="Sweep retriever settings over an eval set")
+    run_parser.add_argument("--eval-set", help="JSONL with question and text_id; stored questions are used without it")
+    run_parser.add_argument("--questions", type=int, default=1000)
+    run_parser.add_argument("--k", type=int, nargs="+", default=[4, 6, 10])
+    run_parser.add_argument("--fetch-k", type=int, nargs="+", default=[10, 20, 40])
+    run_parser.add_argument("--lambda-mult", type=float, nargs="+", default=[0.4, 0.7, 1.0])
+    run_parser.add_argument("--min-recall", type=float, default=0.9)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
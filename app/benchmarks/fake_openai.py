@@ -0,0 +1,167 @@
+"""
+Local stand-in for the OpenAI chat completions and embeddings API, for load tests that should not
+spend money or hit provider rate limits. Latency follows a profile (time to first token, streaming
+token rate, embedding latency, jitter), can be overridden per flag and set per model. Chat answers
+are {"response": ..., "category": 1} JSON, except for a configurable share of category 0 and
+malformed answers; embeddings are deterministic unit vectors per input.
+
+Run from the app directory, then start the app with OPENAI_BASE_URL=http://127.0.0.1:8900/v1:
+    python -m benchmarks.fake_openai --port 8900 --profile typical
+    python -m benchmarks.fake_openai --profile slow --error-rate 0.01 --completion-tokens 120
+    python -m benchmarks.fake_openai --model-profile gpt-4.1-nano=fast --model-profile gpt-4.1-mini=typical --no-answer-rate 0.1
+"""
+import argparse, asyncio, base64, hashlib, json, random, time, uuid
+from typing import Dict, List
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+PROFILES = {
+    "instant": {"ttft_ms": 0, "tokens_per_sec": 0, "embedding_ms": 0, "jitter": 0.0},
+    "fast": {"ttft_ms": 150, "tokens_per_sec": 200, "embedding_ms": 30, "jitter": 0.2},
+    "typical": {"ttft_ms": 450, "tokens_per_sec": 80, "embedding_ms": 80, "jitter": 0.35},
+    "slow": {"ttft_ms": 1500, "tokens_per_sec": 30, "embedding_ms": 250, "jitter": 0.5},
+}
+FILLER = "Для этого обратитесь в отделение банка или воспользуйтесь мобильным приложением, раздел услуги".split()
+
+app = FastAPI(title="Fake OpenAI")
+settings: Dict = {}
+
+
+def profile_for(model: str) -> Dict:
+    """Latency profile of a model: its --model-profile if given, otherwise the server profile."""
+    return settings["model_profiles"].get(model, settings)
+
+
+def jittered(milliseconds: float, jitter: float) -> float:
+    """Seconds to wait: the profile value scaled by a log-normal factor."""
+    if milliseconds <= 0: return 0.0
+    factor = random.lognormvariate(0, jitter) if jitter else 1.0
+    return milliseconds * factor / 1000
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def build_answer(completion_tokens: int) -> str:
+    """A JSON answer, or with the configured rates an unanswered (category 0) or malformed one."""
+    words = [FILLER[i % len(FILLER)] for i in range(max(1, completion_tokens * 3 // 4))]
+    roll = random.random()
+    if roll < settings["invalid_json_rate"]:
+        return "Конечно! " + " ".join(words)
+    category = 0 if roll < settings["invalid_json_rate"] + settings["no_answer_rate"] else 1
+    return json.dumps({"response": " ".join(words) + ".", "category": category}, ensure_ascii=False)
+
+
+def split_tokens(text: str) -> List[str]:
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+def error_response():
+    if random.random() < settings["error_rate"]:
+        status = random.choice([429, 500, 503])
+        return JSONResponse(status_code=status, content={"error": {"message": "Injected failure", "type": "fake_error", "code": status}})
+    return None
+
+
+def embed(item, dimensions: int) -> np.ndarray:
+    """Deterministic unit vector seeded by the input text or token ids."""
+    seed = int.from_bytes(hashlib.blake2b(json.dumps(item, ensure_ascii=False).encode(), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    if (failure := error_response()) is not None: return failure
+    inputs = body["input"]
+    # A single string or a single list of token ids is one input
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    dimensions = body.get("dimensions") or settings["embedding_dim"]
+    await asyncio.sleep(jittered(settings["embedding_ms"], settings["jitter"]))
+
+    data = []
+    for i, item in enumerate(inputs):
+        vector = embed(item, dimensions)
+        encoded = base64.b64encode(vector.astype("<f4").tobytes()).decode() if body.get("encoding_format") == "base64" else vector.tolist()
+        data.append({"object": "embedding", "index": i, "embedding": encoded})
+    tokens = sum(len(item) if isinstance(item, list) else count_tokens(item) for item in inputs)
+    return {"object": "list", "data": data, "model": body.get("model"), "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if (failure := error_response()) is not None: return failure
+    completion_tokens = min(settings["completion_tokens"], body.get("max_tokens") or body.get("max_completion_tokens") or settings["completion_tokens"])
+    answer = build_answer(completion_tokens)
+    prompt_tokens = sum(count_tokens(message.get("content") or "") for message in body.get("messages", []))
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": count_tokens(answer), "total_tokens": prompt_tokens + count_tokens(answer)}
+    completion_id, created, model = f"chatcmpl-{uuid.uuid4().hex}", int(time.time()), body.get("model")
+    profile = profile_for(model)
+    token_delay = 1 / profile["tokens_per_sec"] if profile["tokens_per_sec"] else 0.0
+
+    if not body.get("stream"):
+        await asyncio.sleep(jittered(profile["ttft_ms"], profile["jitter"]) + token_delay * len(split_tokens(answer)))
+        return {
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    def chunk(delta: Dict, finish_reason=None, **extra) -> str:
+        payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                   "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    async def stream():
+        await asyncio.sleep(jittered(profile["ttft_ms"], profile["jitter"]))
+        yield chunk({"role": "assistant", "content": ""})
+        for token in split_tokens(answer):
+            yield chunk({"content": token})
+            if token_delay: await asyncio.sleep(token_delay)
+        yield chunk({}, "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [], "usage": usage}
+            yield f"data: {json.dumps(payload)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--profile", choices=PROFILES, default="typical")
+    parser.add_argument("--ttft-ms", type=float, help="Time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, help="Streaming rate, 0 streams everything at once")
+    parser.add_argument("--embedding-ms", type=float, help="Embedding request latency")
+    parser.add_argument("--jitter", type=float, help="Sigma of the log-normal latency factor")
+    parser.add_argument("--completion-tokens", type=int, default=80)
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 429/500/503")
+    parser.add_argument("--invalid-json-rate", type=float, default=0.0, help="Share of chat answers that are not JSON")
+    parser.add_argument("--no-answer-rate", type=float, default=0.0, help="Share of chat answers with category 0")
+    parser.add_argument("--model-profile", action="append", default=[], metavar="MODEL=PROFILE",
+                        help="Latency profile of one model, e.g. gpt-4.1-nano=fast")
+    args = parser.parse_args()
+
+    settings.update(PROFILES[args.profile])
+    overrides = {"ttft_ms": args.ttft_ms, "tokens_per_sec": args.tokens_per_sec, "embedding_ms": args.embedding_ms, "jitter": args.jitter}
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    settings.update(
+        completion_tokens=args.completion_tokens, embedding_dim=args.embedding_dim, error_rate=args.error_rate,
+        invalid_json_rate=args.invalid_json_rate, no_answer_rate=args.no_answer_rate,
+        model_profiles={model: PROFILES[profile] for model, profile in (value.split("=", 1) for value in args.model_profile)}
+    )
+    print(json.dumps({"fake_openai": f"http://{args.host}:{args.port}/v1", **settings}))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
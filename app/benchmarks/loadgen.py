@@ -0,0 +1,165 @@
+"""
+Open-loop load generator for /chat and the /documents endpoints. Requests are started at the
+target rate whether or not earlier ones have finished (arrivals beyond --max-in-flight are counted
+as dropped), so latency under overload is measured rather than hidden. One JSON result per
+target rate is printed with throughput, latency percentiles, error rates and status codes.
+
+Start benchmarks.fake_openai and the app with OPENAI_BASE_URL pointing at it, seed a dataset with
+benchmarks.seed_dataset, then run from the app directory:
+    python -m benchmarks.loadgen --rps 10 25 50 --duration 60 --pairs 100000
+    python -m benchmarks.loadgen --mix chat=0.6,search=0.3,categories=0.05,create_text=0.05 --file-id 12 --output results.json
+"""
+import argparse, asyncio, json, random, time, uuid
+from collections import Counter
+from typing import Dict, List
+import httpx
+import numpy as np
+
+SCENARIOS = ("chat", "search", "categories", "file_texts", "create_text", "health")
+
+
+class Workload:
+    """Builds the request of every scenario from the synthetic pairs of benchmarks.seed_dataset."""
+
+    def __init__(self, pairs: int, file_id: int, sessions: int, faq_share: float):
+        self.pairs = pairs
+        self.file_id = file_id
+        self.sessions = [str(uuid.uuid4()) for _ in range(sessions)]
+        self.faq_share = faq_share
+
+    def request(self, scenario: str) -> Dict:
+        i = random.randrange(self.pairs)
+        if scenario == "chat":
+            # Stored questions are answered by the FAQ index; paraphrases go through retrieval and the LLM
+            question = f"Синтетический вопрос {i}?" if random.random() < self.faq_share else f"Расскажите подробнее, что означает синтетический ответ {i} и какие есть условия?"
+            return {"method": "POST", "url": "/chat", "json": {"question": question, "session_id": random.choice(self.sessions)}}
+        if scenario == "search":
+            return {"method": "GET", "url": "/documents/texts/search", "params": {"query": f"синтетический ответ {i}", "size": 10}}
+        if scenario == "categories":
+            return {"method": "GET", "url": "/documents/categories"}
+        if scenario == "file_texts":
+            return {"method": "GET", "url": f"/documents/files/{self.file_id}/texts"}
+        if scenario == "create_text":
+            return {"method": "POST", "url": f"/documents/files/{self.file_id}/texts",
+                    "json": {"question": f"Нагрузочный вопрос {uuid.uuid4().hex[:8]}?", "answer": "Нагрузочный ответ.", "text_author": "loadgen"}}
+        return {"method": "GET", "url": "/documents/health"}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        if name not in SCENARIOS: raise argparse.ArgumentTypeError(f"Unknown scenario '{name}', expected one of {', '.join(SCENARIOS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    if not latencies: return {}
+    values = np.asarray(latencies) * 1000
+    return {
+        "p50": round(float(np.percentile(values, 50)), 1),
+        "p90": round(float(np.percentile(values, 90)), 1),
+        "p95": round(float(np.percentile(values, 95)), 1),
+        "p99": round(float(np.percentile(values, 99)), 1),
+        "max": round(float(values.max()), 1),
+    }
+
+
+async def send(client: httpx.AsyncClient, scenario: str, request: Dict, results: List[Dict], started: float):
+    start = time.perf_counter()
+    try:
+        response = await client.request(request["method"], request["url"], params=request.get("params"), json=request.get("json"))
+        status = response.status_code
+        # /chat reports failures with HTTP 200 and an "error" field
+        ok = status < 400 and not (scenario == "chat" and "error" in response.json())
+    except (httpx.HTTPError, ValueError) as e:
+        status, ok = type(e).__name__, False
+    results.append({"scenario": scenario, "offset": start - started, "latency": time.perf_counter() - start, "status": status, "ok": ok})
+
+
+async def run_step(args, workload: Workload, rps: float) -> Dict:
+    """Drives one target rate for the warmup plus the measured duration."""
+    scenarios, weights = zip(*args.mix.items())
+    results, tasks, dropped = [], set(), Counter()
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        total = args.warmup + args.duration
+        next_at = 0.0
+        while next_at < total:
+            delay = started + next_at - time.perf_counter()
+            if delay > 0: await asyncio.sleep(delay)
+            scenario = random.choices(scenarios, weights)[0]
+            if len(tasks) >= args.max_in_flight:
+                if next_at >= args.warmup: dropped[scenario] += 1
+            else:
+                task = asyncio.create_task(send(client, scenario, workload.request(scenario), results, started))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            next_at += random.expovariate(rps) if args.poisson else 1 / rps
+        if tasks: await asyncio.wait(tasks)
+        elapsed = time.perf_counter() - started
+
+    measured = [r for r in results if r["offset"] >= args.warmup]
+    window = max(elapsed - args.warmup, 1e-9)
+
+    def summarize(rows: List[Dict], dropped_count: int) -> Dict:
+        errors = sum(not r["ok"] for r in rows)
+        return {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+            "dropped": dropped_count,
+            "throughput_rps": round(sum(r["ok"] for r in rows) / window, 2),
+            "latency_ms": percentiles([r["latency"] for r in rows if r["ok"]]),
+            "status_codes": dict(Counter(str(r["status"]) for r in rows)),
+        }
+
+    return {
+        "benchmark": "loadgen",
+        "target_rps": rps,
+        "duration": args.duration,
+        "arrivals": "poisson" if args.poisson else "uniform",
+        **summarize(measured, sum(dropped.values())),
+        "scenarios": {name: summarize([r for r in measured if r["scenario"] == name], dropped[name]) for name in scenarios},
+    }
+
+
+async def run(args) -> List[Dict]:
+    workload = Workload(args.pairs, args.file_id, args.sessions, args.faq_share)
+    reports = []
+    for rps in args.rps:
+        report = await run_step(args, workload, rps)
+        print(json.dumps(report, ensure_ascii=False), flush=True)
+        reports.append(report)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, nargs="+", default=[10.0], help="Target rates, run one after another")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds per rate")
+    parser.add_argument("--warmup", type=float, default=10, help="Seconds per rate excluded from the results")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("chat=0.8,search=0.15,categories=0.05"))
+    parser.add_argument("--pairs", type=int, default=10000, help="Size of the seeded dataset")
+    parser.add_argument("--file-id", type=int, help="Seeded file, needed by file_texts and create_text")
+    parser.add_argument("--sessions", type=int, default=1000, help="Distinct chat sessions")
+    parser.add_argument("--faq-share", type=float, default=0.0, help="Share of chat questions asked verbatim")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times instead of a fixed interval")
+    parser.add_argument("--output", help="Also write all results to this JSON file")
+    args = parser.parse_args()
+    if {"file_texts", "create_text"} & set(args.mix) and args.file_id is None:
+        parser.error("--file-id is required for the file_texts and create_text scenarios")
+
+    reports = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
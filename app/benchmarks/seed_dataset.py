@@ -0,0 +1,76 @@
+"""
+Seeds the knowledge base with a reproducible synthetic load-test dataset: 10k, 100k or 1M Q&A pairs
+with random unit embeddings, loaded with COPY into its own category and file. Reruns with the same
+size and seed reuse the existing file.
+
+Run from the app directory:
+    python -m benchmarks.seed_dataset --size 100k
+    python -m benchmarks.seed_dataset --size 1m --dim 1536 --seed 7
+"""
+import argparse, json, time
+from utils import db_connection
+from vdb_utils import get_collection_id
+from bulk_loader import bulk_load_pairs
+from benchmarks.bench_bulk_load import iter_synthetic_pairs, create_bench_file
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def dataset_name(size: str, seed: int) -> str:
+    return f"loadtest-{size}-seed{seed}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--dim", type=int, default=1536, help="Must match the dimensions of the active embedding model")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    name = dataset_name(args.size, args.seed)
+    conn = db_connection.get_connection()
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT f.file_id, f.category_id, COUNT(t.text_id) AS pairs FROM files f "
+            "LEFT JOIN qa_texts t ON t.file_id = f.file_id AND t.deleted_at IS NULL "
+            "WHERE f.file_name = %s GROUP BY f.file_id", (name,)
+        )
+        existing = cur.fetchone()
+    if existing:
+        print(json.dumps({"benchmark": "seed_dataset", "dataset": name, "reused": True, **existing}))
+        return
+
+    with conn.cursor() as cur:
+        file_id = create_bench_file(cur, name)
+        cur.execute("SELECT category_id FROM files WHERE file_id = %s", (file_id,))
+        category_id = cur.fetchone()["category_id"]
+        collection_id = get_collection_id(cur)
+    conn.commit()
+
+    start = time.perf_counter()
+    loaded = bulk_load_pairs(conn, iter_synthetic_pairs(SIZES[args.size], args.dim, file_id, name, args.seed), collection_id,
+                             batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    # Fresh statistics so the planner sees the new row counts during the load test
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE qa_texts")
+        cur.execute("ANALYZE langchain_pg_embedding")
+    conn.commit()
+
+    print(json.dumps({
+        "benchmark": "seed_dataset",
+        "dataset": name,
+        "reused": False,
+        "pairs": loaded,
+        "dim": args.dim,
+        "seconds": round(elapsed, 3),
+        "pairs_per_sec": round(loaded / elapsed, 1),
+        "file_id": file_id,
+        "category_id": category_id,
+    }))
+
+
+if __name__ == "__main__":
+    main()
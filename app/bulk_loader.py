@@ -0,0 +1,195 @@
+import io, json, struct, uuid
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from psycopg2.extras import execute_values
+from documents_logger import documents_logger
+from embeddings import EMBEDDING_MODEL_NAME, embedding_backend
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+
+
+def encode_text(value: str) -> bytes:
+    return value.encode("utf-8")
+
+
+def encode_int4(value: int) -> bytes:
+    return struct.pack(">i", value)
+
+
+def encode_uuid(value: str) -> bytes:
+    return uuid.UUID(str(value)).bytes
+
+
+def encode_jsonb(value: Any) -> bytes:
+    # jsonb binary format: version byte followed by the JSON text
+    return b"\x01" + json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def encode_vector(value: Sequence[float]) -> bytes:
+    # pgvector binary format: int16 dimensions, int16 unused, float4 values (big-endian)
+    array = np.asarray(value, dtype=">f4")
+    return struct.pack(">hh", array.shape[0], 0) + array.tobytes()
+
+
+class _ChunkReader(io.RawIOBase):
+    """File-like object over an iterator of byte chunks, so COPY streams rows without buffering them all."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _iter_binary_copy(rows: Iterable[tuple], encoders: List[Callable[[Any], bytes]], counter: List[int],
+                      rows_per_chunk: int = 1000) -> Iterator[bytes]:
+    field_count = struct.pack(">h", len(encoders))
+    yield PGCOPY_HEADER
+    parts = []
+    for i, row in enumerate(rows, 1):
+        counter[0] = i
+        parts.append(field_count)
+        for value, encode in zip(row, encoders):
+            if value is None:
+                parts.append(struct.pack(">i", -1))
+            else:
+                data = encode(value)
+                parts.append(struct.pack(">i", len(data)))
+                parts.append(data)
+        if i % rows_per_chunk == 0:
+            yield b"".join(parts)
+            parts = []
+    parts.append(PGCOPY_TRAILER)
+    yield b"".join(parts)
+
+
+def copy_rows(cur, table: str, columns: List[str], rows: Iterable[tuple], encoders: List[Callable[[Any], bytes]]) -> int:
+    """
+    Streams rows into a table with binary COPY.
+
+    Args:
+        cur: Cursor of the transaction the rows are written in
+        table: Target table
+        columns: Target columns, in the order of the row values
+        rows: Row tuples; None values are written as NULL
+        encoders: Binary encoder for every column
+
+    Returns:
+        Number of copied rows
+    """
+    counter = [0]
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT binary)",
+        _ChunkReader(_iter_binary_copy(rows, encoders, counter)),
+        size=1024 * 1024
+    )
+    return counter[0]
+
+
+def copy_qa_texts(cur, rows: Iterable[tuple]) -> int:
+    """Copies (text_id, file_id, question, answer, author, content_hash) rows into qa_texts."""
+    return copy_rows(
+        cur, "qa_texts",
+        ["text_id", "file_id", "text_question", "text_answer", "text_author", "content_hash"],
+        rows,
+        [encode_text, encode_int4, encode_text, encode_text, encode_text, encode_text]
+    )
+
+
+def copy_vectors(cur, rows: Iterable[tuple], collection_id: str) -> int:
+    """Copies (vector_id, embedding, document, cmetadata) rows of new texts into langchain_pg_embedding."""
+    return copy_rows(
+        cur, "langchain_pg_embedding",
+        ["id", "collection_id", "embedding", "document", "cmetadata"],
+        ((text_id, collection_id, embedding, document, metadata or {}) for text_id, embedding, document, metadata in rows),
+        [encode_text, encode_uuid, encode_vector, encode_text, encode_jsonb]
+    )
+
+
+def copy_embedding_cache(cur, rows: Iterable[Tuple[str, Sequence[float]]], model_name: str = EMBEDDING_MODEL_NAME) -> int:
+    """Copies (content_hash, embedding) rows into the embedding store through a staging table, skipping known hashes."""
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS embedding_cache_stage (LIKE embedding_cache INCLUDING DEFAULTS) ON COMMIT DELETE ROWS")
+    copy_rows(
+        cur, "embedding_cache_stage", ["content_hash", "model_name", "embedding"],
+        ((h, model_name, embedding) for h, embedding in rows),
+        [encode_text, encode_text, encode_vector]
+    )
+    cur.execute(
+        """
+        INSERT INTO embedding_cache (content_hash, model_name, embedding)
+        SELECT DISTINCT ON (content_hash) content_hash, model_name, embedding FROM embedding_cache_stage
+        ON CONFLICT (content_hash) DO NOTHING
+        """
+    )
+    return cur.rowcount
+
+
+def bulk_load_pairs(conn, rows: Iterable[tuple], collection_id: str, model_name: str = EMBEDDING_MODEL_NAME,
+                    batch_size: int = 5000, progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Loads texts with precomputed embeddings into qa_texts, langchain_pg_embedding and the embedding
+    store with COPY. Each batch is one transaction, so both tables stay consistent. Vectors carry the
+    category and file of their text in cmetadata. Rows without an embedding are queued in
+    indexing_outbox for the background indexer.
+
+    Args:
+        conn: Database connection
+        rows: (text_id, file_id, question, answer, author, content_hash, vector_text, embedding) tuples;
+            embedding may be None
+        collection_id: PGVector collection the vectors are written into
+        model_name: Embedding model that produced the vectors
+        batch_size: Rows per transaction
+        progress: Optional callback receiving the number of loaded rows
+
+    Returns:
+        Number of loaded rows
+    """
+    loaded = 0
+    batch = []
+
+    def flush():
+        nonlocal loaded
+        try:
+            indexed = [row for row in batch if row[7] is not None]
+            queued = [(row[0], row[5]) for row in batch if row[7] is None]
+            with conn.cursor() as cur:
+                cur.execute("SELECT file_id, category_id FROM files WHERE file_id = ANY(%s)", (list({row[1] for row in indexed}),))
+                categories = {r["file_id"]: r["category_id"] for r in cur.fetchall()}
+                copy_qa_texts(cur, (row[:6] for row in batch))
+                copy_vectors(cur, (
+                    (embedding_backend.vector_id(row[0]), row[7], row[6], {"category_id": categories.get(row[1]), "file_id": row[1]})
+                    for row in indexed
+                ), collection_id)
+                copy_embedding_cache(cur, ((row[5], row[7]) for row in indexed), model_name)
+                if queued:
+                    execute_values(cur, "INSERT INTO indexing_outbox (text_id, content_hash) VALUES %s", queued, page_size=1000)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        loaded += len(batch)
+        batch.clear()
+        documents_logger.info(f"Bulk loader: {loaded} pairs loaded")
+        if progress: progress(loaded)
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return loaded
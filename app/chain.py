@@ -1,15 +1,31 @@
 import logging, time
+from typing import List, Optional
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.chat_history import BaseChatMessageHistory, InMemoryChatMessageHistory
 from langchain_redis import RedisChatMessageHistory
-from langchain_core.output_parsers import StrOutputParser
 from langchain_postgres.vectorstores import PGVector, DistanceStrategy
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 import requests, json
-from prometheus_client import Histogram
+from prometheus_client import Counter, Histogram
 from env import load_config
+from embeddings import emb_model, COLLECTION_NAME
+from compact_search import CompactRetriever
+from faq_index import faq_index
+from intent import intent_classifier
+from reranker import reranker
+from chat_metrics import ChatTimings
+from logging_setup import sample_payload, truncate_payload
+from hedging import CHAT_FALLBACKS, Deadline, DeadlineExceeded, HedgedLLM, run_with_deadline
+from qa_format import parse_vector_text
+from model.model import ResponseFormat
+from answer_format import ANSWER_RESPONSE_FORMAT, parse_answer
+from config import (
+    COMPACT_SEARCH_MODE, FAQ_DIRECT_HIT_ENABLED, RERANKER_ENABLED, RETRIEVER_K, RETRIEVER_FETCH_K, RETRIEVER_LAMBDA_MULT,
+    LLM_TIMEOUT_SECONDS, LLM_MAX_RETRIES, LLM_MIN_BUDGET_SECONDS, MODEL_TIERS, DEFAULT_MODEL_TIER, SMALL_TALK_MODEL_TIER,
+    MODEL_ROUTER_ENABLED, ROUTER_MIN_TOP_SIMILARITY, ROUTER_MIN_MARGIN, ROUTER_MAX_QUESTION_WORDS, ROUTER_MAX_HISTORY_MESSAGES
+)
 
 load_dotenv()
 requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
@@ -18,29 +34,206 @@ requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.
 DB_QUERY_TIME = Histogram("db_query_time_seconds", "Time taken for DB query")
 API_REQUEST_TIME = Histogram("api_request_time_seconds", "Time taken for OpenAI API request")
 
+# Метрики маршрутизации между моделями
+MODEL_TIER_REQUESTS = Counter("model_tier_requests_total", "Answer generations by model tier", ["tier"])
+MODEL_TIER_ESCALATIONS = Counter("model_tier_escalations_total", "Answers retried on the next model tier", ["tier", "reason"])
+
 
 config = load_config('env-path')
-emb_model = OpenAIEmbeddings(model='text-embedding-3-small', api_key=config.api_key.openai_api_key)
 vector_db = PGVector(
     embeddings=emb_model,
     connection=config.vdb.database_url,
-    collection_name="chatbot_base",
+    collection_name=COLLECTION_NAME,
     use_jsonb=True,
     distance_strategy=DistanceStrategy.COSINE
 )
 
 LANG_NAMES = {"ru" : 'Русский', "kk": 'Қазақша', "en" : 'English'}
     
-def initialize_retriever():
-    return vector_db.as_retriever(
-        search_type="mmr",
-        search_kwargs={
-            "k": 10,
-            "fetch_k": 20,
-            "lambda_mult": 0.4,
-        }
+def initialize_retriever(k: int = RETRIEVER_K, fetch_k: int = RETRIEVER_FETCH_K, lambda_mult: float = RETRIEVER_LAMBDA_MULT,
+                         category_ids: Optional[List[int]] = None):
+    """MMR retriever over the whole collection, or only over the vectors of category_ids."""
+    if COMPACT_SEARCH_MODE != "off":
+        return CompactRetriever(k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, category_ids=category_ids)
+    search_kwargs = {
+        "k": k,
+        "fetch_k": fetch_k,
+        "lambda_mult": lambda_mult,
+    }
+    if category_ids:
+        # $in compares cmetadata ->> 'category_id', which ix_langchain_pg_embedding_category_id indexes
+        search_kwargs["filter"] = {"category_id": {"$in": category_ids}}
+    return vector_db.as_retriever(search_type="mmr", search_kwargs=search_kwargs)
+
+
+def search_by_vector(retriever, embedding):
+    """
+    Runs a retriever from initialize_retriever with an already computed query embedding.
+    The cosine distance of every document to the query is kept in its metadata.
+    """
+    if isinstance(retriever, CompactRetriever):
+        return retriever.search_by_vector(embedding)
+    docs = []
+    for doc, distance in vector_db.max_marginal_relevance_search_with_score_by_vector(embedding, **retriever.search_kwargs):
+        doc.metadata["distance"] = distance
+        docs.append(doc)
+    return docs
+
+
+def choose_model_tier(question: str, docs, stmem) -> str:
+    """
+    Cheapest tier for clear-cut questions: the closest document is close to the question and well
+    ahead of the next one, the question is short and the conversation has just started.
+    """
+    if not MODEL_ROUTER_ENABLED: return DEFAULT_MODEL_TIER
+    distances = sorted(doc.metadata["distance"] for doc in docs if "distance" in doc.metadata)
+    if not distances: return DEFAULT_MODEL_TIER
+    margin = distances[1] - distances[0] if len(distances) > 1 else 1.0
+    clear_cut = (
+        1 - distances[0] >= ROUTER_MIN_TOP_SIMILARITY
+        and margin >= ROUTER_MIN_MARGIN
+        and len(question.split()) <= ROUTER_MAX_QUESTION_WORDS
+        and len(stmem) <= ROUTER_MAX_HISTORY_MESSAGES
+    )
+    return next(iter(MODEL_TIERS)) if clear_cut else DEFAULT_MODEL_TIER
+
+
+class InvalidAnswer(Exception):
+    """The LLM reply could not be read as a ResponseFormat."""
+
+
+def escalation_reason(answer: Optional[ResponseFormat]) -> Optional[str]:
+    if answer is None: return "invalid_json"
+    return "no_answer" if answer.category == 0 else None
+
+
+def complete_with_tiers(prompt_value, tier: str, timings: ChatTimings, deadline: Deadline) -> ResponseFormat:
+    """
+    Answers with the given tier and moves up to the next tier while the answer cannot be parsed or
+    has category 0. When a higher tier fails, runs out of time or replies unreadably, the last
+    readable (category 0) answer is kept; InvalidAnswer is raised when no tier gave a readable answer.
+    """
+    tiers = list(MODEL_TIERS)
+    readable = None
+    for position in range(tiers.index(tier), len(tiers)):
+        tier = tiers[position]
+        MODEL_TIER_REQUESTS.labels(tier=tier).inc()
+        try:
+            text = answer_clients[tier].complete(prompt_value, timings, deadline)
+        except Exception:
+            if readable is not None: return readable
+            raise
+        with timings.stage("json_parse"):
+            answer = parse_answer(text)
+        if answer is not None: readable = answer
+        reason = escalation_reason(answer)
+        if reason is None or position == len(tiers) - 1: break
+        MODEL_TIER_ESCALATIONS.labels(tier=tier, reason=reason).inc()
+        logging.info(f"Escalating answer from tier {tier}: {reason}")
+    if readable is None: raise InvalidAnswer(f"Unreadable answer from tier {tier}: {truncate_payload(text)}")
+    return readable
+
+OFF_TOPIC_RESPONSES = {
+    "ru": "Мне очень жаль, но я не могу обсуждать эту тему. Может быть, я могу помочь вам в чем-то другом? 🙏",
+    "kk": "Кешіріңіз, бұл тақырыпты талқылай алмаймын. Банк қызметтері бойынша басқа сұрағыңызға көмектесе аламын. 🙏",
+    "en": "I'm sorry, but I can't discuss this topic. Is there anything else I can help you with? 🙏",
+}
+
+# Used when the small talk LLM call fails or runs out of time
+SMALL_TALK_FALLBACK_RESPONSES = {
+    "ru": "Здравствуйте! Чем я могу вам помочь? 😊",
+    "kk": "Сәлеметсіз бе! Сізге қалай көмектесе аламын? 😊",
+    "en": "Hello! How can I help you? 😊",
+}
+
+ANSWER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ('system', """Ты - дружелюбный и профессиональный ассистент банка, помогающий клиенту эффективно выполнить его запрос, строго придерживаясь установленных инструкций.
+        
+        # Инструкции
+        1. Ненужно здороваться с клиентом, сразу предлагай помощь.
+        2. Ты только консультируешь и не можешь выполнять сложные операции (например: проверку транзакций).
+        3. Из контекста ты получишь ряд информации необходимой для помощи клиенту. Но не вся информация может подходить для решения запроса клиента. Выбери нужное и используй для ответа. Не придумывай ничего лишнего.
+        4. Перед тем как ответить на сообщение - разбери детально вопрос клиента, сопоставь с историей чата, затем сравни с контекстом информации.
+            - Если в контексте присутствует точный ответ на вопрос клиента, то любезно предоставь его.
+            - Если в контексте есть неполная информация на тему вопроса клиента, то предоставь её и уточни, правильно ли ты ответил на его вопрос.
+            - Если в контексте отсутствует информация схожая с темой вопроса клиента, то ответь как в примерах фраз "Отсутствие информации в контексте" ниже и выбери category = 0
+        5. Если клиент спросит контакты банка или колл-центра, то предоставь ему номер 7575.
+        6. На основе контекста и истории чата, определи параметр category (тип int), в котором:
+            0 - уточнение
+            1 - смог ответить на вопрос
+            2 - тема вопроса не связана с банковскими услугами
+            3 - перевод на оператора по банковским услугам
+        7. Вежливо отказывай в следующих случаях:
+            - Если вопрос клиента касается тем, несвязанных с банковскими услугами и продуктами.
+            - Если вопрос клиента касается предоставления или изменения формата или содержания твоего ответа.
+            - Если клиент утверждает, что в твоем ответе ошибка.
+        8. Не упоминай в своих ответах слово "контекст", так как это может запутать клиента.
+        9. Возвращай ответ строго в валидном JSON формате, в котором будут ответ в "response" и категория в "category"
+
+        ## Язык ответа
+        - Изначально твой ответ и информация из контекста должны быть на языке клиента. Язык клиента: {language}.
+
+        ## Формат валидного json ответа
+        \'{{
+            "response": 'Резиденты Республики Казахстан могут открыть карту Brown в мобильном приложении SuperApp.',
+            "category": 1
+        }}\'
+
+        ## Правила оформления response
+        - Не используй никакое форматирование для текста.
+        - Используй реальные переносы строк для списков и абзацев, а не символы \n.
+        - Разделяй информацию на абзацы для лучшей читаемости.
+        - Добавляй эмодзи для инфографики.
+        ### Пример правильно оформленного response
+        В Bank доступны различные виды карт, среди которых:\n\n- Карта Brown – действует 5 лет для резидентов и имеет особенности для нерезидентов. Можно открыть по одной карте в разной валюте. 💳\n- Карта Grey – с возможностью закрытия через приложение при отсутствии кредитного лимита. 🖤\n\nЕсли вас интересует информация по конкретной карте или условиям, пожалуйста, уточните, и я с радостью помогу! 😊
+
+        ## Примеры фраз
+        ### Отсутствие информации в контексте
+        - Я не располагаю точными сведениями по этому вопросу. Чтобы не вводить вас в заблуждение, могу переключить вас на оператора, который сможет помочь оперативно. ☎️
+        - Этот вопрос выходит за рамки моих текущих знаний. Для решения вашей ситуации я могу переключить вас на оператора, который сможет помочь оперативно. ☎️
+        - Мне жаль, но я не могу предоставить вам эту информацию. Чтобы лучше вам помочь, не могли бы вы уточнить, что именно вас интересует?
+        
+        ### Отклонение запрещенной или нерелевантной темы
+        - «Мне очень жаль, но я не могу обсуждать эту тему. Может быть, я могу помочь вам в чем-то другом?»
+        - «Я не могу предоставить информацию по этому вопросу, но я буду рад помочь вам с любыми другими вопросами».
+        """),
+        MessagesPlaceholder(variable_name="history"),
+        ('human', 'Контекст: {context}'),
+        ('human', 'Вопрос: {question}'),
+    ]
+)
+
+SMALL_TALK_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ('system', """Ты - дружелюбный ассистент банка. Клиент написал приветствие, благодарность или прощание без вопроса.
+        Ответь коротко (одно-два предложения) и вежливо на языке клиента ({language}), предложи помощь по банковским услугам.
+        Не используй форматирование, можешь добавить эмодзи. Верни только текст ответа."""),
+        MessagesPlaceholder(variable_name="history"),
+        ('human', '{question}'),
+    ]
+)
+
+# Clients are created once; stream_usage reports token usage on the last streamed chunk.
+# Retries are kept low because HedgedLLM sends a second request when the first one is slow.
+def create_llm(model: str, max_tokens: int, response_format: Optional[dict] = None) -> ChatOpenAI:
+    return ChatOpenAI(
+        model=model,
+        api_key=config.api_key.openai_api_key,
+        base_url=config.api_key.base_url,
+        temperature=0,
+        max_tokens=max_tokens,
+        timeout=LLM_TIMEOUT_SECONDS,
+        max_retries=LLM_MAX_RETRIES,
+        stream_usage=True,
+        model_kwargs={"response_format": response_format} if response_format else {}
     )
 
+answer_clients = {
+    tier: HedgedLLM(create_llm(spec["model"], spec["max_tokens"], ANSWER_RESPONSE_FORMAT)) for tier, spec in MODEL_TIERS.items()
+}
+small_talk_client = HedgedLLM(create_llm(MODEL_TIERS[SMALL_TALK_MODEL_TIER]["model"], 100))
+
 def get_redis_history(session_id: str) -> BaseChatMessageHistory:
     return RedisChatMessageHistory(
         session_id,
@@ -49,97 +242,81 @@ def get_redis_history(session_id: str) -> BaseChatMessageHistory:
         ttl=7200,
     )
     
-def generate_answer(question, session_id, lang_code):
-    retriever = initialize_retriever()
-    chat_history = get_redis_history(session_id)
-    stmem = chat_history.messages[-10:]
+def retrieve_documents(question, timings: ChatTimings, category_ids: Optional[List[int]] = None):
+    """Runs the retriever in two timed steps: query embedding and vector search."""
+    retriever = initialize_retriever(category_ids=category_ids)
+    with timings.stage("query_embedding"):
+        embedding = emb_model.embed_query(question)
+    with timings.stage("vector_search"):
+        return search_by_vector(retriever, embedding)
+
+
+def fallback_answer(docs, reason: str) -> ResponseFormat:
+    """The answer of the best retrieved Q&A pair, used when the LLM cannot answer in time or readably."""
+    CHAT_FALLBACKS.labels(reason=reason).inc()
+    _, answer = parse_vector_text(docs[0].page_content)
+    return ResponseFormat(response=answer, category=1)
+
+
+def generate_answer(question, session_id, lang_code, timings: Optional[ChatTimings] = None, deadline: Optional[Deadline] = None,
+                    category_ids: Optional[List[int]] = None):
+    """
+    Answers a question of a chat session; without a session_id the answer uses and keeps no history.
+    With category_ids only texts of these categories are used.
+    Retrieval and generation stop at the deadline; when the LLM cannot answer in time the best
+    retrieved answer is returned. Returns the parsed answer with the DB and API times.
+    """
+    timings = timings or ChatTimings()
+    deadline = deadline or Deadline()
+    chat_history = get_redis_history(session_id) if session_id else InMemoryChatMessageHistory()
+    if FAQ_DIRECT_HIT_ENABLED:
+        with timings.stage("faq_lookup"):
+            hit = faq_index.match(question, category_ids)
+        if hit:
+            logging.info(f"Direct FAQ hit: text_id={hit['text_id']} score={hit['score']:.1f}", extra={"event": "faq_hit", "session_id": session_id})
+            with timings.stage("history_write"):
+                chat_history.add_messages([HumanMessage(content=question), AIMessage(content=hit["text_answer"])])
+            return ResponseFormat(response=hit["text_answer"], category=1), timings.stages["faq_lookup"], 0
+
+    with timings.stage("history_read"):
+        stmem = chat_history.messages[-10:]
     language = LANG_NAMES[lang_code]
+    with timings.stage("intent"):
+        intent = intent_classifier.route(question)
+    if intent:
+        return answer_without_context(intent, question, chat_history, stmem, lang_code, timings, deadline)
+
     try:
         start_db = time.perf_counter()
+        # The retrieval thread keeps running after the deadline, so it gets its own timings, merged only when it finishes in time
+        retrieval_timings = ChatTimings()
         with DB_QUERY_TIME.time():
-            docs = retriever.invoke(question)
+            docs = run_with_deadline("retrieval", deadline, retrieve_documents, question, retrieval_timings, category_ids)
+        timings.merge(retrieval_timings)
         db_time = time.perf_counter() - start_db
     except Exception as e:
         logging.error(f"Error retrieving documents: {str(e)}")
         print(f"Error retrieving documents: {str(e)}")
-        return "Извините, у меня возникли проблемы с доступом к информации. Пожалуйста, попробуйте повторить запрос позже. 🙏", 0, 0
+        return ResponseFormat(response="Извините, у меня возникли проблемы с доступом к информации. Пожалуйста, попробуйте повторить запрос позже. 🙏", category=0), 0, 0
     if not docs:
-        return "Извините, я не нашел подходящей информации по вашему запросу. Пожалуйста, попробуйте повторить запрос позже. 🙏", 0, 0
-    
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ('system', """Ты - дружелюбный и профессиональный ассистент банка, помогающий клиенту эффективно выполнить его запрос, строго придерживаясь установленных инструкций.
-            
-            # Инструкции
-            1. Ненужно здороваться с клиентом, сразу предлагай помощь.
-            2. Ты только консультируешь и не можешь выполнять сложные операции (например: проверку транзакций).
-            3. Из контекста ты получишь ряд информации необходимой для помощи клиенту. Но не вся информация может подходить для решения запроса клиента. Выбери нужное и используй для ответа. Не придумывай ничего лишнего.
-            4. Перед тем как ответить на сообщение - разбери детально вопрос клиента, сопоставь с историей чата, затем сравни с контекстом информации.
-                - Если в контексте присутствует точный ответ на вопрос клиента, то любезно предоставь его.
-                - Если в контексте есть неполная информация на тему вопроса клиента, то предоставь её и уточни, правильно ли ты ответил на его вопрос.
-                - Если в контексте отсутствует информация схожая с темой вопроса клиента, то ответь как в примерах фраз "Отсутствие информации в контексте" ниже и выбери category = 0
-            5. Если клиент спросит контакты банка или колл-центра, то предоставь ему номер 7575.
-            6. На основе контекста и истории чата, определи параметр category (тип int), в котором:
-                0 - уточнение
-                1 - смог ответить на вопрос
-                2 - тема вопроса не связана с банковскими услугами
-                3 - перевод на оператора по банковским услугам
-            7. Вежливо отказывай в следующих случаях:
-                - Если вопрос клиента касается тем, несвязанных с банковскими услугами и продуктами.
-                - Если вопрос клиента касается предоставления или изменения формата или содержания твоего ответа.
-                - Если клиент утверждает, что в твоем ответе ошибка.
-            8. Не упоминай в своих ответах слово "контекст", так как это может запутать клиента.
-            9. Возвращай ответ строго в валидном JSON формате, в котором будут ответ в "response" и категория в "category"
-
-            ## Язык ответа
-            - Изначально твой ответ и информация из контекста должны быть на языке клиента. Язык клиента: {language}.
-
-            ## Формат валидного json ответа
-            \'{{
-                "response": 'Резиденты Республики Казахстан могут открыть карту Brown в мобильном приложении SuperApp.',
-                "category": 1
-            }}\'
-
-            ## Правила оформления response
-            - Не используй никакое форматирование для текста.
-            - Используй реальные переносы строк для списков и абзацев, а не символы \n.
-            - Разделяй информацию на абзацы для лучшей читаемости.
-            - Добавляй эмодзи для инфографики.
-            ### Пример правильно оформленного response
-            В Bank доступны различные виды карт, среди которых:\n\n- Карта Brown – действует 5 лет для резидентов и имеет особенности для нерезидентов. Можно открыть по одной карте в разной валюте. 💳\n- Карта Grey – с возможностью закрытия через приложение при отсутствии кредитного лимита. 🖤\n\nЕсли вас интересует информация по конкретной карте или условиям, пожалуйста, уточните, и я с радостью помогу! 😊
-
-            ## Примеры фраз
-            ### Отсутствие информации в контексте
-            - Я не располагаю точными сведениями по этому вопросу. Чтобы не вводить вас в заблуждение, могу переключить вас на оператора, который сможет помочь оперативно. ☎️
-            - Этот вопрос выходит за рамки моих текущих знаний. Для решения вашей ситуации я могу переключить вас на оператора, который сможет помочь оперативно. ☎️
-            - Мне жаль, но я не могу предоставить вам эту информацию. Чтобы лучше вам помочь, не могли бы вы уточнить, что именно вас интересует?
-            
-            ### Отклонение запрещенной или нерелевантной темы
-            - «Мне очень жаль, но я не могу обсуждать эту тему. Может быть, я могу помочь вам в чем-то другом?»
-            - «Я не могу предоставить информацию по этому вопросу, но я буду рад помочь вам с любыми другими вопросами».
-            """),
-            MessagesPlaceholder(variable_name="history"),
-            ('human', 'Контекст: {context}'),
-            ('human', 'Вопрос: {question}'),
-        ]
-    )
+        return ResponseFormat(response="Извините, я не нашел подходящей информации по вашему запросу. Пожалуйста, попробуйте повторить запрос позже. 🙏", category=0), 0, 0
+    if RERANKER_ENABLED and deadline.remaining() > LLM_MIN_BUDGET_SECONDS:
+        try:
+            with timings.stage("rerank"):
+                docs = reranker.rerank(question, docs)
+        except Exception as e:
+            logging.error(f"Error reranking documents, using all retrieved documents: {str(e)}")
     
-    logging.info(f"Question: {question}")
-    logging.info(f"Documents: {docs}")
-    logging.info(f"Chat history: {stmem}")
-    
-    context = '\n'.join(doc.page_content for doc in docs)
-
-    start_api = time.perf_counter()
-    with API_REQUEST_TIME.time():
-        llm = ChatOpenAI(
-            model='gpt-4.1-mini',
-            api_key=config.api_key.openai_api_key,
-            temperature=0, 
-            max_tokens=500
+    if sample_payload():
+        logging.info(
+            "Retrieval payload",
+            extra={"event": "retrieval_payload", "session_id": session_id, "question": truncate_payload(question),
+                   "documents": truncate_payload(docs), "history": truncate_payload(stmem)}
         )
-        chain = prompt | llm | StrOutputParser()
-        response = chain.invoke(
+    
+    with timings.stage("prompt_build"):
+        context = '\n'.join(doc.page_content for doc in docs)
+        prompt_value = ANSWER_PROMPT.invoke(
             {
                 "question": question,
                 "context": context,
@@ -147,7 +324,37 @@ def generate_answer(question, session_id, lang_code):
                 "language": language
             }
         )
-    chat_history.add_messages([HumanMessage(content=question), AIMessage(content=json.loads(response)["response"])])
+
+    start_api = time.perf_counter()
+    try:
+        with API_REQUEST_TIME.time():
+            answer = complete_with_tiers(prompt_value, choose_model_tier(question, docs, stmem), timings, deadline)
+    except Exception as e:
+        reason = "deadline" if isinstance(e, DeadlineExceeded) else "invalid_answer" if isinstance(e, InvalidAnswer) else "llm_error"
+        logging.warning(f"Answering with the best retrieved document ({reason}): {e}", extra={"event": "fallback", "session_id": session_id})
+        answer = fallback_answer(docs, reason)
     api_time = time.perf_counter() - start_api
+    with timings.stage("history_write"):
+        chat_history.add_messages([HumanMessage(content=question), AIMessage(content=answer.response)])
+
+    return answer, db_time, api_time
 
-    return response, db_time, api_time
\ No newline at end of file
+
+def answer_without_context(intent, question, chat_history, stmem, lang_code, timings: ChatTimings, deadline: Deadline):
+    """Answers small talk with a short LLM call and off-topic messages with a canned refusal, skipping retrieval."""
+    start_api = time.perf_counter()
+    if intent == "off_topic":
+        answer = OFF_TOPIC_RESPONSES[lang_code]
+    else:
+        with timings.stage("prompt_build"):
+            prompt_value = SMALL_TALK_PROMPT.invoke({"question": question, "history": stmem, "language": LANG_NAMES[lang_code]})
+        try:
+            with API_REQUEST_TIME.time():
+                answer = small_talk_client.complete(prompt_value, timings, deadline)
+        except Exception as e:
+            reason = "deadline" if isinstance(e, DeadlineExceeded) else "llm_error"
+            logging.warning(f"Answering small talk with a canned greeting ({reason}): {e}", extra={"event": "fallback"})
+            answer = SMALL_TALK_FALLBACK_RESPONSES[lang_code]
+    with timings.stage("history_write"):
+        chat_history.add_messages([HumanMessage(content=question), AIMessage(content=answer)])
+    return ResponseFormat(response=answer, category=2), 0, time.perf_counter() - start_api
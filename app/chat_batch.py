@@ -0,0 +1,159 @@
+"""
+Answers many questions through the chat pipeline with bounded concurrency and without chat history,
+for replaying QA sets after knowledge-base changes. Input is NDJSON with one {"question": ...,
+"id": ..., "language": ..., "category_ids": [...]} object (or a bare JSON string) per line; results are NDJSON lines in
+completion order.
+
+Run from the app directory:
+    python chat_batch.py questions.ndjson --concurrency 8 --output answers.ndjson
+    cat questions.ndjson | python chat_batch.py - > answers.ndjson
+"""
+import argparse, asyncio, json, logging, sys, time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import AsyncIterator, Dict, Iterable, Iterator, Union
+from pydantic import ValidationError
+from prometheus_client import Counter
+from starlette.concurrency import run_in_threadpool
+from model.model import BatchQuestion
+from language import identify_language
+from chain import generate_answer
+from chat_metrics import ChatTimings
+from hedging import Deadline
+from config import CHAT_BATCH_CONCURRENCY, CHAT_BATCH_MAX_QUESTIONS
+
+# Метрики пакетных запросов
+BATCH_QUESTIONS = Counter("chat_batch_questions_total", "Questions answered through the batch chat", ["status"])
+
+
+def parse_question(line: Union[str, bytes]) -> Union[BatchQuestion, str]:
+    """A question from an NDJSON line, or the reason it could not be read."""
+    try:
+        value = json.loads(line)
+        return BatchQuestion(question=value) if isinstance(value, str) else BatchQuestion.model_validate(value)
+    except ValueError as e:
+        # ValidationError is a ValueError too
+        return e.errors()[0]["msg"] if isinstance(e, ValidationError) else f"Invalid JSON: {e}"
+
+
+def iter_questions(lines: Iterable[Union[str, bytes]]) -> Iterator[Union[BatchQuestion, str]]:
+    for line in lines:
+        if line.strip(): yield parse_question(line)
+
+
+async def aiter_ndjson_questions(chunks: AsyncIterator[bytes]) -> AsyncIterator[Union[BatchQuestion, str]]:
+    """Questions of an NDJSON request body, read as it arrives."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip(): yield parse_question(line)
+    if buffer.strip(): yield parse_question(buffer)
+
+
+def answer_question(index: int, item: Union[BatchQuestion, str]) -> Dict:
+    """Runs one question through generate_answer without a session."""
+    if isinstance(item, str):
+        BATCH_QUESTIONS.labels(status="invalid").inc()
+        return {"index": index, "error": item}
+
+    start = time.perf_counter()
+    deadline = Deadline()
+    result = {"index": index, "id": item.id, "question": item.question}
+    timings = ChatTimings()
+    language, category = item.language or "unknown", "error"
+    try:
+        with timings.stage("language_id"):
+            language = item.language or identify_language(item.question)
+        answer, _, _ = generate_answer(item.question, None, language, timings, deadline, item.category_ids)
+        category = answer.category
+        result.update(language=language, response=answer.response, category=category)
+        BATCH_QUESTIONS.labels(status="answered").inc()
+    except Exception as e:
+        logging.error(f"Error answering batch question {index}: {e}")
+        result.update(language=language, error=str(e))
+        BATCH_QUESTIONS.labels(status="error").inc()
+    finally:
+        timings.observe(language, category)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+async def answer_stream(items: AsyncIterator[Union[BatchQuestion, str]], concurrency: int,
+                        max_questions: int = CHAT_BATCH_MAX_QUESTIONS) -> AsyncIterator[str]:
+    """
+    Answers questions as they are read, at most `concurrency` at a time, and yields NDJSON result
+    lines as soon as each answer completes.
+    """
+    results: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(index: int, item):
+        try:
+            results.put_nowait(await run_in_threadpool(answer_question, index, item))
+        finally:
+            semaphore.release()
+
+    async def feed():
+        tasks, count = set(), 0
+        try:
+            async for item in items:
+                if count >= max_questions:
+                    results.put_nowait({"index": count, "error": f"Batch is limited to {max_questions} questions"})
+                    break
+                await semaphore.acquire()
+                task = asyncio.create_task(answer(count, item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                count += 1
+            if tasks: await asyncio.wait(tasks)
+            logging.info(f"Batch of {count} questions answered")
+        finally:
+            results.put_nowait(None)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while (result := await results.get()) is not None:
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    finally:
+        feeder.cancel()
+
+
+def answer_batch(items: Iterable[Union[BatchQuestion, str]], concurrency: int) -> Iterator[Dict]:
+    """Synchronous counterpart of answer_stream for the CLI."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = set()
+        for index, item in enumerate(items):
+            if len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+            pending.add(executor.submit(answer_question, index, item))
+        for future in pending:
+            yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="NDJSON file with questions, - for stdin")
+    parser.add_argument("--concurrency", type=int, default=CHAT_BATCH_CONCURRENCY)
+    parser.add_argument("--output", help="NDJSON file for the results (stdout by default)")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    answered = errors = 0
+    start = time.perf_counter()
+    try:
+        for result in answer_batch(iter_questions(source), args.concurrency):
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            answered += "error" not in result
+            errors += "error" in result
+    finally:
+        if source is not sys.stdin: source.close()
+        if output is not sys.stdout: output.close()
+    print(json.dumps({"answered": answered, "errors": errors, "seconds": round(time.perf_counter() - start, 2)}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+from prometheus_client import Counter, Histogram
+
+# Метрики этапов обработки сообщения в чате
+CHAT_STAGE_TIME = Histogram(
+    "chat_stage_time_seconds", "Time spent in each stage of answering a chat message",
+    ["stage", "language", "category"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 30)
+)
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used for chat answers", ["kind", "model", "language", "category"])
+
+
+class ChatTimings:
+    """
+    Collects stage durations and token usage of one chat request. They are exported once the
+    response category is known, so every sample carries both the language and the category.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.tokens: Dict[Tuple[str, str], int] = {}
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def add_tokens(self, model: str, prompt_tokens: int, completion_tokens: int):
+        for kind, count in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+            self.tokens[(kind, model)] = self.tokens.get((kind, model), 0) + count
+
+    def merge(self, other: "ChatTimings"):
+        for stage, seconds in other.stages.items():
+            self.record(stage, seconds)
+        for (kind, model), count in other.tokens.items():
+            self.tokens[(kind, model)] = self.tokens.get((kind, model), 0) + count
+
+    def observe(self, language: str, category):
+        category = str(category)
+        for stage, seconds in self.stages.items():
+            CHAT_STAGE_TIME.labels(stage=stage, language=language, category=category).observe(seconds)
+        for (kind, model), count in self.tokens.items():
+            LLM_TOKENS.labels(kind=kind, model=model, language=language, category=category).inc(count)
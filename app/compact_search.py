@@ -0,0 +1,240 @@
+"""
+Two-stage vector search over compact representations of the stored embeddings.
+
+Stage 1 takes candidates from an HNSW expression index over a shortened (Matryoshka prefix) vector,
+stored as halfvec or binary-quantized bits. Stage 2 rescores the candidates with the full-precision
+vectors kept in langchain_pg_embedding, and MMR picks the final documents.
+
+Create the index once, from the app directory:
+    python compact_search.py create-index --mode halfvec --dimensions 512
+"""
+import argparse, threading, time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import psycopg2
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from utils import execute_query, execute_single_query, get_db_cursor, get_connection_string
+from embedding_cache import to_pgvector
+from embeddings import COLLECTION_NAME, emb_model
+from config import (
+    COMPACT_SEARCH_MODE, COMPACT_SEARCH_DIMENSIONS, COMPACT_SEARCH_CANDIDATES,
+    COMPACT_HNSW_M, COMPACT_HNSW_EF_CONSTRUCTION, COMPACT_SCOPED_EXACT_MAX_VECTORS, COMPACT_SCOPE_COUNT_TTL_SECONDS
+)
+
+COMPACT_MODES = ("halfvec", "binary")
+# Largest hnsw.ef_search pgvector accepts
+HNSW_MAX_EF_SEARCH = 1000
+
+_scope_sizes: Dict[Optional[Tuple[int, ...]], Tuple[float, int]] = {}
+_scope_sizes_lock = threading.Lock()
+
+
+def _compact_expression(mode: str, dimensions: int, operand: str) -> Tuple[str, str, str]:
+    """Returns the compact expression of a vector, its distance operator and the HNSW operator class."""
+    if mode == "halfvec":
+        return f"subvector({operand}, 1, {dimensions})::halfvec({dimensions})", "<=>", "halfvec_cosine_ops"
+    if mode == "binary":
+        return f"binary_quantize(subvector({operand}, 1, {dimensions}))::bit({dimensions})", "<~>", "bit_hamming_ops"
+    raise ValueError(f"Unknown compact search mode '{mode}', expected one of: {', '.join(COMPACT_MODES)}")
+
+
+def compact_index_name(mode: str, dimensions: int) -> str:
+    return f"ix_embedding_{mode}{dimensions}_{COLLECTION_NAME}"
+
+
+@lru_cache(maxsize=None)
+def active_collection_id() -> str:
+    row = execute_single_query("SELECT uuid FROM langchain_pg_collection WHERE name = %s", (COLLECTION_NAME,))
+    if not row:
+        raise ValueError(f"Vector collection '{COLLECTION_NAME}' does not exist")
+    return str(row["uuid"])
+
+
+def create_compact_index(mode: str = COMPACT_SEARCH_MODE, dimensions: int = COMPACT_SEARCH_DIMENSIONS) -> str:
+    """
+    Builds the compact HNSW index for the active collection without blocking writes.
+
+    Returns:
+        Name of the index
+    """
+    expression, _, opclass = _compact_expression(mode, dimensions, "embedding")
+    name = compact_index_name(mode, dimensions)
+    conn = psycopg2.connect(get_connection_string())
+    try:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON langchain_pg_embedding
+                USING hnsw (({expression}) {opclass}) WITH (m = %s, ef_construction = %s)
+                WHERE collection_id = %s
+                """,
+                (COMPACT_HNSW_M, COMPACT_HNSW_EF_CONSTRUCTION, active_collection_id())
+            )
+    finally:
+        conn.close()
+    return name
+
+
+def get_storage_sizes() -> Dict[str, int]:
+    """Bytes taken by the full-precision vectors of the collection and by each compact index."""
+    sizes = {"full_vectors": execute_single_query(
+        "SELECT COALESCE(SUM(pg_column_size(embedding)), 0) AS size FROM langchain_pg_embedding WHERE collection_id = %s",
+        (active_collection_id(),)
+    )["size"]}
+    for row in execute_query(
+        "SELECT indexname, pg_relation_size(indexname::regclass) AS size FROM pg_indexes WHERE tablename = 'langchain_pg_embedding' AND indexname LIKE %s",
+        (f"ix_embedding_%_{COLLECTION_NAME}",)
+    ):
+        sizes[row["indexname"]] = row["size"]
+    return sizes
+
+
+def scope_size(category_ids: Optional[List[int]]) -> int:
+    """Number of vectors in the collection, or in the given categories; cached for COMPACT_SCOPE_COUNT_TTL_SECONDS."""
+    key = tuple(sorted(set(category_ids))) if category_ids else None
+    with _scope_sizes_lock:
+        cached = _scope_sizes.get(key)
+    if cached and time.monotonic() - cached[0] < COMPACT_SCOPE_COUNT_TTL_SECONDS:
+        return cached[1]
+    if key:
+        row = execute_single_query(
+            "SELECT COUNT(*) AS count FROM langchain_pg_embedding WHERE collection_id = %s AND cmetadata ->> 'category_id' = ANY(%s)",
+            (active_collection_id(), [str(category_id) for category_id in key])
+        )
+    else:
+        row = execute_single_query("SELECT COUNT(*) AS count FROM langchain_pg_embedding WHERE collection_id = %s", (active_collection_id(),))
+    with _scope_sizes_lock:
+        _scope_sizes[key] = (time.monotonic(), row["count"])
+    return row["count"]
+
+
+def two_stage_search(embedding: List[float], fetch_k: int, mode: str = COMPACT_SEARCH_MODE,
+                     dimensions: int = COMPACT_SEARCH_DIMENSIONS, candidates: int = COMPACT_SEARCH_CANDIDATES,
+                     category_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Retrieves candidates from the compact index and rescores them at full precision.
+
+    Args:
+        embedding: Full-precision query embedding
+        fetch_k: Number of rescored results to return
+        mode: Compact representation, "halfvec" or "binary"
+        dimensions: Length of the vector prefix used for candidates
+        candidates: Number of candidates taken from the compact index
+        category_ids: Only search vectors of these categories (by the category_id in cmetadata). HNSW
+            filters after picking candidates, so scopes of up to COMPACT_SCOPED_EXACT_MAX_VECTORS are
+            searched exactly through the category index, and larger ones take proportionally more candidates.
+
+    Returns:
+        Rows with id, document, cmetadata, embedding and cosine distance, closest first
+    """
+    index_expression, operator, _ = _compact_expression(mode, dimensions, "embedding")
+    query_expression, _, _ = _compact_expression(mode, dimensions, "%(query)s::vector")
+    params = {"collection_id": active_collection_id(), "query": to_pgvector(embedding), "fetch_k": fetch_k,
+              "categories": [str(category_id) for category_id in category_ids or []]}
+    if category_ids:
+        scoped = scope_size(category_ids)
+        if scoped <= COMPACT_SCOPED_EXACT_MAX_VECTORS:
+            with get_db_cursor() as cur:
+                # Same expression as ix_langchain_pg_embedding_category_id, which finds the scope's vectors
+                cur.execute(
+                    """
+                    SELECT id, document, cmetadata, embedding::real[] AS embedding, embedding <=> %(query)s::vector AS distance
+                    FROM langchain_pg_embedding
+                    WHERE collection_id = %(collection_id)s AND cmetadata ->> 'category_id' = ANY(%(categories)s)
+                    ORDER BY distance
+                    LIMIT %(fetch_k)s
+                    """,
+                    params
+                )
+                return cur.fetchall()
+        # About scoped / total of the HNSW candidates fall into the scope
+        candidates = min(HNSW_MAX_EF_SEARCH, candidates * max(1, scope_size(None) // max(scoped, 1)))
+    category_condition = "AND cmetadata ->> 'category_id' = ANY(%(categories)s)" if category_ids else ""
+    params["candidates"] = max(candidates, fetch_k)
+    with get_db_cursor() as cur:
+        cur.execute("SET LOCAL hnsw.ef_search = %s", (min(HNSW_MAX_EF_SEARCH, max(candidates, 40)),))
+        cur.execute(
+            f"""
+            WITH candidates AS (
+                SELECT id FROM langchain_pg_embedding
+                WHERE collection_id = %(collection_id)s {category_condition}
+                ORDER BY {index_expression} {operator} {query_expression}
+                LIMIT %(candidates)s
+            )
+            SELECT e.id, e.document, e.cmetadata, e.embedding::real[] AS embedding,
+                e.embedding <=> %(query)s::vector AS distance
+            FROM langchain_pg_embedding e
+            JOIN candidates c ON c.id = e.id
+            ORDER BY distance
+            LIMIT %(fetch_k)s
+            """,
+            params
+        )
+        return cur.fetchall()
+
+
+def maximal_marginal_relevance(query: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """Indices of k candidates balancing similarity to the query against similarity to already picked ones."""
+    if not len(candidates): return []
+    query = query / np.linalg.norm(query)
+    candidates = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    query_similarity = candidates @ query
+    selected = [int(np.argmax(query_similarity))]
+    redundancy = candidates @ candidates[selected[0]]
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * query_similarity - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, candidates @ candidates[best])
+    return selected
+
+
+class CompactRetriever(BaseRetriever):
+    """MMR retriever over two-stage compact search; a drop-in replacement for the PGVector MMR retriever."""
+
+    k: int = 10
+    fetch_k: int = 20
+    lambda_mult: float = 0.4
+    mode: str = COMPACT_SEARCH_MODE
+    dimensions: int = COMPACT_SEARCH_DIMENSIONS
+    candidates: int = COMPACT_SEARCH_CANDIDATES
+    category_ids: Optional[List[int]] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search_by_vector(emb_model.embed_query(query))
+
+    def search_by_vector(self, embedding: List[float]) -> List[Document]:
+        rows = two_stage_search(embedding, self.fetch_k, self.mode, self.dimensions, self.candidates, self.category_ids)
+        if not rows: return []
+        picked = maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32),
+            np.asarray([row["embedding"] for row in rows], dtype=np.float32),
+            self.k, self.lambda_mult
+        )
+        return [
+            Document(id=rows[i]["id"], page_content=rows[i]["document"], metadata={**(rows[i]["cmetadata"] or {}), "distance": rows[i]["distance"]})
+            for i in picked
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["create-index", "sizes"])
+    parser.add_argument("--mode", choices=COMPACT_MODES, default=COMPACT_SEARCH_MODE if COMPACT_SEARCH_MODE in COMPACT_MODES else "halfvec")
+    parser.add_argument("--dimensions", type=int, default=COMPACT_SEARCH_DIMENSIONS)
+    args = parser.parse_args()
+
+    if args.action == "create-index":
+        print(f"Created {create_compact_index(args.mode, args.dimensions)}")
+    for name, size in get_storage_sizes().items():
+        print(f"{name}: {size / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
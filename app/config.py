@@ -1 +1,139 @@
-TRASH_COLLECTION_ID = "7b847da9-5ced-4fc1-94d3-b4a09ca99776"
\ No newline at end of file
+TRASH_COLLECTION_ID = "7b847da9-5ced-4fc1-94d3-b4a09ca99776"
+
+# Embedding backends, selected with EMBEDDING_BACKEND. Every backend writes to its own collection;
+# vector ids are the text id plus the backend suffix, since ids are unique across collections.
+EMBEDDING_BACKENDS = {
+    "openai": {"model_name": "text-embedding-3-small", "collection_name": "chatbot_base", "vector_id_suffix": ""},
+    "local": {"model_name": "paraphrase-multilingual-MiniLM-L12-v2-qint8", "collection_name": "chatbot_base_local", "vector_id_suffix": "#local"},
+}
+LOCAL_EMBEDDING_BASE_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+LOCAL_EMBEDDING_QUANTIZATION = "avx2"
+LOCAL_EMBEDDING_MAX_BATCH_SIZE = 32
+LOCAL_EMBEDDING_MAX_WAIT_MS = 5
+
+# Trash garbage collection
+TRASH_RETENTION_DAYS = 30
+TRASH_GC_INTERVAL_SECONDS = 3600
+TRASH_GC_BATCH_SIZE = 500
+TRASH_GC_BATCH_PAUSE_SECONDS = 0.5
+
+# Background indexer (indexing_outbox)
+INDEXER_BATCH_SIZE = 256
+INDEXER_POLL_INTERVAL_SECONDS = 1.0
+INDEXER_MAX_ATTEMPTS = 5
+INDEXER_LEASE_SECONDS = 300
+
+# Background jobs
+JOB_WORKERS = 2
+LARGE_DELETE_TEXT_THRESHOLD = 20000
+CATEGORY_DELETE_BATCH_FILES = 50
+
+# Bulk PDF ingestion
+INGEST_ROOT_DIR = "../documents"
+INGEST_PARSE_WORKERS = 4
+INGEST_EMBED_CONCURRENCY = 4
+INGEST_EMBED_BATCH_SIZE = 256
+
+# Batches at least this large are written to qa_texts with COPY instead of INSERT
+BULK_COPY_THRESHOLD = 1000
+
+# Document uploads
+UPLOAD_DIR = "../uploads"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_BYTES = 200 * 1024 * 1024
+UPLOAD_INSERT_BATCH_SIZE = 500
+
+# Bulk text import
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Knowledge-base snapshots
+SNAPSHOT_DIR = "../snapshots"
+SNAPSHOT_BATCH_SIZE = 5000
+
+# MMR retriever of the chat (tune with benchmarks.eval_retrieval)
+RETRIEVER_K = 10
+RETRIEVER_FETCH_K = 20
+RETRIEVER_LAMBDA_MULT = 0.4
+
+# Compact vector search: candidates from a halfvec/binary HNSW index over a shortened
+# embedding prefix, rescored with the full-precision vectors ("off", "halfvec" or "binary")
+COMPACT_SEARCH_MODE = "off"
+COMPACT_SEARCH_DIMENSIONS = 512
+COMPACT_SEARCH_CANDIDATES = 100
+COMPACT_HNSW_M = 16
+COMPACT_HNSW_EF_CONSTRUCTION = 64
+COMPACT_SCOPED_EXACT_MAX_VECTORS = 50000
+COMPACT_SCOPE_COUNT_TTL_SECONDS = 300
+
+# Direct FAQ answers: stored answer returned without the LLM when a stored question matches
+FAQ_DIRECT_HIT_ENABLED = True
+FAQ_MATCH_THRESHOLD = 92
+FAQ_MIN_QUESTION_LENGTH = 10
+FAQ_REFRESH_INTERVAL_SECONDS = 30
+
+# Intent pre-classifier: small talk and off-topic messages skip retrieval
+INTENT_MODEL_PATH = "../models/intent-classifier.joblib"
+INTENT_CONFIDENCE_THRESHOLD = 0.85
+INTENT_ROUTED_INTENTS = ("small_talk", "off_topic")
+
+# Cross-encoder reranking of retrieved documents before they reach the prompt
+RERANKER_ENABLED = False
+RERANKER_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+RERANKER_TOP_N = 4
+RERANKER_SCORE_CUTOFF = 0.2
+RERANKER_MIN_DOCUMENTS = 1
+RERANKER_BATCH_SIZE = 16
+
+# Admin profiling endpoints (X-Admin-Token must equal SECRET_KEY)
+PROFILE_MAX_SECONDS = 60
+PROFILE_DEFAULT_INTERVAL_MS = 10
+TRACEMALLOC_FRAMES = 25
+TRACEMALLOC_TOP_SITES = 30
+
+# Logging: records go through a bounded queue to rotating JSONL files written by a listener thread.
+# Retrieved documents and chat history are logged for a sample of requests, truncated to the cap.
+CHAT_LOG_FILE = "chat_logs.jsonl"
+DOCUMENTS_LOG_FILE = "documents_db_logs.jsonl"
+LOG_MAX_BYTES = 50 * 1024 * 1024
+LOG_BACKUP_COUNT = 10
+LOG_QUEUE_SIZE = 10000
+LOG_PAYLOAD_SAMPLE_RATE = 0.05
+LOG_PAYLOAD_MAX_CHARS = 2000
+
+# Batch chat (/chat/batch and chat_batch.py): questions answered in parallel without chat history
+CHAT_BATCH_CONCURRENCY = 8
+CHAT_BATCH_MAX_CONCURRENCY = 32
+CHAT_BATCH_MAX_QUESTIONS = 10000
+
+# Chat deadlines: every /chat request gets CHAT_DEADLINE_SECONDS. A second (hedged) LLM request is
+# sent when the first one runs longer than the HEDGE_PERCENTILE of recent completions, and when
+# the deadline is too close for the LLM the best retrieved answer is returned instead.
+CHAT_DEADLINE_SECONDS = 15
+LLM_TIMEOUT_SECONDS = 12
+LLM_MAX_RETRIES = 1
+EMBEDDING_TIMEOUT_SECONDS = 5
+HEDGE_ENABLED = True
+HEDGE_PERCENTILE = 95
+HEDGE_WINDOW = 500
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY_SECONDS = 4.0
+HEDGE_MIN_DELAY_SECONDS = 0.5
+LLM_MIN_BUDGET_SECONDS = 1.5
+FALLBACK_RESERVE_SECONDS = 0.3
+LLM_WORKERS = 64
+
+# Answer model tiers, cheapest first (prices in USD per 1M tokens). Without the router every answer
+# uses DEFAULT_MODEL_TIER; with it, clear-cut questions go to the first tier and answers that are
+# not valid JSON or have category 0 are retried on the next tier.
+MODEL_TIERS = {
+    "nano": {"model": "gpt-4.1-nano", "max_tokens": 500, "input_price": 0.10, "output_price": 0.40},
+    "mini": {"model": "gpt-4.1-mini", "max_tokens": 500, "input_price": 0.40, "output_price": 1.60},
+}
+DEFAULT_MODEL_TIER = "mini"
+SMALL_TALK_MODEL_TIER = "mini"
+MODEL_ROUTER_ENABLED = False
+ROUTER_MIN_TOP_SIMILARITY = 0.55
+ROUTER_MIN_MARGIN = 0.02
+ROUTER_MAX_QUESTION_WORDS = 25
+ROUTER_MAX_HISTORY_MESSAGES = 4
@@ -1,14 +1,9 @@
 import logging
+from logging_setup import attach_queue_logging
+from config import DOCUMENTS_LOG_FILE
 
 documents_logger = logging.getLogger('documents')
 documents_logger.setLevel(logging.INFO)
+documents_logger.propagate = False
 
-file_handler = logging.FileHandler("documents_db_logs.log")
-stream_handler = logging.StreamHandler()
-
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-stream_handler.setFormatter(formatter)
-
-documents_logger.addHandler(file_handler)
-documents_logger.addHandler(stream_handler)
\ No newline at end of file
+attach_queue_logging(documents_logger, DOCUMENTS_LOG_FILE)
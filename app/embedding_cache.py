@@ -0,0 +1,66 @@
+import hashlib
+from typing import Dict, List, Sequence
+from psycopg2.extras import execute_values
+from langchain_core.embeddings import Embeddings
+from documents_logger import documents_logger
+from embeddings import EMBEDDING_MODEL_NAME
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so formatting-only edits map to the same embedding."""
+    return " ".join(text.split())
+
+
+def content_hash(text: str, model_name: str = EMBEDDING_MODEL_NAME) -> str:
+    """Returns the embedding store key for a vector text embedded with the given model."""
+    return hashlib.sha256(f"{model_name}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def to_pgvector(embedding: Sequence[float]) -> str:
+    """Formats an embedding as a pgvector text literal."""
+    return "[" + ",".join(str(float(value)) for value in embedding) + "]"
+
+
+def get_missing_hashes(cur, hashes: List[str]) -> List[str]:
+    """Returns the hashes from the list that have no stored embedding yet."""
+    if not hashes: return []
+    cur.execute("SELECT content_hash FROM embedding_cache WHERE content_hash = ANY(%s)", (list(set(hashes)),))
+    stored = {row["content_hash"] for row in cur.fetchall()}
+    return [h for h in dict.fromkeys(hashes) if h not in stored]
+
+
+def store_embeddings(cur, embeddings_by_hash: Dict[str, Sequence[float]], model_name: str = EMBEDDING_MODEL_NAME):
+    """Saves embeddings into the store, keeping the existing vector on hash collisions."""
+    if not embeddings_by_hash: return
+    execute_values(
+        cur,
+        "INSERT INTO embedding_cache (content_hash, model_name, embedding) VALUES %s ON CONFLICT (content_hash) DO NOTHING",
+        [(h, model_name, to_pgvector(e)) for h, e in embeddings_by_hash.items()],
+        template="(%s, %s, %s::vector)",
+    )
+
+
+def ensure_embeddings(cur, texts: List[str], emb_model: Embeddings, model_name: str = EMBEDDING_MODEL_NAME) -> List[str]:
+    """
+    Makes sure every text has a stored embedding, calling the embedding API only for unseen content.
+
+    Args:
+        cur: Cursor of the transaction the embeddings are written in
+        texts: Vector texts to embed
+        emb_model: Embedding model used for cache misses
+        model_name: Name of the embedding model, part of the hash key
+
+    Returns:
+        Content hashes of the texts, in the same order
+    """
+    hashes = [content_hash(text, model_name) for text in texts]
+    missing = set(get_missing_hashes(cur, hashes))
+    if missing:
+        to_embed = {}
+        for text, h in zip(texts, hashes):
+            if h in missing and h not in to_embed:
+                to_embed[h] = text
+        vectors = emb_model.embed_documents(list(to_embed.values()))
+        store_embeddings(cur, dict(zip(to_embed.keys(), vectors)), model_name)
+    documents_logger.info(f"Embedding store: {len(hashes) - len(missing)} reused, {len(missing)} embedded.")
+    return hashes
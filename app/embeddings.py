@@ -0,0 +1,145 @@
+"""
+Pluggable embedding backends, selected with EMBEDDING_BACKEND:
+    openai - text-embedding-3-small through the OpenAI API
+    local  - multilingual sentence-transformers model on CPU (onnxruntime, int8 weights)
+
+Export the quantized local model once, from the app directory:
+    python embeddings.py export-local
+"""
+import argparse, queue, threading, time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+from env import load_config
+from config import (
+    EMBEDDING_BACKENDS, LOCAL_EMBEDDING_BASE_MODEL, LOCAL_EMBEDDING_QUANTIZATION,
+    LOCAL_EMBEDDING_MAX_BATCH_SIZE, LOCAL_EMBEDDING_MAX_WAIT_MS, EMBEDDING_TIMEOUT_SECONDS, LLM_MAX_RETRIES
+)
+
+config = load_config('env-path')
+
+
+@dataclass(frozen=True)
+class EmbeddingBackend:
+    name: str
+    model_name: str
+    collection_name: str
+    vector_id_suffix: str
+
+    def vector_id(self, text_id: str) -> str:
+        """Id of the text's vector in this backend's collection."""
+        return text_id + self.vector_id_suffix
+
+
+class LocalOnnxEmbeddings(Embeddings):
+    """
+    Sentence-transformers model run by onnxruntime on CPU with int8 weights. The model is loaded on
+    first use; concurrent embed_query calls are coalesced into micro-batches for one forward pass.
+    """
+
+    def __init__(self, model_path: str, quantization: str = LOCAL_EMBEDDING_QUANTIZATION,
+                 max_batch_size: int = LOCAL_EMBEDDING_MAX_BATCH_SIZE, max_wait_ms: float = LOCAL_EMBEDDING_MAX_WAIT_MS):
+        self.model_path = model_path
+        self.quantization = quantization
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._requests: "queue.Queue[tuple]" = queue.Queue()
+
+    def _get_model(self):
+        with self._load_lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(
+                    self.model_path, backend="onnx", device="cpu",
+                    model_kwargs={"file_name": f"onnx/model_qint8_{self.quantization}.onnx", "provider": "CPUExecutionProvider"}
+                )
+                threading.Thread(target=self._batch_loop, name="embedding-batcher", daemon=True).start()
+            return self._model
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return self._get_model().encode(
+            texts, batch_size=self.max_batch_size, normalize_embeddings=True, convert_to_numpy=True
+        ).tolist()
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._requests.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                for (_, future), vector in zip(batch, self._encode([text for text, _ in batch])):
+                    future.set_result(vector)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def embed_query(self, text: str) -> List[float]:
+        self._get_model()
+        future = Future()
+        self._requests.put((text, future))
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts) if texts else []
+
+
+BACKENDS: Dict[str, EmbeddingBackend] = {name: EmbeddingBackend(name=name, **spec) for name, spec in EMBEDDING_BACKENDS.items()}
+VECTOR_ID_SUFFIXES = [backend.vector_id_suffix for backend in BACKENDS.values()]
+
+if config.embedding.backend not in BACKENDS:
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{config.embedding.backend}', expected one of: {', '.join(BACKENDS)}")
+embedding_backend = BACKENDS[config.embedding.backend]
+EMBEDDING_MODEL_NAME = embedding_backend.model_name
+COLLECTION_NAME = embedding_backend.collection_name
+
+
+def create_embeddings(backend_name: str, local_model_path: Optional[str] = None) -> Embeddings:
+    """Creates the embedding model of a backend."""
+    if backend_name == "openai":
+        return OpenAIEmbeddings(model=BACKENDS["openai"].model_name, api_key=config.api_key.openai_api_key, base_url=config.api_key.base_url,
+                                timeout=EMBEDDING_TIMEOUT_SECONDS, max_retries=LLM_MAX_RETRIES)
+    if backend_name == "local":
+        return LocalOnnxEmbeddings(local_model_path or config.embedding.local_model_path)
+    raise ValueError(f"Unknown embedding backend '{backend_name}'")
+
+
+def all_vector_ids(text_ids: List[str]) -> List[str]:
+    """Vector ids of the texts in every backend's collection."""
+    return [backend.vector_id(text_id) for backend in BACKENDS.values() for text_id in text_ids]
+
+
+emb_model = create_embeddings(embedding_backend.name)
+
+
+def export_local_model(output_path: str, base_model: str = LOCAL_EMBEDDING_BASE_MODEL,
+                       quantization: str = LOCAL_EMBEDDING_QUANTIZATION):
+    """Exports a sentence-transformers model to ONNX and adds its dynamically int8-quantized variant."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    model = SentenceTransformer(base_model, backend="onnx", device="cpu")
+    model.save_pretrained(output_path)
+    export_dynamic_quantized_onnx_model(model, quantization, output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["export-local"])
+    parser.add_argument("--base-model", default=LOCAL_EMBEDDING_BASE_MODEL)
+    parser.add_argument("--quantization", default=LOCAL_EMBEDDING_QUANTIZATION, help="avx2, avx512, avx512_vnni or arm64")
+    parser.add_argument("--output", default=config.embedding.local_model_path)
+    args = parser.parse_args()
+
+    export_local_model(args.output, args.base_model, args.quantization)
+    print(f"Exported {args.base_model} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
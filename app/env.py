@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 from environs import Env
 
 @dataclass
@@ -12,12 +13,19 @@ class RedisConfig:
 @dataclass
 class OpenAIConfig:
     openai_api_key: str
+    base_url: Optional[str] = None
+
+@dataclass
+class EmbeddingConfig:
+    backend: str
+    local_model_path: str
 
 @dataclass
 class Config:
     vdb: DatabaseConfig
     redis: RedisConfig
     api_key: OpenAIConfig
+    embedding: EmbeddingConfig
     secret_key: str
     debug: bool
 
@@ -28,7 +36,11 @@ def load_config(path: str = None) -> Config:
     return Config(
         vdb=DatabaseConfig(database_url=env("VDB_CONN")),
         redis=RedisConfig(redis_url=env("REDIS_CONN")),
-        api_key=OpenAIConfig(openai_api_key=env("OPENAI_KEY")),
+        api_key=OpenAIConfig(openai_api_key=env("OPENAI_KEY"), base_url=env.str("OPENAI_BASE_URL", default=None)),
+        embedding=EmbeddingConfig(
+            backend=env.str("EMBEDDING_BACKEND", default="openai"),
+            local_model_path=env.str("LOCAL_EMBEDDING_MODEL_PATH", default="../models/paraphrase-multilingual-MiniLM-L12-v2-onnx")
+        ),
         secret_key=env("SECRET_KEY"),
         debug=env.bool("DEBUG", default=False)
     )
\ No newline at end of file
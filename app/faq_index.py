@@ -0,0 +1,117 @@
+import re, threading, time
+from typing import Any, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Gauge, Histogram
+from rapidfuzz import fuzz, process
+from documents_logger import documents_logger
+from utils import db_connection, execute_query, execute_single_query
+from config import FAQ_MATCH_THRESHOLD, FAQ_MIN_QUESTION_LENGTH, FAQ_REFRESH_INTERVAL_SECONDS
+
+# Метрики прямых ответов из базы знаний
+FAQ_LOOKUPS = Counter("faq_lookup_total", "Direct FAQ lookups by result", ["result"])
+FAQ_LOOKUP_TIME = Histogram("faq_lookup_time_seconds", "Time taken for a direct FAQ lookup",
+                            buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+FAQ_INDEX_SIZE = Gauge("faq_index_questions", "Number of questions in the direct FAQ index")
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercases and strips punctuation, so "Как открыть карту?" and "как открыть карту" match exactly."""
+    return " ".join(_PUNCTUATION.sub(" ", text.lower().replace("ё", "е")).split())
+
+
+class FaqIndex:
+    """
+    In-memory fuzzy index over the stored questions. A background thread rebuilds it whenever the
+    qa_texts fingerprint changes, so lookups never touch the database.
+    """
+
+    def __init__(self, threshold: float = FAQ_MATCH_THRESHOLD, refresh_interval_seconds: float = FAQ_REFRESH_INTERVAL_SECONDS):
+        self.threshold = threshold
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._index: Tuple[List[str], List[Dict[str, Any]]] = ([], [])
+        self._fingerprint: Optional[Tuple] = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _read_fingerprint(self) -> Tuple:
+        # Soft deletes and restores touch updated_at, inserts add created_at
+        row = execute_single_query(
+            """
+            SELECT COUNT(*) FILTER (WHERE deleted_at IS NULL) AS live, MAX(created_at) AS created, MAX(updated_at) AS updated,
+                (SELECT md5(string_agg(file_id || ':' || category_id, ',' ORDER BY file_id)) FROM files) AS files
+            FROM qa_texts
+            """
+        )
+        # Moving a file to another category changes only the files table
+        return row["live"], row["created"], row["updated"], row["files"]
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuilds the index if the knowledge base changed since the last build."""
+        fingerprint = self._read_fingerprint()
+        if not force and fingerprint == self._fingerprint:
+            return False
+        rows = execute_query(
+            "SELECT q.text_id, q.text_question, q.text_answer, f.category_id FROM qa_texts q LEFT JOIN files f ON f.file_id = q.file_id WHERE q.deleted_at IS NULL"
+        )
+        entries = [row for row in rows if len(normalize_question(row["text_question"])) >= FAQ_MIN_QUESTION_LENGTH]
+        # Swapped as one tuple, so readers see either the old or the new index, never a mix
+        self._index = ([normalize_question(row["text_question"]) for row in entries], entries)
+        self._fingerprint = fingerprint
+        FAQ_INDEX_SIZE.set(len(entries))
+        documents_logger.info(f"FAQ index rebuilt with {len(entries)} questions.")
+        return True
+
+    def match(self, question: str, category_ids: Optional[List[int]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Looks up a stored question close enough to the user's one. With category_ids a match from
+        another category counts as a miss.
+
+        Returns:
+            The stored text entry with its score, or None on a miss or an ambiguous match
+        """
+        start = time.perf_counter()
+        questions, entries = self._index
+        query = normalize_question(question)
+        result = "miss"
+        hit = None
+        if len(query) >= FAQ_MIN_QUESTION_LENGTH and questions:
+            matches = process.extract(query, questions, scorer=fuzz.ratio, score_cutoff=self.threshold, limit=2)
+            if matches:
+                best = entries[matches[0][2]]
+                # Two stored questions this close with different answers: let the LLM decide
+                if len(matches) > 1 and entries[matches[1][2]]["text_answer"] != best["text_answer"]:
+                    result = "ambiguous"
+                elif category_ids and best["category_id"] not in category_ids:
+                    result = "out_of_scope"
+                else:
+                    result = "hit"
+                    hit = {**best, "score": matches[0][1]}
+        FAQ_LOOKUPS.labels(result=result).inc()
+        FAQ_LOOKUP_TIME.observe(time.perf_counter() - start)
+        return hit
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="faq-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                documents_logger.error(f"FAQ index refresh failed: {e}")
+                db_connection.close_connection()
+            self._stop_event.wait(self.refresh_interval_seconds)
+        db_connection.close_connection()
+
+
+faq_index = FaqIndex()
@@ -0,0 +1,150 @@
+import threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional
+from prometheus_client import Counter
+from chat_metrics import ChatTimings
+from config import (
+    CHAT_DEADLINE_SECONDS, HEDGE_ENABLED, HEDGE_PERCENTILE, HEDGE_WINDOW, HEDGE_MIN_SAMPLES, HEDGE_DEFAULT_DELAY_SECONDS,
+    HEDGE_MIN_DELAY_SECONDS, LLM_MIN_BUDGET_SECONDS, FALLBACK_RESERVE_SECONDS, LLM_WORKERS
+)
+
+# Метрики дедлайнов и хеджированных запросов
+LLM_HEDGES = Counter("llm_hedged_requests_total", "LLM requests that got a hedged second request, by outcome", ["outcome"])
+CHAT_FALLBACKS = Counter("chat_fallback_answers_total", "Answers taken from the best retrieved document instead of the LLM", ["reason"])
+DEADLINE_EXCEEDED = Counter("chat_deadline_exceeded_total", "Chat stages stopped by the request deadline", ["stage"])
+
+# Stages run here so the request thread can stop waiting for them at the deadline
+executor = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="chat-stage")
+
+
+class DeadlineExceeded(Exception):
+    """A chat stage could not finish before the request deadline."""
+
+
+class Deadline:
+    """Point in time by which a chat request has to be answered."""
+
+    def __init__(self, seconds: float = CHAT_DEADLINE_SECONDS):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+def run_with_deadline(stage: str, deadline: Deadline, func, *args, reserve: float = FALLBACK_RESERVE_SECONDS):
+    """Runs func in the stage pool and waits for it until `reserve` seconds before the deadline."""
+    future = executor.submit(func, *args)
+    done, _ = wait([future], timeout=max(0.0, deadline.remaining() - reserve))
+    if not done:
+        future.cancel()
+        DEADLINE_EXCEEDED.labels(stage=stage).inc()
+        raise DeadlineExceeded(f"{stage} did not finish before the deadline")
+    return future.result()
+
+
+class LatencyTracker:
+    """Completion times of the most recent LLM requests."""
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES: return None
+        return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+class HedgedLLM:
+    """
+    Streams chat model completions within a request deadline. When the first request runs longer
+    than the HEDGE_PERCENTILE of recent completions (or fails), an identical second request is sent
+    and whichever completes first is used; the other one stops streaming.
+    """
+
+    def __init__(self, llm, hedge: bool = HEDGE_ENABLED):
+        self.llm = llm
+        self.hedge = hedge
+        self.latencies = LatencyTracker()
+
+    def stream(self, prompt_value, timings: ChatTimings, cancel: Optional[threading.Event] = None) -> str:
+        """Streams one completion, recording time to first token, total time and token usage."""
+        start = time.perf_counter()
+        message = None
+        for chunk in self.llm.stream(prompt_value):
+            if cancel is not None and cancel.is_set(): return ""
+            if chunk.content and "llm_first_token" not in timings.stages:
+                timings.record("llm_first_token", time.perf_counter() - start)
+            message = chunk if message is None else message + chunk
+        timings.record("llm_total", time.perf_counter() - start)
+        if message is None: return ""
+        if message.usage_metadata:
+            timings.add_tokens(self.llm.model_name, message.usage_metadata["input_tokens"], message.usage_metadata["output_tokens"])
+        return message.content
+
+    def hedge_delay(self) -> float:
+        delay = self.latencies.percentile(HEDGE_PERCENTILE)
+        return max(HEDGE_MIN_DELAY_SECONDS, HEDGE_DEFAULT_DELAY_SECONDS if delay is None else delay)
+
+    def complete(self, prompt_value, timings: ChatTimings, deadline: Deadline) -> str:
+        """
+        Completion text of the first request to finish. Raises DeadlineExceeded when none finishes
+        FALLBACK_RESERVE_SECONDS before the deadline, or the last error when every request failed.
+        """
+        give_up_at = deadline.expires_at - FALLBACK_RESERVE_SECONDS
+        if give_up_at - time.monotonic() < LLM_MIN_BUDGET_SECONDS:
+            DEADLINE_EXCEEDED.labels(stage="generation").inc()
+            raise DeadlineExceeded("Not enough time left for the LLM")
+
+        cancel = threading.Event()
+        attempts = {}
+
+        def launch():
+            attempt_timings = ChatTimings()
+            future = executor.submit(self.stream, prompt_value, attempt_timings, cancel)
+            attempts[future] = attempt_timings
+            return future
+
+        # Latencies are tracked per request from the primary's start, whichever attempt answers.
+        # Tracking only the winning attempt would let fast hedges pull the percentile, and with it
+        # the hedge delay, down until almost every request is hedged.
+        started = time.monotonic()
+        primary = launch()
+        pending = {primary}
+        hedge_at = time.monotonic() + self.hedge_delay() if self.hedge else None
+        error = None
+        try:
+            while pending or hedge_at is not None:
+                now = time.monotonic()
+                if now >= give_up_at: break
+                if hedge_at is not None and (now >= hedge_at or not pending):
+                    hedge_at = None
+                    pending.add(launch())
+                    continue
+                wake_at = give_up_at if hedge_at is None else min(give_up_at, hedge_at)
+                done, pending = wait(pending, timeout=wake_at - now, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        error = future.exception()
+                        continue
+                    self.latencies.add(time.monotonic() - started)
+                    if len(attempts) > 1:
+                        LLM_HEDGES.labels(outcome="primary_won" if future is primary else "hedge_won").inc()
+                    timings.merge(attempts[future])
+                    return future.result()
+        finally:
+            cancel.set()
+
+        if len(attempts) > 1:
+            LLM_HEDGES.labels(outcome="failed" if error is not None and not pending else "timed_out").inc()
+        if error is not None and not pending: raise error
+        # The request took at least this long; leaving it out would hide the slowest requests
+        self.latencies.add(time.monotonic() - started)
+        DEADLINE_EXCEEDED.labels(stage="generation").inc()
+        raise DeadlineExceeded("LLM did not answer before the deadline")
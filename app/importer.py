@@ -0,0 +1,125 @@
+import csv, json
+from typing import Any, Dict, Iterator, List, Tuple
+from pydantic import ValidationError
+from documents_logger import documents_logger
+from model.model import TextImportRow
+from utils import execute_query
+from uploads import iter_batches, remove_upload
+from vdb_utils import create_text_entries_in_db, update_text_entries_in_db
+from config import IMPORT_CHUNK_SIZE, IMPORT_MAX_REPORTED_ERRORS
+
+IMPORT_FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".xlsx": "xlsx"}
+
+
+def _iter_ndjson(path: str) -> Iterator[Tuple[int, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for row_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, ValueError(f"Invalid JSON: {e}")
+
+
+def _iter_csv(path: str) -> Iterator[Tuple[int, Any]]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        # Row 1 is the header
+        for row_number, row in enumerate(csv.DictReader(f), 2):
+            yield row_number, row
+
+
+def _iter_xlsx(path: str) -> Iterator[Tuple[int, Any]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        for row_number, values in enumerate(rows, 2):
+            if all(value is None for value in values):
+                continue
+            yield row_number, {key: ("" if value is None else str(value)) for key, value in zip(header, values) if key}
+    finally:
+        workbook.close()
+
+
+READERS = {"ndjson": _iter_ndjson, "csv": _iter_csv, "xlsx": _iter_xlsx}
+
+
+def _validate(row_number: int, raw: Any, errors: List[Dict[str, Any]]):
+    if isinstance(raw, Exception):
+        errors.append({"row": row_number, "error": str(raw)})
+        return None
+    if not isinstance(raw, dict):
+        errors.append({"row": row_number, "error": "Row must be an object"})
+        return None
+    # csv.DictReader keeps the values of a row longer than the header under the key None
+    if any(not isinstance(key, str) for key in raw):
+        errors.append({"row": row_number, "error": "Unexpected extra columns"})
+        return None
+    try:
+        return TextImportRow(**{key: value for key, value in raw.items() if value not in ("", None) or key == "answer"})
+    except ValidationError as e:
+        errors.append({"row": row_number, "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+        return None
+    except TypeError as e:
+        errors.append({"row": row_number, "error": str(e)})
+        return None
+
+
+def _upsert_chunk(chunk: List[Tuple[int, TextImportRow]], file_id: int, file_name: str,
+                  errors: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """Creates or updates one validated chunk; texts to update must belong to the file."""
+    to_create = [(n, row) for n, row in chunk if not row.text_id]
+    to_update = [(n, row) for n, row in chunk if row.text_id]
+    created = updated = 0
+
+    if to_update:
+        existing = {result["text_id"] for result in execute_query(
+            "SELECT text_id FROM qa_texts WHERE text_id = ANY(%s) AND file_id = %s AND deleted_at IS NULL",
+            ([row.text_id for _, row in to_update], file_id)
+        )}
+        for n, row in to_update:
+            if row.text_id not in existing:
+                errors.append({"row": n, "error": f"Text ID {row.text_id} not found in this file"})
+        to_update = [(n, row) for n, row in to_update if row.text_id in existing]
+
+    # A failed write is reported on its rows instead of aborting the whole import
+    if to_create:
+        try:
+            created = len(create_text_entries_in_db([(r.question, r.answer, r.text_author) for _, r in to_create], file_id, file_name))
+        except Exception as e:
+            errors.extend({"row": n, "error": f"Create failed: {getattr(e, 'detail', e)}"} for n, _ in to_create)
+    if to_update:
+        try:
+            updated = update_text_entries_in_db([(r.text_id, r.question, r.answer, r.text_author) for _, r in to_update])
+        except Exception as e:
+            errors.extend({"row": n, "error": f"Update failed: {getattr(e, 'detail', e)}"} for n, _ in to_update)
+    return created, updated
+
+
+def import_texts(job, path: str, file_format: str, file_id: int, file_name: str) -> Dict[str, Any]:
+    """
+    Background job: streams rows from an NDJSON/CSV/XLSX file, validates them and upserts them
+    in chunks. Invalid rows are reported without aborting the import; memory is bounded by one chunk.
+    """
+    stats = {"rows_total": 0, "created": 0, "updated": 0, "failed": 0}
+    reported_errors = []
+    try:
+        for raw_chunk in iter_batches(READERS[file_format](path), IMPORT_CHUNK_SIZE):
+            chunk_errors = []
+            valid = [(n, row) for n, row in ((n, _validate(n, raw, chunk_errors)) for n, raw in raw_chunk) if row]
+            created, updated = _upsert_chunk(valid, file_id, file_name, chunk_errors)
+
+            stats["rows_total"] += len(raw_chunk)
+            stats["created"] += created
+            stats["updated"] += updated
+            stats["failed"] += len(chunk_errors)
+            reported_errors.extend(chunk_errors[:IMPORT_MAX_REPORTED_ERRORS - len(reported_errors)])
+            job.report(stats["rows_total"])
+
+        documents_logger.info(f"Imported texts into file ID: {file_id}: {stats}")
+        return {**stats, "errors": reported_errors, "errors_truncated": stats["failed"] > len(reported_errors)}
+    finally:
+        remove_upload(path)
@@ -0,0 +1,240 @@
+import argparse, json, threading
+from typing import Any, Dict, List
+from prometheus_client import Counter, Histogram
+from psycopg2.extras import execute_values
+from documents_logger import documents_logger
+from utils import db_connection
+from embedding_cache import content_hash, ensure_embeddings
+from qa_format import build_vector_text
+from embeddings import emb_model, embedding_backend
+from vdb_utils import get_collection_id, index_text_entries, write_vectors
+from config import INDEXER_BATCH_SIZE, INDEXER_POLL_INTERVAL_SECONDS, INDEXER_MAX_ATTEMPTS, INDEXER_LEASE_SECONDS
+
+# Метрики индексатора
+INDEXER_PROCESSED = Counter("indexer_processed_total", "Outbox entries processed by the indexer", ["result"])
+INDEXER_BATCH_TIME = Histogram("indexer_batch_time_seconds", "Time taken to index one outbox batch")
+
+
+def _claim_batch(conn, batch_size: int) -> List[Dict[str, Any]]:
+    """Leases a batch of pending outbox entries so other workers skip them until the lease expires."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE indexing_outbox
+            SET attempts = attempts + 1, available_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+            WHERE outbox_id IN (
+                SELECT outbox_id FROM indexing_outbox
+                WHERE status = 'pending' AND available_at <= CURRENT_TIMESTAMP
+                ORDER BY outbox_id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING outbox_id, text_id, content_hash, attempts
+            """,
+            (INDEXER_LEASE_SECONDS, batch_size)
+        )
+        entries = cur.fetchall()
+    conn.commit()
+    return entries
+
+
+def _index_batch(conn, entries: List[Dict[str, Any]]) -> int:
+    """
+    Embeds and writes vectors for a leased batch; stale entries (content changed or deleted) are skipped.
+    Texts are embedded without holding any lock on qa_texts, so edits never wait for the embedding API;
+    the vectors are then written in a short transaction that re-checks the texts.
+    """
+    outbox_ids = [entry["outbox_id"] for entry in entries]
+    text_ids = [entry["text_id"] for entry in entries]
+    current_query = """
+        SELECT text_id, text_question, text_answer, content_hash FROM qa_texts
+        WHERE text_id = ANY(%s) AND deleted_at IS NULL
+    """
+
+    def live_rows(current: Dict[str, Dict[str, Any]]):
+        live = [entry for entry in entries if entry["text_id"] in current and current[entry["text_id"]]["content_hash"] == entry["content_hash"]]
+        rows = list({
+            entry["text_id"]: (entry["text_id"], build_vector_text(current[entry["text_id"]]["text_question"], current[entry["text_id"]]["text_answer"]), entry["content_hash"])
+            for entry in live
+        }.values())
+        return live, rows
+
+    with conn.cursor() as cur:
+        cur.execute(current_query, (text_ids,))
+        _, rows = live_rows({row["text_id"]: row for row in cur.fetchall()})
+        if rows:
+            ensure_embeddings(cur, [vector_text for _, vector_text, _ in rows], emb_model)
+    # The embeddings are kept even if the texts change before the vectors are written
+    conn.commit()
+
+    with conn.cursor() as cur:
+        # FOR SHARE keeps concurrent edits/deletes of these texts from interleaving with the vector write
+        cur.execute(current_query + " FOR SHARE", (text_ids,))
+        live, rows = live_rows({row["text_id"]: row for row in cur.fetchall()})
+
+        if rows:
+            written = write_vectors(cur, rows)
+            if written < len(rows):
+                # Raising rolls the batch back and schedules a retry through _record_failure
+                raise RuntimeError(f"Only {written} of {len(rows)} vectors written, embeddings were purged meanwhile")
+
+        live_ids = {entry["outbox_id"] for entry in live}
+        cur.execute(
+            """
+            UPDATE indexing_outbox
+            SET status = CASE WHEN outbox_id = ANY(%s) THEN 'done' ELSE 'skipped' END,
+                last_error = NULL, processed_at = CURRENT_TIMESTAMP
+            WHERE outbox_id = ANY(%s)
+            """,
+            (list(live_ids), outbox_ids)
+        )
+    conn.commit()
+    INDEXER_PROCESSED.labels(result="done").inc(len(live_ids))
+    INDEXER_PROCESSED.labels(result="skipped").inc(len(outbox_ids) - len(live_ids))
+    return len(rows)
+
+
+def _record_failure(conn, entries: List[Dict[str, Any]], error: Exception):
+    """Schedules a retry with exponential backoff, or marks entries as failed after the last attempt."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE indexing_outbox
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                available_at = CURRENT_TIMESTAMP + make_interval(secs => power(2, attempts)),
+                last_error = %s
+            WHERE outbox_id = ANY(%s)
+            """,
+            (INDEXER_MAX_ATTEMPTS, str(error)[:1000], [entry["outbox_id"] for entry in entries])
+        )
+    conn.commit()
+    INDEXER_PROCESSED.labels(result="error").inc(len(entries))
+
+
+def run_indexer_once(batch_size: int = INDEXER_BATCH_SIZE) -> int:
+    """
+    Processes one batch of the indexing outbox.
+
+    Args:
+        batch_size: Maximum number of outbox entries embedded in one call
+
+    Returns:
+        Number of claimed outbox entries (0 when the outbox is drained)
+    """
+    conn = db_connection.get_connection()
+    entries = _claim_batch(conn, batch_size)
+    if not entries:
+        return 0
+    try:
+        with INDEXER_BATCH_TIME.time():
+            indexed = _index_batch(conn, entries)
+        documents_logger.info(f"Indexer: indexed {indexed} of {len(entries)} outbox entries.")
+    except Exception as e:
+        conn.rollback()
+        documents_logger.error(f"Indexer batch failed: {e}")
+        _record_failure(conn, entries, e)
+    return len(entries)
+
+
+def enqueue_reindex(batch_size: int = INDEXER_BATCH_SIZE * 4) -> Dict[str, int]:
+    """
+    Brings every live text in line with the active embedding backend: content hashes are recomputed
+    for its model, and texts whose hash changed or that lack a vector in its collection are indexed
+    (stored embeddings are written right away, the rest goes through the outbox).
+
+    Args:
+        batch_size: Number of texts handled per transaction
+
+    Returns:
+        Number of scanned and re-indexed texts
+    """
+    stats = {"scanned": 0, "reindexed": 0, "queued": 0}
+    last_text_id = ""
+    conn = db_connection.get_connection()
+    try:
+        while True:
+            with conn.cursor() as cur:
+                collection_id = get_collection_id(cur)
+                cur.execute(
+                    """
+                    SELECT q.text_id, q.text_question, q.text_answer, q.content_hash,
+                        EXISTS (SELECT 1 FROM langchain_pg_embedding e WHERE e.id = q.text_id || %s AND e.collection_id = %s) AS indexed
+                    FROM qa_texts q
+                    WHERE q.deleted_at IS NULL AND q.text_id > %s
+                    ORDER BY q.text_id
+                    LIMIT %s
+                    """,
+                    (embedding_backend.vector_id_suffix, collection_id, last_text_id, batch_size)
+                )
+                texts = cur.fetchall()
+                if not texts:
+                    break
+                rows = []
+                for text in texts:
+                    vector_text = build_vector_text(text["text_question"], text["text_answer"])
+                    h = content_hash(vector_text)
+                    if h != text["content_hash"] or not text["indexed"]:
+                        rows.append((text["text_id"], vector_text, h))
+                if rows:
+                    execute_values(
+                        cur,
+                        "UPDATE qa_texts SET content_hash = data.content_hash FROM (VALUES %s) AS data(text_id, content_hash) WHERE qa_texts.text_id = data.text_id",
+                        [(text_id, h) for text_id, _, h in rows]
+                    )
+                stats["queued"] += index_text_entries(cur, rows)
+            conn.commit()
+            stats["scanned"] += len(texts)
+            stats["reindexed"] += len(rows)
+            last_text_id = texts[-1]["text_id"]
+            documents_logger.info(f"Reindex for {embedding_backend.name}: {stats}")
+    except Exception:
+        conn.rollback()
+        raise
+    return stats
+
+
+class TextIndexer:
+    """Background thread that drains the indexing outbox."""
+
+    def __init__(self, poll_interval_seconds: float = INDEXER_POLL_INTERVAL_SECONDS):
+        self.poll_interval_seconds = poll_interval_seconds
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="text-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                claimed = run_indexer_once()
+            except Exception as e:
+                documents_logger.error(f"Indexer failed: {e}")
+                db_connection.close_connection()
+                claimed = 0
+            if claimed < INDEXER_BATCH_SIZE:
+                self._stop_event.wait(self.poll_interval_seconds)
+        db_connection.close_connection()
+
+
+text_indexer = TextIndexer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-index all texts for the active embedding backend (EMBEDDING_BACKEND).")
+    parser.add_argument("--batch-size", type=int, default=INDEXER_BATCH_SIZE * 4)
+    args = parser.parse_args()
+    print(json.dumps(enqueue_reindex(args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Parallel, resumable bulk ingestion of Q&A PDFs into qa_texts and the vector DB.
+
+Run from the app directory:
+    python ingest.py --folder ../documents/faq --category-id 1 --author "Author"
+"""
+import argparse, json, multiprocessing, time, uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from documents_logger import documents_logger
+from utils import db_connection, execute_query
+from qa_format import build_vector_text
+from pdf_parser import file_sha256, parse_pdf_file
+from embedding_cache import content_hash, get_missing_hashes
+from bulk_loader import copy_qa_texts, copy_embedding_cache
+from embeddings import emb_model
+from vdb_utils import soft_delete_file_texts, write_vectors
+from config import INGEST_PARSE_WORKERS, INGEST_EMBED_CONCURRENCY, INGEST_EMBED_BATCH_SIZE
+
+
+def _embed_in_batches(texts_by_hash: Dict[str, str], embed_pool: ThreadPoolExecutor, batch_size: int) -> Dict[str, List[float]]:
+    """Embeds texts in batches on the shared embedding pool, which bounds concurrent API calls."""
+    items = list(texts_by_hash.items())
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    futures = [embed_pool.submit(emb_model.embed_documents, [text for _, text in batch]) for batch in batches]
+    embeddings = {}
+    for batch, future in zip(batches, futures):
+        embeddings.update(zip([h for h, _ in batch], future.result()))
+    return embeddings
+
+
+def _get_or_create_file(cur, category_id: int, file_name: str) -> int:
+    """
+    File of a document in the category. An existing file is being re-ingested from a changed PDF,
+    so its previous texts are soft-deleted (and can be restored from trash) before the new ones load.
+    """
+    cur.execute("SELECT file_id FROM files WHERE category_id = %s AND file_name = %s FOR UPDATE", (category_id, file_name))
+    row = cur.fetchone()
+    if row:
+        counts = soft_delete_file_texts(cur, row["file_id"])
+        documents_logger.info(f"Re-ingesting {file_name}: replaced {counts['deleted_texts']} previous texts")
+        return row["file_id"]
+    cur.execute("INSERT INTO files (category_id, file_name) VALUES (%s, %s) RETURNING file_id", (category_id, file_name))
+    return cur.fetchone()["file_id"]
+
+
+def _load_parsed_file(parsed: Dict[str, Any], sha256: str, category_id: int, text_author: str,
+                      embed_pool: ThreadPoolExecutor, batch_size: int) -> int:
+    """
+    Embeds the pairs of one parsed PDF and loads them with the file checkpoint in a single transaction,
+    replacing the texts of an earlier version of the document.
+    """
+    document_name, pairs = parsed["document_name"], parsed["pairs"]
+    vector_texts = [build_vector_text(question, answer) for question, answer in pairs]
+    hashes = [content_hash(vector_text) for vector_text in vector_texts]
+
+    conn = db_connection.get_connection()
+    try:
+        with conn.cursor() as cur:
+            missing = set(get_missing_hashes(cur, hashes))
+        conn.commit()
+        embeddings = _embed_in_batches(
+            {h: text for text, h in zip(vector_texts, hashes) if h in missing}, embed_pool, batch_size
+        )
+
+        with conn.cursor() as cur:
+            file_id = _get_or_create_file(cur, category_id, document_name) if pairs else None
+            if pairs:
+                copy_embedding_cache(cur, embeddings.items())
+                text_ids = [f"{document_name}-{uuid.uuid4()}" for _ in pairs]
+                copy_qa_texts(cur, [(text_id, file_id, q, a, text_author, h) for text_id, (q, a), h in zip(text_ids, pairs, hashes)])
+                written = write_vectors(cur, list(zip(text_ids, vector_texts, hashes)))
+                if written < len(pairs):
+                    # An embedding was purged by the trash GC meanwhile; the rollback lets a rerun load the file again
+                    raise RuntimeError(f"Only {written} of {len(pairs)} vectors written for {document_name}")
+            # A checkpoint of a deleted or moved file may exist already; it is replaced
+            cur.execute(
+                """
+                INSERT INTO ingestion_checkpoints (file_sha256, category_id, source_name, file_id, pairs_count)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (file_sha256, category_id) DO UPDATE SET source_name = EXCLUDED.source_name,
+                    file_id = EXCLUDED.file_id, pairs_count = EXCLUDED.pairs_count, completed_at = CURRENT_TIMESTAMP
+                """,
+                (sha256, category_id, document_name, file_id, len(pairs))
+            )
+        conn.commit()
+        return len(pairs)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_connection.close_connection()
+
+
+def ingest_folder(folder_path: str, category_id: int, text_author: str,
+                  parse_workers: int = INGEST_PARSE_WORKERS, embed_concurrency: int = INGEST_EMBED_CONCURRENCY,
+                  batch_size: int = INGEST_EMBED_BATCH_SIZE,
+                  progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Ingests every PDF of a folder: parses in a process pool, embeds with bounded concurrency
+    and loads each file atomically with a checkpoint, so reruns skip completed files.
+
+    Args:
+        folder_path: Folder with the PDF files
+        category_id: Category the created files belong to
+        text_author: Author stored on the created texts
+        parse_workers: Number of PDF parsing processes
+        embed_concurrency: Maximum number of concurrent embedding API calls
+        batch_size: Number of texts per embedding call
+        progress: Optional callback receiving (processed files, total files)
+
+    Returns:
+        Ingestion statistics
+    """
+    start = time.perf_counter()
+    paths = sorted(str(path) for path in Path(folder_path).glob("*.pdf"))
+    with ThreadPoolExecutor(max_workers=8) as io_pool:
+        file_hashes = dict(zip(paths, io_pool.map(file_sha256, paths)))
+    # A checkpoint only counts while its file still exists in the category (PDFs without pairs have no file)
+    completed = {row["file_sha256"] for row in execute_query(
+        """
+        SELECT c.file_sha256 FROM ingestion_checkpoints c
+        LEFT JOIN files f ON f.file_id = c.file_id AND f.category_id = c.category_id
+        WHERE c.category_id = %s AND c.file_sha256 = ANY(%s) AND (c.file_id IS NULL OR f.file_id IS NOT NULL)
+        """,
+        (category_id, list(file_hashes.values()))
+    )}
+    pending = [path for path in paths if file_hashes[path] not in completed]
+    stats = {"files_total": len(paths), "files_skipped": len(paths) - len(pending), "files_loaded": 0, "files_failed": 0, "pairs_loaded": 0}
+    documents_logger.info(f"Ingestion of {folder_path}: {len(pending)} files to load, {stats['files_skipped']} already completed.")
+
+    processed = stats["files_skipped"]
+    if progress: progress(processed, len(paths))
+    # Spawned, not forked: the API worker runs threads (indexer, trash GC, log listener) holding locks and DB sockets
+    with ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")) as parse_pool, \
+            ThreadPoolExecutor(max_workers=embed_concurrency, thread_name_prefix="ingest-embed") as embed_pool, \
+            ThreadPoolExecutor(max_workers=embed_concurrency, thread_name_prefix="ingest-load") as load_pool:
+        to_parse = iter(pending)
+        parse_futures, load_futures = {}, {}
+
+        def submit_parses():
+            # Parsed files wait in memory until loaded, so parsing only runs ahead of the loads by the pool sizes
+            while len(parse_futures) < parse_workers and len(parse_futures) + len(load_futures) < parse_workers + embed_concurrency:
+                path = next(to_parse, None)
+                if path is None: return
+                parse_futures[parse_pool.submit(parse_pdf_file, path)] = path
+
+        submit_parses()
+        while parse_futures or load_futures:
+            done, _ = wait(list(parse_futures) + list(load_futures), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in parse_futures:
+                    path = parse_futures.pop(future)
+                    try:
+                        parsed = future.result()
+                    except Exception as e:
+                        stats["files_failed"] += 1
+                        processed += 1
+                        documents_logger.error(f"Failed to parse {path}: {e}")
+                        if progress: progress(processed, len(paths))
+                        continue
+                    load_futures[load_pool.submit(
+                        _load_parsed_file, parsed, file_hashes[path], category_id, text_author, embed_pool, batch_size
+                    )] = path
+                    continue
+
+                path = load_futures.pop(future)
+                processed += 1
+                try:
+                    pairs = future.result()
+                    stats["files_loaded"] += 1
+                    stats["pairs_loaded"] += pairs
+                    documents_logger.info(f"Loaded {pairs} Q&A pairs from {path}")
+                except Exception as e:
+                    stats["files_failed"] += 1
+                    documents_logger.error(f"Failed to load {path}: {e}")
+                if progress: progress(processed, len(paths))
+            submit_parses()
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["pairs_per_sec"] = round(stats["pairs_loaded"] / elapsed, 2) if elapsed > 0 else 0.0
+    documents_logger.info(f"Ingestion of {folder_path} finished: {stats}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", required=True, help="Folder with the PDF files")
+    parser.add_argument("--category-id", type=int, required=True, help="Category of the created files")
+    parser.add_argument("--author", default="Author", help="Author stored on the created texts")
+    parser.add_argument("--parse-workers", type=int, default=INGEST_PARSE_WORKERS)
+    parser.add_argument("--embed-concurrency", type=int, default=INGEST_EMBED_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=INGEST_EMBED_BATCH_SIZE)
+    args = parser.parse_args()
+
+    stats = ingest_folder(
+        args.folder, args.category_id, args.author,
+        parse_workers=args.parse_workers, embed_concurrency=args.embed_concurrency, batch_size=args.batch_size,
+        progress=lambda done, total: print(f"{done}/{total} files", flush=True)
+    )
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
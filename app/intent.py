@@ -0,0 +1,51 @@
+import logging, os, time
+from typing import Optional, Tuple
+from prometheus_client import Counter, Histogram
+from config import INTENT_MODEL_PATH, INTENT_CONFIDENCE_THRESHOLD, INTENT_ROUTED_INTENTS
+
+# Метрики классификатора намерений
+INTENT_PREDICTIONS = Counter("intent_predictions_total", "Messages classified by the intent pre-classifier", ["intent", "routed"])
+INTENT_CLASSIFY_TIME = Histogram("intent_classify_time_seconds", "Time taken to classify a message intent",
+                                 buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025))
+
+
+class IntentClassifier:
+    """
+    TF-IDF + logistic regression classifier trained by train_intent.py. Tells banking questions
+    apart from small talk and off-topic messages; disabled when no trained model is present.
+    """
+
+    def __init__(self, model_path: str = INTENT_MODEL_PATH, threshold: float = INTENT_CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        self.model = None
+        if os.path.exists(model_path):
+            import joblib
+            self.model = joblib.load(model_path)
+            logging.info(f"Intent classifier loaded from {model_path}: {list(self.model.classes_)}")
+        else:
+            logging.info(f"Intent classifier disabled: {model_path} not found")
+
+    @property
+    def enabled(self) -> bool:
+        return self.model is not None
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """Returns the most likely intent and its probability."""
+        probabilities = self.model.predict_proba([text.replace("\n", " ")])[0]
+        best = probabilities.argmax()
+        return str(self.model.classes_[best]), float(probabilities[best])
+
+    def route(self, text: str) -> Optional[str]:
+        """Returns the intent when the message should skip retrieval, otherwise None."""
+        if not self.enabled: return None
+        start = time.perf_counter()
+        intent, confidence = self.classify(text)
+        INTENT_CLASSIFY_TIME.observe(time.perf_counter() - start)
+        routed = intent in INTENT_ROUTED_INTENTS and confidence >= self.threshold
+        INTENT_PREDICTIONS.labels(intent=intent, routed=str(routed).lower()).inc()
+        if routed:
+            logging.info(f"Intent {intent} ({confidence:.2f}) routed without retrieval")
+        return intent if routed else None
+
+
+intent_classifier = IntentClassifier()
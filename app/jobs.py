@@ -0,0 +1,97 @@
+import json, uuid
+import psycopg2
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from documents_logger import documents_logger
+from utils import execute_update, execute_single_query, db_connection, get_connection_string
+from config import JOB_WORKERS
+
+executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="kb-job")
+
+
+class JobContext:
+    """
+    Handle passed to a running job for reporting its progress. Reports go over a separate autocommit
+    connection, so they are visible while the job's own transaction is still open.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._connection = None
+
+    def report(self, done: int, total: Optional[int] = None):
+        if self._connection is None or self._connection.closed:
+            self._connection = psycopg2.connect(get_connection_string())
+            self._connection.autocommit = True
+        with self._connection.cursor() as cur:
+            if total is None:
+                cur.execute("UPDATE background_jobs SET progress_done = %s WHERE job_id = %s", (done, self.job_id))
+            else:
+                cur.execute(
+                    "UPDATE background_jobs SET progress_done = %s, progress_total = %s WHERE job_id = %s",
+                    (done, total, self.job_id)
+                )
+
+    def close(self):
+        if self._connection is not None and not self._connection.closed:
+            self._connection.close()
+
+
+def _run_job(job_id: str, job_type: str, func: Callable[..., Dict[str, Any]], args: tuple, kwargs: dict):
+    job = JobContext(job_id)
+    try:
+        execute_update(
+            "UPDATE background_jobs SET status = 'running', started_at = CURRENT_TIMESTAMP WHERE job_id = %s",
+            (job_id,)
+        )
+        result = func(job, *args, **kwargs)
+        execute_update(
+            """
+            UPDATE background_jobs SET status = 'succeeded', result = %s, finished_at = CURRENT_TIMESTAMP
+            WHERE job_id = %s
+            """,
+            (json.dumps(result, default=str), job_id)
+        )
+        documents_logger.info(f"Job {job_type} {job_id} succeeded: {result}")
+    except Exception as e:
+        documents_logger.error(f"Job {job_type} {job_id} failed: {e}")
+        try:
+            execute_update(
+                "UPDATE background_jobs SET status = 'failed', error = %s, finished_at = CURRENT_TIMESTAMP WHERE job_id = %s",
+                (str(e)[:2000], job_id)
+            )
+        except Exception as update_error:
+            documents_logger.error(f"Could not record failure of job {job_id}: {update_error}")
+    finally:
+        job.close()
+        db_connection.close_connection()
+
+
+def submit_job(job_type: str, func: Callable[..., Dict[str, Any]], *args, total: Optional[int] = None, **kwargs) -> str:
+    """
+    Registers a background job and runs it on the job thread pool.
+
+    Args:
+        job_type: Short name of the job, e.g. "delete_category"
+        func: Callable invoked as func(JobContext, *args, **kwargs); its returned dict is stored as the job result
+        total: Optional total amount of work for progress reporting
+
+    Returns:
+        ID of the created job
+    """
+    job_id = str(uuid.uuid4())
+    execute_update(
+        "INSERT INTO background_jobs (job_id, job_type, progress_total) VALUES (%s, %s, %s)",
+        (job_id, job_type, total)
+    )
+    executor.submit(_run_job, job_id, job_type, func, args, kwargs)
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Returns the state of a background job or None if it does not exist."""
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        return None
+    return execute_single_query("SELECT * FROM background_jobs WHERE job_id = %s", (job_id,))
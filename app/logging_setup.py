@@ -0,0 +1,82 @@
+import atexit, copy, json, logging, queue, random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from prometheus_client import Counter
+from config import LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_QUEUE_SIZE, LOG_PAYLOAD_SAMPLE_RATE, LOG_PAYLOAD_MAX_CHARS
+
+# Метрики логирования
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full", ["logger"])
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+# Attributes every LogRecord has; anything else was passed with extra= and goes to the JSON record
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the standard fields plus the extra= fields of the record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Never blocks the caller: when the queue is full the record is dropped and counted."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merges the message arguments like QueueHandler does, but renders the traceback into exc_text
+        instead of appending it to the message, so the JSON record keeps it as its own field.
+        """
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(logger=record.name or "root").inc()
+
+
+def attach_queue_logging(logger: logging.Logger, filename: str) -> QueueListener:
+    """
+    Routes the logger through a bounded queue. A listener thread writes the records to a rotating
+    JSONL file and, as plain text, to stderr.
+    """
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    file_handler = RotatingFileHandler(filename, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True)
+    file_handler.setFormatter(JsonFormatter())
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    listener = QueueListener(log_queue, file_handler, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    return listener
+
+
+def sample_payload() -> bool:
+    """Whether this request should log its full payloads (documents, history)."""
+    return random.random() < LOG_PAYLOAD_SAMPLE_RATE
+
+
+def truncate_payload(value, max_chars: int = LOG_PAYLOAD_MAX_CHARS) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= max_chars: return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
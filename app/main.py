@@ -1,14 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.staticfiles import StaticFiles
-from urls import api_router, documents_api_router, incidents_api_rooter
+from urls import api_router, documents_api_router, incidents_api_rooter, admin_api_router
+from trash_gc import trash_collector
+from indexer import text_indexer
+from faq_index import faq_index
+from uploads import UploadSizeLimitMiddleware
+from reranker import reranker
+from config import RERANKER_ENABLED
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if RERANKER_ENABLED: reranker.load()
+    text_indexer.start()
+    trash_collector.start()
+    faq_index.start()
+    yield
+    faq_index.stop()
+    trash_collector.stop()
+    text_indexer.stop()
+
 
 app = FastAPI(
     title="Chatbot API",
     description="This is official API for Bank Chatbot services",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.add_middleware(UploadSizeLimitMiddleware)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 app.include_router(api_router)
 app.include_router(documents_api_router)
-app.include_router(incidents_api_rooter)
\ No newline at end of file
+app.include_router(incidents_api_rooter)
+app.include_router(admin_api_router)
@@ -0,0 +1,37 @@
+-- Normalizes qa_texts to separate question/answer columns.
+-- Rows written by the API packed both into text_content ('Вопрос: ... Ответ: ...'),
+-- rows loaded by document.py already used text_question/text_answer.
+
+BEGIN;
+
+ALTER TABLE qa_texts ADD COLUMN IF NOT EXISTS text_question TEXT;
+ALTER TABLE qa_texts ADD COLUMN IF NOT EXISTS text_answer TEXT;
+ALTER TABLE qa_texts ADD COLUMN IF NOT EXISTS text_content TEXT;
+
+UPDATE qa_texts
+SET
+    text_question = CASE
+        WHEN position(' Ответ:' IN text_content) > 0
+            THEN substring(text_content FROM 9 FOR position(' Ответ:' IN text_content) - 9)
+        ELSE substring(text_content FROM 9)
+    END,
+    text_answer = CASE
+        WHEN position(' Ответ:' IN text_content) > 0
+            THEN substring(text_content FROM position(' Ответ:' IN text_content) + 8)
+        ELSE ''
+    END
+WHERE text_question IS NULL
+  AND text_content LIKE 'Вопрос: %';
+
+UPDATE qa_texts SET text_question = '' WHERE text_question IS NULL;
+UPDATE qa_texts SET text_answer = '' WHERE text_answer IS NULL;
+
+ALTER TABLE qa_texts DROP COLUMN text_content;
+ALTER TABLE qa_texts ALTER COLUMN text_question SET NOT NULL;
+ALTER TABLE qa_texts ALTER COLUMN text_answer SET NOT NULL;
+ALTER TABLE qa_texts ALTER COLUMN text_answer SET DEFAULT '';
+
+CREATE INDEX IF NOT EXISTS ix_qa_texts_fts
+    ON qa_texts USING gin (to_tsvector('simple', text_question || ' ' || text_answer));
+
+COMMIT;
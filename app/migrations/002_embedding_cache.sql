@@ -0,0 +1,29 @@
+-- Embedding store keyed on a content hash (model name + normalized vector text),
+-- so unchanged texts can reuse their vectors instead of calling the embedding API.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    content_hash CHAR(64) PRIMARY KEY,
+    model_name VARCHAR(255) NOT NULL,
+    embedding vector NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE qa_texts ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+
+-- Must stay in sync with embedding_cache.content_hash() and qa_format.build_vector_text().
+UPDATE qa_texts
+SET content_hash = encode(sha256(convert_to(
+    'text-embedding-3-small' || E'\n' ||
+    btrim(regexp_replace('Вопрос: ' || text_question || ' Ответ: ' || text_answer, '\s+', ' ', 'g')),
+    'UTF8')), 'hex')
+WHERE content_hash IS NULL;
+
+INSERT INTO embedding_cache (content_hash, model_name, embedding)
+SELECT DISTINCT ON (q.content_hash) q.content_hash, 'text-embedding-3-small', e.embedding
+FROM qa_texts q
+JOIN langchain_pg_embedding e ON e.id = q.text_id
+ON CONFLICT (content_hash) DO NOTHING;
+
+COMMIT;
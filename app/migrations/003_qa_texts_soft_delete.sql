@@ -0,0 +1,10 @@
+-- Keeps soft-deleted texts in qa_texts so they can be restored together with their trashed vectors.
+
+BEGIN;
+
+ALTER TABLE qa_texts ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS ix_qa_texts_deleted_at ON qa_texts (deleted_at) WHERE deleted_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_langchain_pg_embedding_collection_id ON langchain_pg_embedding (collection_id);
+
+COMMIT;
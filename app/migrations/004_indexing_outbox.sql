@@ -0,0 +1,21 @@
+-- Transactional outbox: qa_texts writes enqueue texts here in the same transaction,
+-- and the background indexer embeds them and writes their vectors.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS indexing_outbox (
+    outbox_id BIGSERIAL PRIMARY KEY,
+    text_id VARCHAR NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_indexing_outbox_pending ON indexing_outbox (available_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS ix_indexing_outbox_text_id ON indexing_outbox (text_id, outbox_id DESC);
+
+COMMIT;
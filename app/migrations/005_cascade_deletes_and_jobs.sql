@@ -0,0 +1,44 @@
+-- Links qa_texts to files by id (instead of the text_id prefix) so deletes can be set-based,
+-- and adds the table that tracks long-running background jobs.
+
+BEGIN;
+
+ALTER TABLE qa_texts ADD COLUMN IF NOT EXISTS file_id INTEGER;
+
+-- text_id is '<file_name>-<uuid4>'; the uuid part is 36 characters long. File names are only unique
+-- per category, so only names held by exactly one file are backfilled; the others stay NULL
+UPDATE qa_texts q
+SET file_id = f.file_id
+FROM files f
+WHERE q.file_id IS NULL
+  AND left(q.text_id, length(q.text_id) - 37) = f.file_name
+  AND NOT EXISTS (SELECT 1 FROM files f2 WHERE f2.file_name = f.file_name AND f2.file_id <> f.file_id);
+
+-- Texts left without a file have to be linked by hand (UPDATE qa_texts SET file_id = ... WHERE text_id = ...)
+DO $$
+DECLARE
+    unlinked BIGINT;
+BEGIN
+    SELECT COUNT(*) INTO unlinked FROM qa_texts WHERE file_id IS NULL;
+    IF unlinked > 0 THEN
+        RAISE NOTICE '% qa_texts rows were not linked to a file (no file or an ambiguous file name), see SELECT text_id FROM qa_texts WHERE file_id IS NULL', unlinked;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS ix_qa_texts_file_id ON qa_texts (file_id) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS ix_files_category_id ON files (category_id);
+
+CREATE TABLE IF NOT EXISTS background_jobs (
+    job_id UUID PRIMARY KEY,
+    job_type VARCHAR(64) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    progress_done BIGINT NOT NULL DEFAULT 0,
+    progress_total BIGINT,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- Per-file checkpoints of the bulk PDF ingestion pipeline, so reruns skip completed files.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS ingestion_checkpoints (
+    file_sha256 CHAR(64) PRIMARY KEY,
+    source_name VARCHAR(255) NOT NULL,
+    file_id INTEGER,
+    pairs_count INTEGER NOT NULL,
+    completed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMIT;
@@ -0,0 +1,20 @@
+-- Stores the category and file of every text in the cmetadata of its vectors, so retrieval can be
+-- scoped to categories, and indexes the category for scoped searches.
+
+BEGIN;
+
+-- Vector ids are text_id plus the backend suffix ('' for openai, '#local' for local, see EMBEDDING_BACKENDS)
+UPDATE langchain_pg_embedding e
+SET cmetadata = COALESCE(e.cmetadata, '{}'::jsonb) || jsonb_build_object('category_id', f.category_id, 'file_id', q.file_id)
+FROM qa_texts q
+JOIN files f ON f.file_id = q.file_id,
+    unnest(ARRAY['', '#local']) AS s(suffix)
+WHERE e.id = q.text_id || s.suffix;
+
+-- Matches the cmetadata ->> 'category_id' comparison of both the PGVector filter and compact search
+CREATE INDEX IF NOT EXISTS ix_langchain_pg_embedding_category_id
+    ON langchain_pg_embedding (collection_id, (cmetadata ->> 'category_id'));
+
+COMMIT;
+
+ANALYZE langchain_pg_embedding;
@@ -0,0 +1,20 @@
+-- Keys ingestion checkpoints on the file hash and the category, so the same PDF can be ingested
+-- into several categories. Checkpoints of deleted files are dropped; a rerun loads those files again.
+
+BEGIN;
+
+ALTER TABLE ingestion_checkpoints ADD COLUMN IF NOT EXISTS category_id INTEGER;
+
+UPDATE ingestion_checkpoints c
+SET category_id = f.category_id
+FROM files f
+WHERE c.category_id IS NULL AND f.file_id = c.file_id;
+
+-- PDFs without pairs have no file and therefore no known category; they are only parsed again
+DELETE FROM ingestion_checkpoints WHERE category_id IS NULL;
+
+ALTER TABLE ingestion_checkpoints ALTER COLUMN category_id SET NOT NULL;
+ALTER TABLE ingestion_checkpoints DROP CONSTRAINT IF EXISTS ingestion_checkpoints_pkey;
+ALTER TABLE ingestion_checkpoints ADD PRIMARY KEY (file_sha256, category_id);
+
+COMMIT;
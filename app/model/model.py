@@ -7,11 +7,23 @@ class QuestionRequest(BaseModel):
    question: str
    session_id: Optional[str] = None
    language: Optional[str] = "ru"
+   category_ids: Optional[List[int]] = Field(None, min_length=1, description="Categories the answer is searched in; all categories when omitted")
+
+
+class BatchQuestion(BaseModel):
+   question: str = Field(..., min_length=1, description="The question to answer")
+   id: Optional[str] = Field(None, description="Caller's identifier, echoed in the result")
+   language: Optional[str] = Field(None, description="ru, kk or en; identified from the question when omitted")
+   category_ids: Optional[List[int]] = Field(None, min_length=1, description="Categories the answer is searched in; all categories when omitted")
+
+
+class BatchQuestionRequest(BaseModel):
+   questions: List[BatchQuestion]
 
  
 class ResponseFormat(BaseModel):
    response: str
-   category: int
+   category: int = Field(..., ge=0, le=3, description="0 clarification, 1 answered, 2 off-topic, 3 handed to an operator")
 
 
 class CategoryCreate(BaseModel):
@@ -28,6 +40,10 @@ class FileCreate(BaseModel):
    category_id: int = Field(..., gt=0, description="ID of the category this file belongs to")
 
 
+class FileMove(BaseModel):
+   category_id: int = Field(..., gt=0, description="ID of the category the file is moved to")
+
+
 class TextCreate(BaseModel):
    question: str = Field(..., description="The question content")
    answer: str = Field(..., description="The answer content")
@@ -38,6 +54,13 @@ class TextCreateBatch(BaseModel):
    texts: List[TextCreate] = Field(..., description="List of text entries to create")
 
 
+class TextImportRow(BaseModel):
+   text_id: Optional[str] = Field(None, description="Existing text ID to update; a new text is created when empty")
+   question: str = Field(..., min_length=1, description="The question content")
+   answer: str = Field(..., description="The answer content")
+   text_author: str = Field(..., min_length=1, description="The author of the text entry")
+
+
 class TextUpdate(BaseModel):
    text_id: str = Field(..., description="The text ID to update")
    question: str = Field(..., description="The question content")
@@ -57,6 +80,27 @@ class TextDeleteBatch(BaseModel):
    text_ids: List[str] = Field(..., description="List of text IDs to delete")
 
 
+class TextRestoreBatch(BaseModel):
+   text_ids: List[str] = Field(..., description="List of soft-deleted text IDs to restore")
+
+
+class TextIndexStatus(BaseModel):
+   text_id: str
+   status: str
+   attempts: int
+   last_error: Optional[str] = None
+
+
+class IngestRequest(BaseModel):
+   folder_path: str = Field(..., min_length=1, description="Folder with the PDF files, relative to the ingestion root")
+   category_id: int = Field(..., gt=0, description="ID of the category the created files belong to")
+   text_author: str = Field(..., min_length=1, description="The author of the created text entries")
+
+
+class SnapshotRequest(BaseModel):
+   snapshot_name: Optional[str] = Field(None, min_length=1, description="Snapshot directory, relative to the snapshot root; defaults to a timestamp on export")
+
+
 class CategoryResponse(BaseModel):
    category_id: int
    category_name: str
@@ -88,6 +132,19 @@ class SearchResponse(BaseModel):
    total_texts: int
    
 
+class JobResponse(BaseModel):
+   job_id: str
+   job_type: str
+   status: str
+   progress_done: int
+   progress_total: Optional[int] = None
+   result: Optional[Dict[str, Any]] = None
+   error: Optional[str] = None
+   created_at: datetime.datetime
+   started_at: Optional[datetime.datetime] = None
+   finished_at: Optional[datetime.datetime] = None
+   
+
 class IncidentResponse(BaseModel):
    incident_id: int
    incident_name: str
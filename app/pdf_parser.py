@@ -0,0 +1,40 @@
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterator
+import pymupdf
+from qa_format import iter_qa_pairs
+
+
+def file_sha256(file_path: str) -> str:
+    """Returns the sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """Yields the text of a PDF page by page, so only one page is held in memory."""
+    with pymupdf.open(file_path) as document:
+        for page in document:
+            yield page.get_text()
+
+
+def count_pdf_pages(file_path: str) -> int:
+    with pymupdf.open(file_path) as document:
+        return document.page_count
+
+
+def parse_pdf_file(file_path: str) -> Dict[str, Any]:
+    """
+    Parses a Q&A PDF. Runs in ingestion worker processes, so it only depends on PyMuPDF.
+
+    Returns:
+        Dictionary with the file path, document name and (question, answer) pairs
+    """
+    return {
+        "file_path": file_path,
+        "document_name": Path(file_path).stem,
+        "pairs": list(iter_qa_pairs(iter_pdf_pages(file_path))),
+    }
@@ -0,0 +1,151 @@
+import gc, os, sys, threading, time, tracemalloc
+from collections import Counter as StackCounter
+from typing import Dict, List, Optional
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+from config import PROFILE_MAX_SECONDS, TRACEMALLOC_FRAMES, TRACEMALLOC_TOP_SITES
+
+
+# Innermost Python frames of threads that are blocked waiting for work
+IDLE_FRAMES = {"wait", "select", "_worker"}
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler over every thread of the worker. Stacks are read with
+    sys._current_frames() at a fixed interval and returned in the collapsed format
+    ("frame;frame;frame count") understood by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+    def _collapse(self, frame) -> str:
+        names = []
+        while frame is not None:
+            names.append(self._frame_name(frame))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def profile(self, seconds: float, interval: float, idle: bool = False) -> Optional[str]:
+        """
+        Samples for the given number of seconds. Threads parked in a wait (event loop selector,
+        idle pool workers) are skipped unless idle is set. Returns None when a profile is already running.
+        """
+        if not self._lock.acquire(blocking=False): return None
+        try:
+            seconds = min(seconds, PROFILE_MAX_SECONDS)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            own_id = threading.get_ident()
+            stacks = StackCounter()
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id: continue
+                    if not idle and frame.f_code.co_name in IDLE_FRAMES: continue
+                    stacks[f"{names.get(thread_id, thread_id)};{self._collapse(frame)}"] += 1
+                time.sleep(interval)
+            return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        finally:
+            self._lock.release()
+
+
+class MemoryTracer:
+    """tracemalloc snapshots of the worker, compared against a baseline taken at start."""
+
+    def __init__(self, frames: int = TRACEMALLOC_FRAMES):
+        self.frames = frames
+        self._baseline = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            self._baseline = tracemalloc.take_snapshot()
+
+    def stop(self):
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = None
+
+    @staticmethod
+    def _site(stat) -> List[str]:
+        return [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+
+    def report(self, top: int = TRACEMALLOC_TOP_SITES, group_by: str = "lineno", reset: bool = False) -> Dict:
+        """Top allocation sites of the current snapshot and of its difference from the baseline."""
+        with self._lock:
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+            result = {
+                "traced_bytes": current,
+                "peak_traced_bytes": peak,
+                "top": [
+                    {"site": self._site(stat), "size_bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics(group_by)[:top]
+                ],
+                "diff": [
+                    {"site": self._site(stat), "size_diff_bytes": stat.size_diff, "size_bytes": stat.size, "count_diff": stat.count_diff}
+                    for stat in snapshot.compare_to(self._baseline, group_by)[:top]
+                ] if self._baseline is not None else [],
+            }
+            if reset: self._baseline = snapshot
+            return result
+
+
+class WorkerStatsCollector:
+    """Exports RSS and garbage collector statistics of the worker, labelled by pid."""
+
+    def collect(self):
+        pid = str(os.getpid())
+        rss = GaugeMetricFamily("worker_resident_memory_bytes", "Resident memory of the worker process", labels=["pid"])
+        rss_bytes = self._rss_bytes()
+        if rss_bytes is not None:
+            rss.add_metric([pid], rss_bytes)
+        yield rss
+
+        collections = CounterMetricFamily("worker_gc_collections", "Garbage collections run by the worker", labels=["pid", "generation"])
+        collected = CounterMetricFamily("worker_gc_collected_objects", "Objects collected by the garbage collector", labels=["pid", "generation"])
+        uncollectable = CounterMetricFamily("worker_gc_uncollectable_objects", "Uncollectable objects found by the garbage collector", labels=["pid", "generation"])
+        pending = GaugeMetricFamily("worker_gc_pending_objects", "Allocations pending per generation since its last collection", labels=["pid", "generation"])
+        for generation, (stats, count) in enumerate(zip(gc.get_stats(), gc.get_count())):
+            labels = [pid, str(generation)]
+            collections.add_metric(labels, stats["collections"])
+            collected.add_metric(labels, stats["collected"])
+            uncollectable.add_metric(labels, stats["uncollectable"])
+            pending.add_metric(labels, count)
+        yield from (collections, collected, uncollectable, pending)
+
+        tracked = GaugeMetricFamily("worker_tracemalloc_traced_bytes", "Memory traced by tracemalloc while it is running", labels=["pid"])
+        if tracemalloc.is_tracing():
+            tracked.add_metric([pid], tracemalloc.get_traced_memory()[0])
+        yield tracked
+
+    @staticmethod
+    def _rss_bytes() -> Optional[int]:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            return None
+
+
+cpu_profiler = SamplingProfiler()
+memory_tracer = MemoryTracer()
+REGISTRY.register(WorkerStatsCollector())
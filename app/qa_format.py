@@ -0,0 +1,48 @@
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+QUESTION_MARKER = "Вопрос:"
+ANSWER_MARKER = "Ответ:"
+
+
+def build_vector_text(question: str, answer: str) -> str:
+    """Builds the document text stored in the vector DB for a Q&A pair (single line)."""
+    return f"{QUESTION_MARKER} {question} {ANSWER_MARKER} {answer}".replace("\n", " ")
+
+
+def _parse_qa_chunk(chunk: str) -> Optional[Tuple[str, str]]:
+    parts = chunk.strip().split(ANSWER_MARKER, 1)
+    question = parts[0].strip()
+    answer = parts[1].strip() if len(parts) > 1 else ""
+    return (question, answer) if question else None
+
+
+def iter_qa_pairs(pages: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Splits document text on the question/answer markers into (question, answer) pairs, page by page.
+    Pairs spanning page boundaries are joined; only the pair in progress is kept in memory.
+    """
+    buffer = ""
+    for page in pages:
+        buffer += page
+        chunks = buffer.split(QUESTION_MARKER)
+        if len(chunks) == 1:
+            # No marker yet: keep just enough text to catch a marker split across pages
+            buffer = buffer[-(len(QUESTION_MARKER) - 1):]
+            continue
+        for chunk in chunks[1:-1]:
+            pair = _parse_qa_chunk(chunk)
+            if pair: yield pair
+        buffer = QUESTION_MARKER + chunks[-1]
+    for chunk in buffer.split(QUESTION_MARKER)[1:]:
+        pair = _parse_qa_chunk(chunk)
+        if pair: yield pair
+
+
+def split_qa_text(full_text: str) -> List[Tuple[str, str]]:
+    """Splits raw document text on the question/answer markers into (question, answer) pairs."""
+    return list(iter_qa_pairs([full_text]))
+
+
+def parse_vector_text(text: str) -> Tuple[str, str]:
+    """Inverse of build_vector_text: the (question, answer) of a stored document text."""
+    return _parse_qa_chunk(text.split(QUESTION_MARKER, 1)[-1]) or ("", "")
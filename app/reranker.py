@@ -0,0 +1,65 @@
+import threading, time
+from typing import List
+from langchain_core.documents import Document
+from prometheus_client import Histogram
+from config import RERANKER_MODEL, RERANKER_TOP_N, RERANKER_SCORE_CUTOFF, RERANKER_MIN_DOCUMENTS, RERANKER_BATCH_SIZE
+
+# Метрики переранжирования
+RERANK_TIME = Histogram("rerank_time_seconds", "Time taken to rerank retrieved documents")
+RERANK_KEPT = Histogram("rerank_kept_documents", "Documents kept for the prompt after reranking", buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10))
+
+
+class CrossEncoderReranker:
+    """
+    Multilingual cross-encoder run by onnxruntime on CPU. Scores (question, document) pairs in
+    batches and keeps the best documents above a score cutoff. The model is loaded on first use.
+    """
+
+    def __init__(self, model_name: str = RERANKER_MODEL, top_n: int = RERANKER_TOP_N, score_cutoff: float = RERANKER_SCORE_CUTOFF,
+                 min_documents: int = RERANKER_MIN_DOCUMENTS, batch_size: int = RERANKER_BATCH_SIZE):
+        self.model_name = model_name
+        self.top_n = top_n
+        self.score_cutoff = score_cutoff
+        self.min_documents = min_documents
+        self.batch_size = batch_size
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    def load(self):
+        """Loads the model now instead of on first use, so a missing model or dependency fails at startup."""
+        self._get_model()
+
+    def _get_model(self):
+        with self._load_lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name, backend="onnx", device="cpu", model_kwargs={"provider": "CPUExecutionProvider"})
+            return self._model
+
+    def score(self, question: str, docs: List[Document]) -> List[float]:
+        """Relevance of every document to the question, between 0 and 1."""
+        if not docs: return []
+        return self._get_model().predict(
+            [(question, doc.page_content) for doc in docs], batch_size=self.batch_size, show_progress_bar=False
+        ).tolist()
+
+    def rerank(self, question: str, docs: List[Document]) -> List[Document]:
+        """
+        Orders documents by cross-encoder score and keeps at most top_n of them above the cutoff
+        (but never fewer than min_documents, so the LLM still sees the closest match).
+        """
+        if not docs: return docs
+        start = time.perf_counter()
+        ranked = sorted(zip(self.score(question, docs), docs), key=lambda pair: pair[0], reverse=True)
+        kept = [
+            doc for i, (score, doc) in enumerate(ranked[:self.top_n])
+            if score >= self.score_cutoff or i < self.min_documents
+        ]
+        for score, doc in ranked:
+            doc.metadata["rerank_score"] = round(float(score), 4)
+        RERANK_TIME.observe(time.perf_counter() - start)
+        RERANK_KEPT.observe(len(kept))
+        return kept
+
+
+reranker = CrossEncoderReranker()
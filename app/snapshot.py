@@ -0,0 +1,264 @@
+"""
+Knowledge-base snapshots: categories, files, texts and their embeddings as Parquet files.
+
+Run from the app directory:
+    python snapshot.py export ../snapshots/prod-2026-10-01
+    python snapshot.py import ../snapshots/prod-2026-10-01
+"""
+import argparse, json, time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from psycopg2.extensions import cursor as TupleCursor
+from psycopg2.extras import execute_values
+from documents_logger import documents_logger
+from utils import db_connection
+from qa_format import build_vector_text
+from embedding_cache import content_hash
+from bulk_loader import bulk_load_pairs
+from vdb_utils import get_collection_id
+from embeddings import COLLECTION_NAME, EMBEDDING_MODEL_NAME, VECTOR_ID_SUFFIXES, embedding_backend
+from config import SNAPSHOT_BATCH_SIZE
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+CATEGORIES_SCHEMA = pa.schema([("category_id", pa.int32()), ("category_name", pa.string())])
+FILES_SCHEMA = pa.schema([("file_id", pa.int32()), ("category_id", pa.int32()), ("file_name", pa.string())])
+
+
+def _texts_schema(dimensions: int) -> pa.Schema:
+    return pa.schema([
+        ("text_id", pa.string()), ("file_id", pa.int32()), ("text_question", pa.string()),
+        ("text_answer", pa.string()), ("text_author", pa.string()), ("content_hash", pa.string()),
+        ("document", pa.string()), ("embedding", pa.list_(pa.float32(), dimensions)),
+    ])
+
+
+def _embedding_array(embeddings: list, dimensions: int) -> pa.Array:
+    """Builds a fixed-size list array over one contiguous float32 buffer; missing vectors are nulls."""
+    mask = np.array([embedding is None for embedding in embeddings])
+    values = np.zeros((len(embeddings), dimensions), dtype=np.float32)
+    for i, embedding in enumerate(embeddings):
+        if embedding is not None:
+            values[i] = embedding
+    return pa.FixedSizeListArray.from_arrays(pa.array(values.ravel()), dimensions, mask=pa.array(mask))
+
+
+def _iter_server_side(conn, name: str, query: str, params: tuple = ()) -> Iterator[list]:
+    """Streams a query in batches through a server-side cursor, so the export never holds the full table."""
+    with conn.cursor(name=name, cursor_factory=TupleCursor) as cur:
+        cur.itersize = SNAPSHOT_BATCH_SIZE
+        cur.execute(query, params)
+        while rows := cur.fetchmany(SNAPSHOT_BATCH_SIZE):
+            yield rows
+
+
+def export_snapshot(snapshot_dir: str, progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+    """
+    Exports the live knowledge base into a snapshot directory from one consistent database snapshot.
+
+    Args:
+        snapshot_dir: Target directory, created if missing
+        progress: Optional callback receiving the number of exported texts
+
+    Returns:
+        Snapshot manifest
+    """
+    start = time.perf_counter()
+    out = Path(snapshot_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    conn = db_connection.get_connection()
+    try:
+        conn.rollback()
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        with conn.cursor() as cur:
+            collection_id = get_collection_id(cur)
+            cur.execute("SELECT vector_dims(embedding) AS dims FROM langchain_pg_embedding WHERE collection_id = %s LIMIT 1", (collection_id,))
+            row = cur.fetchone()
+            dimensions = row["dims"] if row else 0
+
+            cur.execute("SELECT category_id, category_name FROM categories ORDER BY category_id")
+            categories = cur.fetchall()
+            cur.execute("SELECT file_id, category_id, file_name FROM files ORDER BY file_id")
+            files = cur.fetchall()
+        pq.write_table(pa.Table.from_pylist(categories, schema=CATEGORIES_SCHEMA), out / "categories.parquet")
+        pq.write_table(pa.Table.from_pylist(files, schema=FILES_SCHEMA), out / "files.parquet")
+
+        schema = _texts_schema(dimensions)
+        exported = indexed = 0
+        with pq.ParquetWriter(out / "qa_texts.parquet", schema) as writer:
+            for rows in _iter_server_side(
+                conn, "snapshot_qa_texts",
+                """
+                SELECT t.text_id, t.file_id, t.text_question, t.text_answer, t.text_author, t.content_hash,
+                       e.document, e.embedding::real[]
+                FROM qa_texts t
+                LEFT JOIN langchain_pg_embedding e ON e.id = t.text_id || %s AND e.collection_id = %s
+                WHERE t.deleted_at IS NULL
+                ORDER BY t.text_id
+                """,
+                (embedding_backend.vector_id_suffix, collection_id)
+            ):
+                columns = list(zip(*rows))
+                embeddings = list(columns[7])
+                indexed += sum(embedding is not None for embedding in embeddings)
+                arrays = [pa.array(column, type=field.type) for column, field in zip(columns[:7], schema)]
+                arrays.append(_embedding_array(embeddings, dimensions))
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                exported += len(rows)
+                if progress: progress(exported)
+        conn.rollback()
+    finally:
+        db_connection.close_connection()
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "collection_name": COLLECTION_NAME,
+        "dimensions": dimensions,
+        "categories": len(categories),
+        "files": len(files),
+        "texts": exported,
+        "texts_indexed": indexed,
+    }
+    (out / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    documents_logger.info(f"Exported snapshot to {out} in {time.perf_counter() - start:.2f}s: {manifest}")
+    return manifest
+
+
+def _iter_snapshot_texts(path: Path, dimensions: int) -> Iterator[tuple]:
+    """Yields bulk loader rows from the texts file; embeddings are read as views over the Arrow buffers."""
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=SNAPSHOT_BATCH_SIZE):
+        columns = {name: batch.column(name).to_pylist() for name in batch.schema.names if name != "embedding"}
+        embedding_column = batch.column("embedding")
+        is_null = embedding_column.is_null().to_numpy(zero_copy_only=False)
+        vectors = embedding_column.values.slice(embedding_column.offset * dimensions, len(batch) * dimensions)
+        matrix = vectors.to_numpy(zero_copy_only=False).reshape(len(batch), dimensions) if dimensions else None
+        for i in range(len(batch)):
+            question, answer = columns["text_question"][i], columns["text_answer"][i]
+            document = columns["document"][i] or build_vector_text(question, answer)
+            yield (
+                columns["text_id"][i], columns["file_id"][i], question, answer, columns["text_author"][i],
+                columns["content_hash"][i] or content_hash(build_vector_text(question, answer)),
+                document, None if matrix is None or is_null[i] else matrix[i]
+            )
+
+
+def _remove_partial_import(category_ids: List[int], file_ids: List[int]):
+    """
+    Deletes what a failed import has committed: the imported categories and files, their texts,
+    vectors and queued indexer entries. The knowledge base was empty before, so this empties it again
+    and the import can be retried.
+    """
+    conn = db_connection.get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM langchain_pg_embedding e
+                USING qa_texts q, unnest(%s::text[]) AS s(suffix)
+                WHERE q.file_id = ANY(%s) AND e.id = q.text_id || s.suffix
+                """,
+                (VECTOR_ID_SUFFIXES, file_ids)
+            )
+            cur.execute("DELETE FROM indexing_outbox WHERE text_id IN (SELECT text_id FROM qa_texts WHERE file_id = ANY(%s))", (file_ids,))
+            cur.execute("DELETE FROM qa_texts WHERE file_id = ANY(%s)", (file_ids,))
+            cur.execute("DELETE FROM files WHERE file_id = ANY(%s)", (file_ids,))
+            cur.execute("DELETE FROM categories WHERE category_id = ANY(%s)", (category_ids,))
+        conn.commit()
+        documents_logger.info(f"Removed the partial import of {len(category_ids)} categories and {len(file_ids)} files")
+    except Exception as e:
+        conn.rollback()
+        documents_logger.error(f"Could not remove the partial snapshot import, empty the knowledge base before retrying: {e}")
+
+
+def import_snapshot(snapshot_dir: str, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Loads a snapshot into an empty knowledge base with COPY, reusing the stored embeddings instead of
+    calling the embedding API. Texts exported without a vector are queued for the background indexer.
+    Texts are committed in batches, so a failed import removes the rows it has loaded again.
+
+    Args:
+        snapshot_dir: Directory written by export_snapshot
+        progress: Optional callback receiving (loaded texts, total texts)
+
+    Returns:
+        Import statistics
+    """
+    start = time.perf_counter()
+    source = Path(snapshot_dir)
+    manifest = json.loads((source / MANIFEST_FILE).read_text())
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version: {manifest.get('format_version')}")
+    if manifest["embedding_model"] != EMBEDDING_MODEL_NAME:
+        raise ValueError(f"Snapshot embeddings were made with {manifest['embedding_model']}, expected {EMBEDDING_MODEL_NAME}")
+
+    conn = db_connection.get_connection()
+    committed = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT EXISTS (SELECT 1 FROM categories) OR EXISTS (SELECT 1 FROM qa_texts) AS not_empty")
+            if cur.fetchone()["not_empty"]:
+                raise ValueError("Snapshots can only be imported into an empty knowledge base")
+            collection_id = get_collection_id(cur)
+
+            categories = pq.read_table(source / "categories.parquet").to_pylist()
+            files = pq.read_table(source / "files.parquet").to_pylist()
+            execute_values(cur, "INSERT INTO categories (category_id, category_name) VALUES %s",
+                           [(c["category_id"], c["category_name"]) for c in categories], page_size=1000)
+            execute_values(cur, "INSERT INTO files (file_id, category_id, file_name) VALUES %s",
+                           [(f["file_id"], f["category_id"], f["file_name"]) for f in files], page_size=1000)
+            # Explicit ids bypass the sequences, so move them past the imported rows
+            for table, column in (("categories", "category_id"), ("files", "file_id")):
+                cur.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), (SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}), false)"
+                )
+        conn.commit()
+        committed = True
+
+        total = manifest["texts"]
+        loaded = bulk_load_pairs(
+            conn, _iter_snapshot_texts(source / "qa_texts.parquet", manifest["dimensions"]), collection_id,
+            batch_size=SNAPSHOT_BATCH_SIZE, progress=(lambda done: progress(done, total)) if progress else None
+        )
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        db_connection.close_connection()
+        if committed:
+            _remove_partial_import([c["category_id"] for c in categories], [f["file_id"] for f in files])
+        raise
+    finally:
+        db_connection.close_connection()
+
+    stats = {
+        "categories": len(categories), "files": len(files), "texts": loaded,
+        "texts_queued": manifest["texts"] - manifest["texts_indexed"],
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    documents_logger.info(f"Imported snapshot {source}: {stats}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", help="Snapshot directory")
+    args = parser.parse_args()
+
+    if args.action == "export":
+        result = export_snapshot(args.path, progress=lambda done: print(f"{done} texts exported", flush=True))
+    else:
+        result = import_snapshot(args.path, progress=lambda done, total: print(f"{done}/{total} texts", flush=True))
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
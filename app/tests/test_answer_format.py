@@ -0,0 +1,43 @@
+import pytest
+from prometheus_client import REGISTRY
+from answer_format import parse_answer
+
+
+def parses(result: str) -> float:
+    return REGISTRY.get_sample_value("llm_response_parses_total", {"result": result}) or 0.0
+
+
+@pytest.mark.parametrize("text", [
+    '{"response": "Откройте счет в приложении.", "category": 1}',
+    '  {"category": 0, "response": "Уточните, пожалуйста, вопрос."}\n',
+])
+def test_strict(text):
+    before = parses("strict")
+    answer = parse_answer(text)
+    assert answer is not None and answer.response.endswith(".")
+    assert parses("strict") == before + 1
+
+
+@pytest.mark.parametrize("text, response", [
+    ('```json\n{"response": "Да", "category": 1}\n```', "Да"),
+    ('Ответ: {"response": "Да", "category": 1} Надеюсь, помог!', "Да"),
+    ('{"response": "Строка 1\nСтрока 2", "category": 1}', "Строка 1\nСтрока 2"),
+])
+def test_repaired(text, response):
+    before = parses("repaired")
+    answer = parse_answer(text)
+    assert answer is not None and answer.response == response and answer.category == 1
+    assert parses("repaired") == before + 1
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Извините, я не могу ответить.",
+    '{"response": "Да", "category": 7}',
+    '{"response": "Да"}',
+    '{"response": "Да", "category": 1',
+])
+def test_failed(text):
+    before = parses("failed")
+    assert parse_answer(text) is None
+    assert parses("failed") == before + 1
@@ -0,0 +1,22 @@
+import struct
+import numpy as np
+from bulk_loader import encode_jsonb, encode_vector
+
+
+def test_encode_vector():
+    assert encode_vector([1.0, -2.5, 0.0]) == struct.pack(">hh", 3, 0) + struct.pack(">fff", 1.0, -2.5, 0.0)
+
+
+def test_encode_vector_from_numpy():
+    values = np.array([0.25, 0.5], dtype=np.float32)
+    assert encode_vector(values) == encode_vector([0.25, 0.5])
+    assert len(encode_vector(np.zeros(1536))) == 4 + 1536 * 4
+
+
+def test_encode_jsonb():
+    assert encode_jsonb({"category_id": 1, "file_id": 2}) == b'\x01{"category_id": 1, "file_id": 2}'
+
+
+def test_encode_jsonb_keeps_unicode():
+    assert encode_jsonb({"file_name": "Вопросы"}) == b"\x01" + '{"file_name": "Вопросы"}'.encode("utf-8")
+    assert encode_jsonb(None) == b"\x01null"
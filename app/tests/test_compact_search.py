@@ -0,0 +1,29 @@
+import numpy as np
+from compact_search import maximal_marginal_relevance
+
+QUERY = np.array([1.0, 0.0])
+# The query itself, a near duplicate of it and a more distant but different vector
+CANDIDATES = np.array([[1.0, 0.0], [0.99, 0.01], [0.6, 0.8]])
+
+
+def test_empty_candidates():
+    assert maximal_marginal_relevance(QUERY, np.empty((0, 2)), k=3, lambda_mult=0.5) == []
+
+
+def test_pure_relevance_orders_by_similarity():
+    candidates = np.array([[0.0, 1.0], [1.0, 0.0], [1.0, 1.0]])
+    assert maximal_marginal_relevance(QUERY, candidates, k=3, lambda_mult=1.0) == [1, 2, 0]
+
+
+def test_diversity_skips_near_duplicates():
+    assert maximal_marginal_relevance(QUERY, CANDIDATES, k=2, lambda_mult=1.0) == [0, 1]
+    assert maximal_marginal_relevance(QUERY, CANDIDATES, k=2, lambda_mult=0.3) == [0, 2]
+
+
+def test_k_larger_than_candidates():
+    selected = maximal_marginal_relevance(QUERY, CANDIDATES, k=10, lambda_mult=0.5)
+    assert sorted(selected) == [0, 1, 2]
+
+
+def test_scale_invariant():
+    assert maximal_marginal_relevance(QUERY * 5, CANDIDATES * 10, k=2, lambda_mult=0.3) == [0, 2]
@@ -0,0 +1,41 @@
+from qa_format import build_vector_text, iter_qa_pairs, parse_vector_text, split_qa_text
+
+
+def test_single_page():
+    assert list(iter_qa_pairs(["Вопрос: Как открыть счет? Ответ: В приложении. Вопрос: Q2 Ответ: A2"])) == [
+        ("Как открыть счет?", "В приложении."), ("Q2", "A2"),
+    ]
+
+
+def test_question_marker_split_across_pages():
+    pages = ["Вопрос: Q1 Ответ: A1 Вопр", "ос: Q2 Ответ: A2"]
+    assert list(iter_qa_pairs(pages)) == [("Q1", "A1"), ("Q2", "A2")]
+
+
+def test_question_marker_split_before_first_pair():
+    assert list(iter_qa_pairs(["Частые вопросы Во", "прос: Q1 Ответ: A1"])) == [("Q1", "A1")]
+
+
+def test_answer_marker_split_across_pages():
+    assert list(iter_qa_pairs(["Вопрос: Q1 Отв", "ет: A1"])) == [("Q1", "A1")]
+
+
+def test_pair_spanning_pages():
+    pages = ["Вопрос: Как открыть счет? Ответ: Через", " приложение банка.", " Вопрос: Q2 Ответ: A2"]
+    assert list(iter_qa_pairs(pages)) == [("Как открыть счет?", "Через приложение банка."), ("Q2", "A2")]
+
+
+def test_pages_match_joined_text():
+    text = "Заголовок Вопрос: Q1 Ответ: A1 Вопрос: Q2 Ответ: A2 Вопрос: Q3"
+    pages = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert list(iter_qa_pairs(pages)) == split_qa_text(text) == [("Q1", "A1"), ("Q2", "A2"), ("Q3", "")]
+
+
+def test_text_without_markers():
+    assert list(iter_qa_pairs(["Просто текст", "без вопросов"])) == []
+
+
+def test_vector_text_round_trip():
+    text = build_vector_text("Как открыть\nсчет?", "В приложении.")
+    assert "\n" not in text
+    assert parse_vector_text(text) == ("Как открыть счет?", "В приложении.")
@@ -0,0 +1,135 @@
+"""
+Trains the intent pre-classifier from the chat logs.
+
+Every logged chat request is labelled from the category of its response: category 2 becomes
+off_topic, or small_talk when it is a greeting, thanks or goodbye; short greetings are small_talk
+regardless of category; everything else is banking. A CSV with text,intent columns adds or
+overrides examples.
+
+Run from the app directory:
+    python train_intent.py --log chat_logs.jsonl chat_logs.jsonl.1 [--labeled intents.csv]
+"""
+import argparse, csv, json, re, time
+from typing import Dict, Iterator, List
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import classification_report
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from config import CHAT_LOG_FILE, INTENT_MODEL_PATH, INTENT_CONFIDENCE_THRESHOLD, INTENT_ROUTED_INTENTS
+
+SMALL_TALK = re.compile(
+    r"\b(привет\w*|здравствуй\w*|добр\w+ (утро|день|вечер)|спасибо|благодар\w+|пока|до свидания|как дела"
+    r"|сәлем\w*|рахмет|сау бол\w*|hi|hello|hey|thanks?|thank you|bye|good (morning|afternoon|evening))\b",
+    re.IGNORECASE
+)
+
+
+def iter_chat_records(path: str) -> Iterator[Dict]:
+    """Yields the "chat" records of a JSONL chat log, skipping other records and broken lines."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("event") == "chat" and record.get("question"):
+                yield record
+
+
+def label_question(question: str, category: int) -> str:
+    small_talk = bool(SMALL_TALK.search(question))
+    if small_talk and len(question.split()) <= 5:
+        return "small_talk"
+    if category == 2:
+        return "small_talk" if small_talk else "off_topic"
+    return "banking"
+
+
+def load_log_examples(path: str) -> Dict[str, str]:
+    examples = {}
+    for record in iter_chat_records(path):
+        try:
+            category = int(record["category"])
+        except (ValueError, KeyError, TypeError):
+            continue
+        question = record["question"].strip()
+        examples[question] = label_question(question, category)
+    return examples
+
+
+def load_labeled_examples(path: str) -> Dict[str, str]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return {row["text"].strip(): row["intent"].strip() for row in csv.DictReader(f) if row.get("text")}
+
+
+def build_model():
+    return make_pipeline(
+        TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 5), min_df=2, sublinear_tf=True, lowercase=True),
+        LogisticRegression(class_weight="balanced", max_iter=2000, C=4.0)
+    )
+
+
+def evaluate(model, texts: List[str], labels: List[str], threshold: float) -> Dict:
+    """Per-class report plus what routing at the confidence threshold would do."""
+    probabilities = model.predict_proba(texts)
+    predicted = model.classes_[probabilities.argmax(axis=1)]
+    confidence = probabilities.max(axis=1)
+    routed = np.isin(predicted, INTENT_ROUTED_INTENTS) & (confidence >= threshold)
+    truth = np.asarray(labels)
+
+    latencies = []
+    for text in texts[:500]:
+        start = time.perf_counter()
+        model.predict_proba([text])
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "report": classification_report(truth, predicted, output_dict=True, zero_division=0),
+        "routing": {
+            "threshold": threshold,
+            "routed_share": round(float(routed.mean()), 4),
+            "routing_precision": round(float((predicted[routed] == truth[routed]).mean()), 4) if routed.any() else None,
+            "banking_routed_away": int((routed & (truth == "banking")).sum()),
+        },
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "p95": round(float(np.percentile(latencies, 95)) * 1000, 3),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", nargs="+", default=[CHAT_LOG_FILE], help="Chat log files")
+    parser.add_argument("--labeled", help="Optional CSV with text,intent columns")
+    parser.add_argument("--output", default=INTENT_MODEL_PATH)
+    parser.add_argument("--threshold", type=float, default=INTENT_CONFIDENCE_THRESHOLD)
+    args = parser.parse_args()
+
+    examples = {}
+    for path in args.log:
+        examples.update(load_log_examples(path))
+    if args.labeled:
+        examples.update(load_labeled_examples(args.labeled))
+    texts, labels = list(examples), list(examples.values())
+    print(json.dumps({"examples": len(texts), "intents": {i: labels.count(i) for i in sorted(set(labels))}}, ensure_ascii=False))
+
+    train_texts, test_texts, train_labels, test_labels = train_test_split(
+        texts, labels, test_size=0.2, stratify=labels, random_state=42
+    )
+    model = build_model().fit(train_texts, train_labels)
+    metrics = evaluate(model, test_texts, test_labels, args.threshold)
+    print(json.dumps(metrics, ensure_ascii=False, indent=2))
+
+    # The shipped model is refit on every example
+    joblib.dump(build_model().fit(texts, labels), args.output)
+    with open(f"{args.output}.metrics.json", "w", encoding="utf-8") as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=2)
+    print(f"Saved intent classifier to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import threading, time
+from datetime import datetime, timedelta
+from typing import Dict, List
+from prometheus_client import Counter, Gauge, Histogram
+from documents_logger import documents_logger
+from utils import db_connection
+from embeddings import EMBEDDING_MODEL_NAME, all_vector_ids
+from config import (
+    TRASH_COLLECTION_ID, TRASH_RETENTION_DAYS, TRASH_GC_INTERVAL_SECONDS,
+    TRASH_GC_BATCH_SIZE, TRASH_GC_BATCH_PAUSE_SECONDS
+)
+
+# Метрики сборщика корзины
+TRASH_GC_PURGED = Counter("trash_gc_purged_total", "Rows hard-deleted by the trash GC", ["table"])
+TRASH_GC_BATCH_TIME = Histogram("trash_gc_batch_time_seconds", "Time taken for one trash GC batch")
+TRASH_GC_LAST_RUN = Gauge("trash_gc_last_run_timestamp_seconds", "Unix time the last trash GC run finished")
+TRASH_GC_ERRORS = Counter("trash_gc_error_count", "Total number of failed trash GC runs")
+
+
+def _purge_expired_texts(cur, cutoff: datetime, batch_size: int) -> List[str]:
+    """Hard-deletes one batch of texts trashed before the cutoff together with their vectors."""
+    cur.execute(
+        """
+        DELETE FROM qa_texts WHERE text_id IN (
+            SELECT text_id FROM qa_texts
+            WHERE deleted_at < %s
+            ORDER BY deleted_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING text_id
+        """,
+        (cutoff, batch_size)
+    )
+    text_ids = [row["text_id"] for row in cur.fetchall()]
+    if text_ids:
+        cur.execute(
+            "DELETE FROM langchain_pg_embedding WHERE id = ANY(%s) AND collection_id = %s",
+            (all_vector_ids(text_ids), TRASH_COLLECTION_ID)
+        )
+        TRASH_GC_PURGED.labels(table="langchain_pg_embedding").inc(cur.rowcount)
+    TRASH_GC_PURGED.labels(table="qa_texts").inc(len(text_ids))
+    return text_ids
+
+
+def _purge_orphaned_vectors(cur, batch_size: int) -> int:
+    """Hard-deletes one batch of trashed vectors that no longer have a qa_texts row (legacy soft deletes)."""
+    cur.execute(
+        """
+        DELETE FROM langchain_pg_embedding WHERE id IN (
+            SELECT e.id FROM langchain_pg_embedding e
+            WHERE e.collection_id = %s
+              -- Strips the backend suffix ("#local") of the vector id; text ids end with a uuid
+              AND NOT EXISTS (SELECT 1 FROM qa_texts q WHERE q.text_id = regexp_replace(e.id, '#[a-z_]+$', ''))
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        """,
+        (TRASH_COLLECTION_ID, batch_size)
+    )
+    TRASH_GC_PURGED.labels(table="langchain_pg_embedding").inc(cur.rowcount)
+    return cur.rowcount
+
+
+def _purge_unused_embeddings(cur, cutoff: datetime, batch_size: int) -> int:
+    """
+    Hard-deletes one batch of stored embeddings of the active model that no text references anymore.
+    qa_texts.content_hash only holds hashes of the active model, so embeddings of other backends are
+    kept for when they are switched back to.
+    """
+    cur.execute(
+        """
+        DELETE FROM embedding_cache WHERE content_hash IN (
+            SELECT c.content_hash FROM embedding_cache c
+            WHERE c.created_at < %s AND c.model_name = %s
+              AND NOT EXISTS (SELECT 1 FROM qa_texts q WHERE q.content_hash = c.content_hash)
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        """,
+        (cutoff, EMBEDDING_MODEL_NAME, batch_size)
+    )
+    TRASH_GC_PURGED.labels(table="embedding_cache").inc(cur.rowcount)
+    return cur.rowcount
+
+
+def _purge_processed_outbox(cur, cutoff: datetime, batch_size: int) -> int:
+    """Hard-deletes one batch of indexing outbox entries processed before the cutoff."""
+    cur.execute(
+        """
+        DELETE FROM indexing_outbox WHERE outbox_id IN (
+            SELECT outbox_id FROM indexing_outbox
+            WHERE status IN ('done', 'skipped') AND processed_at < %s
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        """,
+        (cutoff, batch_size)
+    )
+    TRASH_GC_PURGED.labels(table="indexing_outbox").inc(cur.rowcount)
+    return cur.rowcount
+
+
+def run_trash_gc(retention_days: int = TRASH_RETENTION_DAYS, batch_size: int = TRASH_GC_BATCH_SIZE,
+                 pause_seconds: float = TRASH_GC_BATCH_PAUSE_SECONDS, stop_event: threading.Event = None) -> Dict[str, int]:
+    """
+    Hard-deletes trash older than the retention window in bounded batches.
+
+    Args:
+        retention_days: How long soft-deleted texts stay restorable
+        batch_size: Maximum number of rows deleted per transaction
+        pause_seconds: Pause between batches to throttle the load on the database
+        stop_event: Optional event that interrupts the run between batches
+
+    Returns:
+        Number of purged rows per table
+    """
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    purged = {"qa_texts": 0, "langchain_pg_embedding": 0, "embedding_cache": 0, "indexing_outbox": 0}
+    phases = [
+        ("qa_texts", lambda cur: len(_purge_expired_texts(cur, cutoff, batch_size))),
+        ("langchain_pg_embedding", lambda cur: _purge_orphaned_vectors(cur, batch_size)),
+        ("embedding_cache", lambda cur: _purge_unused_embeddings(cur, cutoff, batch_size)),
+        ("indexing_outbox", lambda cur: _purge_processed_outbox(cur, cutoff, batch_size)),
+    ]
+
+    conn = db_connection.get_connection()
+    for table, purge_batch in phases:
+        while not (stop_event and stop_event.is_set()):
+            try:
+                with TRASH_GC_BATCH_TIME.time():
+                    with conn.cursor() as cur:
+                        count = purge_batch(cur)
+                    conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            purged[table] += count
+            if count < batch_size:
+                break
+            documents_logger.info(f"Trash GC progress: {purged[table]} rows purged from {table}")
+            time.sleep(pause_seconds)
+
+    TRASH_GC_LAST_RUN.set_to_current_time()
+    documents_logger.info(f"Trash GC finished: {purged}")
+    return purged
+
+
+class TrashCollector:
+    """Background thread that periodically runs the trash GC."""
+
+    def __init__(self, interval_seconds: int = TRASH_GC_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="trash-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                run_trash_gc(stop_event=self._stop_event)
+            except Exception as e:
+                TRASH_GC_ERRORS.inc()
+                documents_logger.error(f"Trash GC failed: {e}")
+        db_connection.close_connection()
+
+
+trash_collector = TrashCollector()
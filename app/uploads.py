@@ -0,0 +1,117 @@
+import os, uuid
+from typing import Any, Dict, Iterable, Iterator, List
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from documents_logger import documents_logger
+from pdf_parser import iter_pdf_pages, count_pdf_pages
+from qa_format import iter_qa_pairs
+from vdb_utils import create_text_entries_in_db
+from config import UPLOAD_DIR, UPLOAD_CHUNK_SIZE, UPLOAD_MAX_BYTES, UPLOAD_INSERT_BATCH_SIZE
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects upload requests over UPLOAD_MAX_BYTES while the body is being received, before
+    Starlette has spooled the whole multipart body to a temporary file: up front by Content-Length,
+    and by counting the received bytes for bodies without one.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_BYTES, path_suffixes: tuple = ("/upload", "/import")):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_suffixes = path_suffixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].endswith(self.path_suffixes):
+            return await self.app(scope, receive, send)
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": "Uploaded file is too large"})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised while FastAPI parses the form, so it is answered like any HTTPException
+                    raise HTTPException(status_code=413, detail="Uploaded file is too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def save_upload(upload: UploadFile, suffix: str) -> str:
+    """
+    Copies an upload, already size-checked by UploadSizeLimitMiddleware and spooled by Starlette,
+    to the upload directory chunk by chunk.
+
+    Returns:
+        Path of the stored file
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}{suffix}")
+    size = 0
+    try:
+        async with aiofiles.open(path, "wb") as f:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Uploaded file is too large")
+                await f.write(chunk)
+    except Exception:
+        remove_upload(path)
+        raise
+    finally:
+        await upload.close()
+    documents_logger.info(f"Stored upload {upload.filename} ({size} bytes) as {path}")
+    return path
+
+
+def remove_upload(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def extract_uploaded_pdf(job, path: str, file_id: int, file_name: str, text_author: str) -> Dict[str, Any]:
+    """
+    Background job: parses an uploaded PDF page by page and creates its Q&A pairs in batches,
+    so memory stays bounded by one page and one batch regardless of document size.
+    """
+    try:
+        total_pages = count_pdf_pages(path)
+        job.report(0, total_pages)
+
+        def pages_with_progress() -> Iterator[str]:
+            for page_number, page in enumerate(iter_pdf_pages(path), 1):
+                yield page
+                if page_number % 10 == 0 or page_number == total_pages:
+                    job.report(page_number)
+
+        created = 0
+        pairs = ((question, answer, text_author) for question, answer in iter_qa_pairs(pages_with_progress()))
+        for batch in iter_batches(pairs, UPLOAD_INSERT_BATCH_SIZE):
+            created += len(create_text_entries_in_db(batch, file_id, file_name))
+
+        documents_logger.info(f"Extracted {created} Q&A pairs from {total_pages} pages into file ID: {file_id}")
+        return {"file_id": file_id, "pages": total_pages, "pairs_created": created}
+    finally:
+        remove_upload(path)
@@ -1,21 +1,26 @@
 from fastapi import APIRouter
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from typing import List
-from model.model import CategoryResponse, FileTextsResponse, IncidentResponse, SearchResponse
+from model.model import CategoryResponse, FileTextsResponse, IncidentResponse, SearchResponse, TextIndexStatus, JobResponse
 from views import (
-    root, incidents_root, documents_root, quick_response, metrics,
+    root, incidents_root, documents_root, quick_response, batch_response, metrics,
     health_check, get_all_categories, create_category, update_category,
-    delete_category, create_file, delete_file, search_texts, get_texts_by_file,
+    delete_category, create_file, move_file, delete_file, search_texts, get_texts_by_file,
     create_text_entries, update_text_entries, delete_text_batch, get_all_incidents,
-    create_incident, update_incident, delete_incident, update_text_single, delete_text_single
+    create_incident, update_incident, delete_incident, update_text_single, delete_text_single,
+    restore_text_batch, get_text_index_status, get_job_status, ingest_documents,
+    upload_document, import_text_entries, create_snapshot, restore_snapshot,
+    profile_cpu, start_memory_trace, get_memory_trace, stop_memory_trace
 )
 
 api_router = APIRouter()
 documents_api_router = APIRouter(prefix='/documents')
 incidents_api_rooter = APIRouter(prefix='/incidents')
+admin_api_router = APIRouter(prefix='/admin')
 
 api_router.get("/", response_class=HTMLResponse, tags=["AI Chatbot"])(root)
 api_router.post("/chat", tags=["AI Chatbot"])(quick_response)
+api_router.post("/chat/batch", tags=["AI Chatbot"])(batch_response)
 api_router.get("/metrics", tags=["AI Chatbot"])(metrics)
 
 documents_api_router.get("", response_class=HTMLResponse, tags=["Knowledge Base"])(documents_root)
@@ -25,12 +30,21 @@ documents_api_router.post("/categories", status_code=201, tags=["Knowledge Base"
 documents_api_router.put("/categories/update", tags=["Knowledge Base"])(update_category)
 documents_api_router.delete("/categories/{category_id}", tags=["Knowledge Base"])(delete_category)
 documents_api_router.post("/files", status_code=201, tags=["Knowledge Base"])(create_file)
+documents_api_router.put("/files/{file_id}/move", tags=["Knowledge Base"])(move_file)
 documents_api_router.delete("/files/{file_id}", tags=["Knowledge Base"])(delete_file)
 documents_api_router.get("/files/{file_id}/texts", response_model=FileTextsResponse, tags=["Knowledge Base"])(get_texts_by_file)
 documents_api_router.post("/files/{file_id}/texts", status_code=201, tags=["Knowledge Base"])(create_text_entries)
+documents_api_router.post("/files/{file_id}/upload", status_code=202, tags=["Knowledge Base"])(upload_document)
+documents_api_router.post("/files/{file_id}/import", status_code=202, tags=["Knowledge Base"])(import_text_entries)
 documents_api_router.get("/texts/search", response_model=SearchResponse, tags=["Knowledge Base"])(search_texts)
+documents_api_router.get("/texts/index-status", response_model=List[TextIndexStatus], tags=["Knowledge Base"])(get_text_index_status)
 documents_api_router.put("/texts/update", tags=["Knowledge Base"])(update_text_entries)
 documents_api_router.delete("/texts/batch", tags=["Knowledge Base"])(delete_text_batch)
+documents_api_router.post("/texts/restore", tags=["Knowledge Base"])(restore_text_batch)
+documents_api_router.post("/ingest", status_code=202, tags=["Knowledge Base"])(ingest_documents)
+documents_api_router.post("/snapshots/export", status_code=202, tags=["Knowledge Base"])(create_snapshot)
+documents_api_router.post("/snapshots/import", status_code=202, tags=["Knowledge Base"])(restore_snapshot)
+documents_api_router.get("/jobs/{job_id}", response_model=JobResponse, tags=["Knowledge Base"])(get_job_status)
 documents_api_router.put("/texts/{text_id:path}", tags=["Knowledge Base"])(update_text_single)
 documents_api_router.delete("/texts/{text_id:path}", tags=["Knowledge Base"])(delete_text_single)
 
@@ -38,4 +52,9 @@ incidents_api_rooter.get("", response_class=HTMLResponse, tags=["Incident Manage
 incidents_api_rooter.get("/list", response_model=List[IncidentResponse], tags=["Incident Management System"])(get_all_incidents)
 incidents_api_rooter.post("/incident", status_code=201, tags=["Incident Management System"])(create_incident)
 incidents_api_rooter.put("/incident/update", tags=["Incident Management System"])(update_incident)
-incidents_api_rooter.delete("/incident", tags=["Incident Management System"])(delete_incident)
\ No newline at end of file
+incidents_api_rooter.delete("/incident", tags=["Incident Management System"])(delete_incident)
+
+admin_api_router.get("/profile/cpu", response_class=PlainTextResponse, tags=["Admin"])(profile_cpu)
+admin_api_router.post("/profile/memory", tags=["Admin"])(start_memory_trace)
+admin_api_router.get("/profile/memory", tags=["Admin"])(get_memory_trace)
+admin_api_router.delete("/profile/memory", tags=["Admin"])(stop_memory_trace)
@@ -3,6 +3,7 @@ from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 from typing import Dict, List, Any, Optional, Tuple
 import os
+import threading
 
 DB_CONFIG = {
     "host" : os.getenv("DB_HOST", "localhost"),
@@ -21,26 +22,30 @@ class DatabaseError(Exception):
 
 
 class DatabaseConnection:
+    """Holds one connection per thread, so background workers never share a transaction with requests."""
     
     def __init__(self):
-        self._connection = None
+        self._local = threading.local()
     
     def get_connection(self):
-        if self._connection is None or self._connection.closed:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or connection.closed:
             try:
-                self._connection = psycopg2.connect(
+                connection = psycopg2.connect(
                     get_connection_string(),
                     cursor_factory=RealDictCursor
                 )
-                self._connection.autocommit = False
+                connection.autocommit = False
             except psycopg2.Error as e:
                 raise DatabaseError(f"Failed to connect to database: {e}")
+            self._local.connection = connection
         
-        return self._connection
+        return connection
     
     def close_connection(self):
-        if self._connection and not self._connection.closed:
-            self._connection.close()
+        connection = getattr(self._local, "connection", None)
+        if connection and not connection.closed:
+            connection.close()
 
 
 db_connection = DatabaseConnection()
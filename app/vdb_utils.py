@@ -1,44 +1,111 @@
 import uuid
 from langchain_postgres.vectorstores import PGVector
-from langchain_openai import OpenAIEmbeddings
 from env import load_config
 from psycopg2.extras import execute_values
 from documents_logger import documents_logger
 from fastapi import HTTPException
-from typing import Any, Dict, List
-from utils import execute_query, db_connection
-from config import TRASH_COLLECTION_ID
+from typing import Any, Callable, Dict, List, Optional
+from utils import execute_query, db_connection, DatabaseError
+from config import TRASH_COLLECTION_ID, BULK_COPY_THRESHOLD, CATEGORY_DELETE_BATCH_FILES
+from embeddings import EmbeddingBackend, BACKENDS, VECTOR_ID_SUFFIXES, COLLECTION_NAME, embedding_backend, emb_model, all_vector_ids
+from qa_format import build_vector_text
+from embedding_cache import content_hash, get_missing_hashes
+from bulk_loader import copy_qa_texts
 
 
 config = load_config('env-path')
-emb_model = OpenAIEmbeddings(model='text-embedding-3-small', api_key=config.api_key.openai_api_key)
-vector_db = PGVector(embeddings=emb_model, collection_name="chatbot_base", connection=config.vdb.database_url)
+vector_db = PGVector(embeddings=emb_model, collection_name=COLLECTION_NAME, connection=config.vdb.database_url)
 
 
-def create_text_entries_in_db(texts_data: List[tuple], file_name: str) -> List[str]:
-    """Adds texts to BOTH the vector DB (without newlines) and the qa_texts table (with newlines)."""
-    vector_texts, text_ids, qa_texts_data = [], [], []
+def get_collection_id(cur, collection_name: str = COLLECTION_NAME) -> str:
+    """Returns the uuid of a PGVector collection."""
+    cur.execute("SELECT uuid FROM langchain_pg_collection WHERE name = %s", (collection_name,))
+    row = cur.fetchone()
+    if not row:
+        raise DatabaseError(f"Vector collection '{collection_name}' does not exist")
+    return str(row["uuid"])
 
-    for question, answer, author in texts_data:
-        text_id = f"{file_name}-{str(uuid.uuid4())}"
-        text_ids.append(text_id)
 
-        full_content_with_newlines = f'Вопрос: {question} Ответ: {answer}'
-        qa_texts_data.append((text_id, full_content_with_newlines, author))
-        
-        full_content_without_newlines = full_content_with_newlines.replace("\n", " ")
-        vector_texts.append(full_content_without_newlines)
+def write_vectors(cur, rows: List[tuple], backend: EmbeddingBackend = embedding_backend) -> int:
+    """
+    Upserts embeddings for texts straight from the embedding store, without calling the embedding API.
+    The category and file of each text are written into the vector's cmetadata.
+    
+    Args:
+        cur: Cursor of the transaction the vectors are written in
+        rows: (text_id, vector_text, content_hash) tuples whose hashes are already stored
+        backend: Embedding backend whose collection is written into
+    
+    Returns:
+        Number of vectors written; rows whose embedding is no longer stored are not written
+    """
+    if not rows: return 0
+    collection_id = get_collection_id(cur, backend.collection_name)
+    query = """
+        INSERT INTO langchain_pg_embedding (id, collection_id, embedding, document, cmetadata)
+        SELECT data.vector_id, data.collection_id::uuid, c.embedding, data.document,
+            jsonb_strip_nulls(jsonb_build_object('category_id', f.category_id, 'file_id', q.file_id))
+        FROM (VALUES %s) AS data(vector_id, text_id, collection_id, document, content_hash)
+        JOIN embedding_cache c ON c.content_hash = data.content_hash
+        LEFT JOIN qa_texts q ON q.text_id = data.text_id
+        LEFT JOIN files f ON f.file_id = q.file_id
+        ON CONFLICT (id) DO UPDATE SET
+            collection_id = EXCLUDED.collection_id, embedding = EXCLUDED.embedding,
+            document = EXCLUDED.document, cmetadata = EXCLUDED.cmetadata
+        RETURNING id
+    """
+    values = [(backend.vector_id(text_id), text_id, collection_id, document, h) for text_id, document, h in rows]
+    # fetch=True collects RETURNING rows of every page; cur.rowcount only covers the last one
+    return len(execute_values(cur, query, values, page_size=1000, fetch=True))
+
+
+def index_text_entries(cur, rows: List[tuple]) -> int:
+    """
+    Indexes texts inside the caller's transaction: texts with a stored embedding get their vector
+    written right away, the rest are recorded in indexing_outbox for the background indexer.
+    
+    Args:
+        cur: Cursor of the transaction that changed qa_texts
+        rows: (text_id, vector_text, content_hash) tuples
+    
+    Returns:
+        Number of texts queued for embedding
+    """
+    if not rows: return 0
+    missing = set(get_missing_hashes(cur, [h for _, _, h in rows]))
+    stored = [row for row in rows if row[2] not in missing]
+    if write_vectors(cur, stored) < len(stored):
+        # Embeddings purged by the trash GC since the check above go through the outbox too
+        missing |= set(get_missing_hashes(cur, [h for _, _, h in stored]))
+    queued = [(text_id, h) for text_id, _, h in rows if h in missing]
+    if queued:
+        execute_values(cur, "INSERT INTO indexing_outbox (text_id, content_hash) VALUES %s", queued, page_size=1000)
+    return len(queued)
+
+
+def create_text_entries_in_db(texts_data: List[tuple], file_id: int, file_name: str) -> List[str]:
+    """
+    Adds texts to the qa_texts table (with newlines) and indexes them in the vector DB (without newlines).
+    Embedding of new content happens asynchronously through indexing_outbox; large batches are written with COPY.
+    """
+    text_ids = [f"{file_name}-{str(uuid.uuid4())}" for _ in texts_data]
+    vector_texts = [build_vector_text(question, answer) for question, answer, _ in texts_data]
+    hashes = [content_hash(vector_text) for vector_text in vector_texts]
 
     conn = db_connection.get_connection()
     try:
         with conn.cursor() as cur:
-            insert_query = "INSERT INTO qa_texts (text_id, text_content, text_author) VALUES %s"
-            execute_values(cur, insert_query, qa_texts_data)
+            qa_texts_data = [(text_id, file_id, q, a, author, h) for text_id, (q, a, author), h in zip(text_ids, texts_data, hashes)]
+            if len(qa_texts_data) >= BULK_COPY_THRESHOLD:
+                copy_qa_texts(cur, qa_texts_data)
+            else:
+                insert_query = "INSERT INTO qa_texts (text_id, file_id, text_question, text_answer, text_author, content_hash) VALUES %s"
+                execute_values(cur, insert_query, qa_texts_data)
             
-            vector_db.add_texts(texts=vector_texts, ids=text_ids)
+            queued = index_text_entries(cur, list(zip(text_ids, vector_texts, hashes)))
             
             conn.commit()
-            documents_logger.info(f"Successfully added {len(text_ids)} texts to both qa_texts and vector DB.")
+            documents_logger.info(f"Successfully added {len(text_ids)} texts to qa_texts, {queued} queued for embedding.")
             return text_ids
     except Exception as e:
         conn.rollback()
@@ -47,32 +114,38 @@ def create_text_entries_in_db(texts_data: List[tuple], file_name: str) -> List[s
 
 
 def update_text_entries_in_db(texts_data: List[tuple]):
-    """Updates texts in BOTH the vector DB (without newlines) and the qa_texts table (with newlines)."""
+    """
+    Updates texts in the qa_texts table (with newlines) and re-indexes them in the vector DB (without newlines).
+    Vectors are only rewritten for texts whose content hash changed.
+    """
     text_ids = [data[0] for data in texts_data]
     if not text_ids: return 0
+    vector_texts = [build_vector_text(d[1], d[2]) for d in texts_data]
+    hashes = [content_hash(vector_text) for vector_text in vector_texts]
 
     conn = db_connection.get_connection()
     try:
         with conn.cursor() as cur:
+            cur.execute("SELECT text_id, content_hash FROM qa_texts WHERE text_id = ANY(%s) AND deleted_at IS NULL", (text_ids,))
+            old_hashes = {row["text_id"]: row["content_hash"] for row in cur.fetchall()}
+
             update_query = """
-                UPDATE qa_texts SET text_content = data.text_content, text_author = data.text_author, updated_at = CURRENT_TIMESTAMP
-                FROM (VALUES %s) AS data(text_id, text_content, text_author)
-                WHERE qa_texts.text_id = data.text_id
+                UPDATE qa_texts SET text_question = data.text_question, text_answer = data.text_answer,
+                    text_author = data.text_author, content_hash = data.content_hash, updated_at = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS data(text_id, text_question, text_answer, text_author, content_hash)
+                WHERE qa_texts.text_id = data.text_id AND qa_texts.deleted_at IS NULL
             """
-            update_values_with_newlines = [(d[0], f'Вопрос: {d[1]} Ответ: {d[2]}', d[3]) for d in texts_data]
-            execute_values(cur, update_query, update_values_with_newlines)
+            execute_values(cur, update_query, [(*d, h) for d, h in zip(texts_data, hashes)])
 
-            vector_db.delete(ids=text_ids)
-            
-            new_vector_texts_without_newlines = []
-            for d in texts_data:
-                q = d[1].replace("\n", " ")
-                a = d[2].replace("\n", " ")
-                new_vector_texts_without_newlines.append(f"Вопрос: {q} Ответ: {a}")
-            vector_db.add_texts(texts=new_vector_texts_without_newlines, ids=text_ids)
+            changed = [
+                (text_id, vector_text, h)
+                for text_id, vector_text, h in zip(text_ids, vector_texts, hashes)
+                if text_id in old_hashes and old_hashes[text_id] != h
+            ]
+            queued = index_text_entries(cur, changed)
             
             conn.commit()
-            documents_logger.info(f"Successfully updated {len(text_ids)} entries in both tables.")
+            documents_logger.info(f"Successfully updated {len(text_ids)} entries, {len(changed)} changed, {queued} queued for embedding.")
             return len(text_ids)
     except Exception as e:
         conn.rollback()
@@ -81,57 +154,209 @@ def update_text_entries_in_db(texts_data: List[tuple]):
 
 
 def soft_delete_text_entries_in_db(text_ids: List[str]):
-    """Deletes from qa_texts and soft-deletes from vector DB."""
+    """Marks texts as deleted in qa_texts and soft-deletes them from vector DB (moves them to trash)."""
     if not text_ids: return 0
 
     conn = db_connection.get_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute("DELETE FROM qa_texts WHERE text_id = ANY(%s)", (text_ids,))
-            deleted_rows = cur.rowcount
+            cur.execute(
+                """
+                UPDATE qa_texts SET deleted_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE text_id = ANY(%s) AND deleted_at IS NULL
+                RETURNING text_id
+                """,
+                (text_ids,)
+            )
+            deleted_ids = [row["text_id"] for row in cur.fetchall()]
             
             update_query = "UPDATE langchain_pg_embedding SET collection_id = %s WHERE id = ANY(%s)"
-            cur.execute(update_query, (TRASH_COLLECTION_ID, text_ids))
+            cur.execute(update_query, (TRASH_COLLECTION_ID, all_vector_ids(deleted_ids)))
             
             conn.commit()
-            documents_logger.info(f"Deleted {deleted_rows} from qa_texts and soft-deleted {cur.rowcount} from vector DB.")
-            return deleted_rows
+            documents_logger.info(f"Deleted {len(deleted_ids)} from qa_texts and soft-deleted {cur.rowcount} from vector DB.")
+            return len(deleted_ids)
     except Exception as e:
         conn.rollback()
         documents_logger.error(f"Error deleting entries: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to delete text entries: {str(e)}")
 
 
-def soft_delete_all_texts_for_file(file_name: str):
-    """Soft delete all texts for a file from vector DB and hard delete from qa_texts."""
-    id_query = "SELECT text_id FROM qa_texts WHERE text_id LIKE %s"
-    results = execute_query(id_query, (f"{file_name}-%",))
-    text_ids = [result["text_id"] for result in results]
-    return soft_delete_text_entries_in_db(text_ids) if text_ids else 0
+def restore_text_entries_in_db(text_ids: List[str]) -> List[str]:
+    """Restores soft-deleted texts and moves their existing vectors back from trash, without re-embedding."""
+    if not text_ids: return []
+
+    conn = db_connection.get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE qa_texts SET deleted_at = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE text_id = ANY(%s) AND deleted_at IS NOT NULL
+                  AND file_id IN (SELECT file_id FROM files)
+                RETURNING text_id
+                """,
+                (text_ids,)
+            )
+            restored_ids = [row["text_id"] for row in cur.fetchall()]
+            
+            # Every backend's vectors go back to the collection they were trashed from
+            cur.execute("SELECT name, uuid FROM langchain_pg_collection WHERE name = ANY(%s)", ([b.collection_name for b in BACKENDS.values()],))
+            collection_ids = {row["name"]: str(row["uuid"]) for row in cur.fetchall()}
+            restored_vectors = 0
+            for backend in BACKENDS.values():
+                if backend.collection_name not in collection_ids: continue
+                update_query = "UPDATE langchain_pg_embedding SET collection_id = %s WHERE id = ANY(%s) AND collection_id = %s"
+                cur.execute(update_query, (collection_ids[backend.collection_name], [backend.vector_id(t) for t in restored_ids], TRASH_COLLECTION_ID))
+                restored_vectors += cur.rowcount
+            collection_id = get_collection_id(cur)
+            
+            # Texts deleted before the indexer got to them have no vector to restore
+            cur.execute(
+                """
+                INSERT INTO indexing_outbox (text_id, content_hash)
+                SELECT q.text_id, q.content_hash FROM qa_texts q
+                WHERE q.text_id = ANY(%s) AND NOT EXISTS (
+                    SELECT 1 FROM langchain_pg_embedding e WHERE e.id = q.text_id || %s AND e.collection_id = %s
+                )
+                """,
+                (restored_ids, embedding_backend.vector_id_suffix, collection_id)
+            )
+            
+            conn.commit()
+            documents_logger.info(f"Restored {len(restored_ids)} texts in qa_texts and {restored_vectors} vectors from trash, {cur.rowcount} queued for embedding.")
+            return restored_ids
+    except Exception as e:
+        conn.rollback()
+        documents_logger.error(f"Error restoring entries: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to restore text entries: {str(e)}")
+
+
+def _trash_file_texts(cur, files_condition: str, params: tuple) -> Dict[str, int]:
+    """Soft-deletes the texts of files matching a condition and moves their vectors to trash."""
+    cur.execute(
+        f"""
+        WITH target_files AS (
+            SELECT file_id FROM files WHERE {files_condition}
+        ), deleted AS (
+            UPDATE qa_texts SET deleted_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+            WHERE file_id IN (SELECT file_id FROM target_files) AND deleted_at IS NULL
+            RETURNING text_id
+        ), trashed AS (
+            UPDATE langchain_pg_embedding e SET collection_id = %s
+            FROM deleted d, unnest(%s::text[]) AS s(suffix) WHERE e.id = d.text_id || s.suffix
+            RETURNING e.id
+        )
+        SELECT (SELECT COUNT(*) FROM deleted) AS deleted_texts, (SELECT COUNT(*) FROM trashed) AS trashed_vectors
+        """,
+        params + (TRASH_COLLECTION_ID, VECTOR_ID_SUFFIXES)
+    )
+    return dict(cur.fetchone())
 
 
-def _parse_qa_row(row: Dict[str, Any]) -> Dict[str, Any]:
-    """Helper to parse a row from qa_texts into the desired response format."""
-    text_content = row.get("text_content", "")
-    parts = text_content.split(" Ответ:", 1)
-    question = parts[0][8:] if parts[0].startswith("Вопрос: ") else ""
-    answer = parts[1][1:] if len(parts) > 1 else ""
-    return {
-        "text_id": row["text_id"], "file_name": row["text_id"].split("-")[0],
-        "question": question, "answer": answer, "text_author": row["text_author"],
-        "created_at": row["created_at"], "updated_at": row["updated_at"],
-    }
+def soft_delete_file_texts(cur, file_id: int) -> Dict[str, int]:
+    """Soft-deletes all texts of a file and trashes their vectors inside the caller's transaction, keeping the file."""
+    return _trash_file_texts(cur, "file_id = %s", (file_id,))
+
+
+def _cascade_delete_files(cur, files_condition: str, params: tuple) -> Dict[str, int]:
+    """
+    Set-based delete of files matching a condition: soft-deletes their texts, moves their vectors
+    to trash and deletes the files, all inside the caller's transaction.
+    """
+    counts = _trash_file_texts(cur, files_condition, params)
+    cur.execute(f"DELETE FROM files WHERE {files_condition}", params)
+    return {"deleted_files": cur.rowcount, "deleted_texts": counts["deleted_texts"], "trashed_vectors": counts["trashed_vectors"]}
 
 
-def get_texts_from_qa_table(file_name: str) -> List[Dict[str, Any]]:
-    """Retrieves all texts for a file directly from the `qa_texts` table."""
+def delete_file_in_db(file_id: int) -> Dict[str, int]:
+    """Deletes a file and soft-deletes all of its texts in one transaction."""
+    conn = db_connection.get_connection()
     try:
-        query = "SELECT * FROM qa_texts WHERE text_id LIKE %s ORDER BY created_at"
-        results = execute_query(query, (f"{file_name}-%",))
-        return [_parse_qa_row(row) for row in results]
+        with conn.cursor() as cur:
+            counts = _cascade_delete_files(cur, "file_id = %s", (file_id,))
+            conn.commit()
+            documents_logger.info(f"Deleted file ID: {file_id}: {counts}")
+            return counts
     except Exception as e:
-        documents_logger.error(f"Error retrieving texts from qa_texts: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve texts: {str(e)}")
+        conn.rollback()
+        documents_logger.error(f"Error deleting file {file_id}: {e}")
+        raise DatabaseError(f"Failed to delete file: {e}")
+
+
+def move_file_in_db(file_id: int, category_id: int) -> Dict[str, int]:
+    """
+    Moves a file to another category and updates the category in the cmetadata of all of its
+    vectors, trashed ones included, in one transaction.
+    """
+    conn = db_connection.get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE files SET category_id = %s WHERE file_id = %s", (category_id, file_id))
+            moved_files = cur.rowcount
+            cur.execute(
+                """
+                UPDATE langchain_pg_embedding e
+                SET cmetadata = COALESCE(e.cmetadata, '{}'::jsonb) || jsonb_build_object('category_id', %s, 'file_id', q.file_id)
+                FROM qa_texts q, unnest(%s::text[]) AS s(suffix)
+                WHERE q.file_id = %s AND e.id = q.text_id || s.suffix
+                """,
+                (category_id, VECTOR_ID_SUFFIXES, file_id)
+            )
+            counts = {"moved_files": moved_files, "updated_vectors": cur.rowcount}
+            conn.commit()
+            documents_logger.info(f"Moved file ID: {file_id} to category ID: {category_id}: {counts}")
+            return counts
+    except Exception as e:
+        conn.rollback()
+        documents_logger.error(f"Error moving file {file_id}: {e}")
+        raise DatabaseError(f"Failed to move file: {e}")
+
+
+def delete_category_in_db(category_id: int, progress: Optional[Callable[[int], None]] = None,
+                          batch_files: int = CATEGORY_DELETE_BATCH_FILES) -> Dict[str, int]:
+    """
+    Deletes a category with all of its files and soft-deletes their texts in one transaction.
+
+    Args:
+        category_id: Category to delete
+        progress: Optional callback receiving the number of texts deleted so far; it is called after
+            every batch_files files and must report over its own connection, as the deletes are
+            committed together at the end
+        batch_files: Files per statement, i.e. how often progress is reported
+
+    Returns:
+        Counts of deleted files, texts and categories and of trashed vectors
+    """
+    conn = db_connection.get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT category_id FROM categories WHERE category_id = %s FOR UPDATE", (category_id,))
+            cur.execute("SELECT file_id FROM files WHERE category_id = %s ORDER BY file_id FOR UPDATE", (category_id,))
+            file_ids = [row["file_id"] for row in cur.fetchall()]
+            counts = {"deleted_files": 0, "deleted_texts": 0, "trashed_vectors": 0}
+            for start in range(0, len(file_ids), batch_files):
+                batch = _cascade_delete_files(cur, "file_id = ANY(%s)", (file_ids[start:start + batch_files],))
+                for key in counts: counts[key] += batch[key]
+                if progress: progress(counts["deleted_texts"])
+            cur.execute("DELETE FROM categories WHERE category_id = %s", (category_id,))
+            counts["deleted_categories"] = cur.rowcount
+            conn.commit()
+            documents_logger.info(f"Deleted category ID: {category_id}: {counts}")
+            return counts
+    except Exception as e:
+        conn.rollback()
+        documents_logger.error(f"Error deleting category {category_id}: {e}")
+        raise DatabaseError(f"Failed to delete category: {e}")
+
+
+def _map_qa_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Helper to map a row from qa_texts into the desired response format."""
+    return {
+        "text_id": row["text_id"], "file_name": row.get("file_name") or row["text_id"][:-37],
+        "question": row["text_question"], "answer": row["text_answer"], "text_author": row["text_author"],
+        "created_at": row["created_at"], "updated_at": row["updated_at"],
+    }
 
 
 def hard_delete_texts_from_vector_db(text_ids: List[str]):
@@ -142,7 +367,7 @@ def hard_delete_texts_from_vector_db(text_ids: List[str]):
         text_ids: List of text IDs to hard delete
     """
     try:
-        vector_db.delete(ids=text_ids)
+        vector_db.delete(ids=[embedding_backend.vector_id(text_id) for text_id in text_ids])
         documents_logger.info(f"Successfully hard deleted {len(text_ids)} texts from vector DB")
     except Exception as e:
         documents_logger.error(f"Error hard deleting texts from vector database: {e}")
@@ -150,19 +375,22 @@ def hard_delete_texts_from_vector_db(text_ids: List[str]):
 
 
 def search_texts_in_qa_table(query_text: str, page: int, size: int):
-    """Performs full-text search directly on the `qa_texts.text_content` column."""
+    """Performs full-text search directly on the `qa_texts` question and answer columns."""
     try:
         offset = (page - 1) * size
         query = """
-            SELECT *, COUNT(*) OVER() AS total_texts
-            FROM qa_texts, plainto_tsquery('simple', %s) AS query
-            WHERE to_tsvector('simple', text_content) @@ query
-            ORDER BY ts_rank_cd(to_tsvector('simple', text_content), query) DESC, created_at DESC
+            SELECT q.text_id, q.text_question, q.text_answer, q.text_author, q.created_at, q.updated_at,
+                f.file_name, COUNT(*) OVER() AS total_texts
+            FROM qa_texts q
+            LEFT JOIN files f ON f.file_id = q.file_id,
+                plainto_tsquery('simple', %s) AS query
+            WHERE to_tsvector('simple', q.text_question || ' ' || q.text_answer) @@ query AND q.deleted_at IS NULL
+            ORDER BY ts_rank_cd(to_tsvector('simple', q.text_question || ' ' || q.text_answer), query) DESC, q.created_at DESC
             LIMIT %s OFFSET %s;
         """
         results = execute_query(query, (query_text, size, offset))
         if not results: return [], 0
-        texts = [_parse_qa_row(row) for row in results]
+        texts = [_map_qa_row(row) for row in results]
         total_texts = results[0]["total_texts"]
         return texts, total_texts
     except Exception as e:
@@ -170,7 +398,7 @@ def search_texts_in_qa_table(query_text: str, page: int, size: int):
         raise HTTPException(status_code=500, detail=f"Failed to search texts: {str(e)}")
 
 
-def get_texts_from_qa_table(file_name: str) -> List[Dict[str, Any]]:
+def get_texts_from_qa_table(file_id: int, file_name: str) -> List[Dict[str, Any]]:
     """
     Retrieves all texts for a specific file directly from the `qa_texts` table.
     """
@@ -178,18 +406,57 @@ def get_texts_from_qa_table(file_name: str) -> List[Dict[str, Any]]:
         query = """
             SELECT 
                 text_id,
-                text_content,
+                text_question,
+                text_answer,
                 text_author,
                 created_at,
-                updated_at
+                updated_at,
+                %s AS file_name
             FROM qa_texts
-            WHERE text_id LIKE %s
+            WHERE file_id = %s AND deleted_at IS NULL
             ORDER BY created_at
         """
-        results = execute_query(query, (f"{file_name}-%",))
+        results = execute_query(query, (file_name, file_id))
         
-        return [_parse_qa_row(row) for row in results]
+        return [_map_qa_row(row) for row in results]
         
     except Exception as e:
         documents_logger.error(f"Error retrieving texts from qa_texts: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve texts: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve texts: {str(e)}")
+
+
+def get_index_status(text_ids: List[str]) -> List[Dict[str, Any]]:
+    """Returns the indexing status of texts: indexed, pending, failed, not_indexed or deleted."""
+    try:
+        query = """
+            SELECT q.text_id, q.deleted_at, o.status, o.attempts, o.last_error,
+                EXISTS (
+                    SELECT 1 FROM langchain_pg_embedding e
+                    JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+                    WHERE e.id = q.text_id || %s AND c.name = %s
+                ) AS indexed
+            FROM qa_texts q
+            LEFT JOIN LATERAL (
+                SELECT status, attempts, last_error FROM indexing_outbox
+                WHERE indexing_outbox.text_id = q.text_id
+                ORDER BY outbox_id DESC LIMIT 1
+            ) o ON TRUE
+            WHERE q.text_id = ANY(%s)
+        """
+        results = execute_query(query, (embedding_backend.vector_id_suffix, COLLECTION_NAME, text_ids))
+        statuses = []
+        for row in results:
+            if row["deleted_at"]:
+                status = "deleted"
+            elif row["status"] in ("pending", "failed"):
+                status = row["status"]
+            else:
+                status = "indexed" if row["indexed"] else "not_indexed"
+            statuses.append({
+                "text_id": row["text_id"], "status": status,
+                "attempts": row["attempts"] or 0, "last_error": row["last_error"] if status == "failed" else None,
+            })
+        return statuses
+    except Exception as e:
+        documents_logger.error(f"Error retrieving index status: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve index status: {str(e)}")
@@ -1,27 +1,40 @@
-import json
 import logging, time
 from datetime import datetime
-from typing import Union
-from fastapi import Request, HTTPException, Depends
-from fastapi.responses import Response, JSONResponse
+from pathlib import Path
+from typing import List, Union
+import hmac, os
+from fastapi import Request, HTTPException, Depends, Query, UploadFile, File, Form, Header
+from fastapi.responses import Response, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
 from fastapi.templating import Jinja2Templates
 from model.model import *
 from language import identify_language
 from chain import generate_answer
+from chat_metrics import ChatTimings
+from hedging import Deadline
+from chat_batch import answer_stream, aiter_ndjson_questions
 from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from utils import execute_query, execute_single_query, execute_insert, execute_update, execute_delete, check_record_exists, check_database_health, DatabaseError
 from vdb_utils import *
 from documents_logger import documents_logger
+from logging_setup import attach_queue_logging, truncate_payload
+from jobs import submit_job, get_job
+from config import (
+    LARGE_DELETE_TEXT_THRESHOLD, INGEST_ROOT_DIR, SNAPSHOT_DIR, PROFILE_MAX_SECONDS, PROFILE_DEFAULT_INTERVAL_MS, TRACEMALLOC_TOP_SITES, CHAT_LOG_FILE,
+    CHAT_BATCH_CONCURRENCY, CHAT_BATCH_MAX_CONCURRENCY, CHAT_BATCH_MAX_QUESTIONS
+)
+from ingest import ingest_folder
+from uploads import save_upload, extract_uploaded_pdf
+from importer import IMPORT_FORMATS, import_texts
+from snapshot import export_snapshot, import_snapshot
+from profiling import cpu_profiler, memory_tracer
+from env import load_config
+
+config = load_config('env-path')
 
 # Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("chat_logs.log"),
-        logging.StreamHandler()
-    ]
-)
+logging.getLogger().setLevel(logging.INFO)
+attach_queue_logging(logging.getLogger(), CHAT_LOG_FILE)
 
 # Метрики Prometheus
 REQUEST_COUNT = Counter("request_count", "Total number of requests received")
@@ -58,34 +71,70 @@ def documents_root(request: Request):
     return templates.TemplateResponse(request=request, name="knowledge-base.html")
 
 
-async def quick_response(request: QuestionRequest):
+def quick_response(request: QuestionRequest):
     """
-    POST method for "/chat/" web endpoint
+    POST method for "/chat/" web endpoint.
+    A plain def: FastAPI runs it in the threadpool, so the blocking pipeline never stalls the event loop.
     """
     REQUEST_COUNT.inc()
     session_id = request.session_id if request.session_id else str(time.time())
-    language = identify_language(request.question)
-    logging.info(f"Language identified: {language}")
+    deadline = Deadline()
+    timings = ChatTimings()
+    with timings.stage("language_id"):
+        language = identify_language(request.question)
 
+    category = "error"
     try:
         start_time = time.perf_counter()
         with RESPONSE_TIME.time():
-            response, db_time, api_time = generate_answer(request.question, session_id, language)
+            answer, db_time, api_time = generate_answer(request.question, session_id, language, timings, deadline, request.category_ids)
         execution_time = time.perf_counter() - start_time
 
+        category = answer.category
         logging.info(
-            f"Response generated in {execution_time:.3f} sec | "
-            f"API: {api_time:.3f} sec | DB: {db_time:.3f} sec "
-            f"for session_id={session_id}"
+            f"Response generated in {execution_time:.3f} sec for session_id={session_id}",
+            extra={
+                "event": "chat", "session_id": session_id, "language": language, "category": category,
+                "question": truncate_payload(request.question), "response": truncate_payload(answer.response),
+                "execution_time": round(execution_time, 4), "api_time": round(api_time, 4), "db_time": round(db_time, 4)
+            }
         )
-        logging.info(f'Response: {response}')
-        converted_response = json.loads(response)
 
-        return {"response": f'Ответ: {converted_response["response"]}\n\nКатегория: {converted_response["category"]}', "session_id": session_id}
+        return {"response": f'Ответ: {answer.response}\n\nКатегория: {answer.category}', "session_id": session_id}
     except Exception as e:
         ERROR_COUNT.inc()
-        logging.error(f"Error processing request: {e}", exc_info=True)
+        logging.error(
+            f"Error processing request: {e}", exc_info=True,
+            extra={"event": "chat_error", "session_id": session_id, "language": language, "question": truncate_payload(request.question)}
+        )
         return {"error": "Сервис недоступен. Попробуйте позже.", "details": str(e)}
+    finally:
+        timings.observe(language, category)
+
+
+async def _iter_batch(questions: List[BatchQuestion]):
+    for question in questions:
+        yield question
+
+
+async def batch_response(request: Request, concurrency: int = Query(CHAT_BATCH_CONCURRENCY, ge=1, le=CHAT_BATCH_MAX_CONCURRENCY)):
+    """
+    POST method for "/chat/batch" web endpoint. Takes {"questions": [...]} as JSON or one question per
+    line as NDJSON (Content-Type: application/x-ndjson) and streams NDJSON results as they complete.
+    Questions are answered without chat history.
+    """
+    if request.headers.get("content-type", "").startswith(("application/x-ndjson", "application/jsonl")):
+        items = aiter_ndjson_questions(request.stream())
+    else:
+        try:
+            batch = BatchQuestionRequest.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+        if not batch.questions: raise HTTPException(status_code=400, detail="No questions provided")
+        if len(batch.questions) > CHAT_BATCH_MAX_QUESTIONS:
+            raise HTTPException(status_code=400, detail=f"Batch is limited to {CHAT_BATCH_MAX_QUESTIONS} questions")
+        items = _iter_batch(batch.questions)
+    return StreamingResponse(answer_stream(items, concurrency), media_type="application/x-ndjson")
 
 
 async def check_db_health():
@@ -228,36 +277,42 @@ async def update_category(category: CategoryUpdate, db_check=Depends(check_db_he
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def _delete_category_job(job, category_id: int):
+    """Background job deleting a large category in one transaction, reporting deleted texts as progress."""
+    return delete_category_in_db(category_id, progress=job.report)
+
+
 async def delete_category(category_id: int, db_check=Depends(check_db_health)):
     """Delete a category and all its associated files and texts."""
     try:
         if not check_record_exists('categories', 'category_id', category_id):
             raise HTTPException(status_code=404, detail="Category not found")
         
-        file_query = "SELECT file_name FROM files WHERE category_id = %s"
-        files = execute_query(file_query, (category_id,))
-        
-        total_deleted_texts = 0
-        for file_row in files:
-            file_name = file_row['file_name']
-            deleted_count = soft_delete_all_texts_for_file(file_name)
-            total_deleted_texts += deleted_count
-        
-        delete_files_query = "DELETE FROM files WHERE category_id = %s"
-        execute_delete(delete_files_query, (category_id,))
+        texts_count = execute_single_query(
+            """
+            SELECT COUNT(*) AS count FROM qa_texts
+            WHERE deleted_at IS NULL AND file_id IN (SELECT file_id FROM files WHERE category_id = %s)
+            """,
+            (category_id,)
+        )['count']
+        
+        if texts_count > LARGE_DELETE_TEXT_THRESHOLD:
+            job_id = submit_job("delete_category", _delete_category_job, category_id, total=texts_count)
+            documents_logger.info(f"Scheduled deletion of category ID: {category_id} with {texts_count} text entries as job {job_id}")
+            return JSONResponse(
+                status_code=202,
+                content={"message": "Category deletion scheduled", "job_id": job_id, "texts_count": texts_count}
+            )
         
-        delete_category_query = "DELETE FROM categories WHERE category_id = %s"
-        deleted_count = execute_delete(delete_category_query, (category_id,))
+        counts = delete_category_in_db(category_id)
         
-        if deleted_count == 0:
+        if counts["deleted_categories"] == 0:
             raise HTTPException(status_code=404, detail="Category not found")
         
-        documents_logger.info(f"Deleted category ID: {category_id} with {len(files)} files and {total_deleted_texts} text entries")
-        
         return {
             "message": "Category and all associated data deleted successfully",
-            "deleted_files_count": len(files),
-            "deleted_texts_count": total_deleted_texts
+            "deleted_files_count": counts["deleted_files"],
+            "deleted_texts_count": counts["deleted_texts"]
         }
         
     except HTTPException:
@@ -327,20 +382,15 @@ async def delete_file(file_id: int, db_check=Depends(check_db_health)):
         
         file_name = file_info['file_name']
         
-        deleted_texts_count = soft_delete_all_texts_for_file(file_name)
-        
-        delete_query = "DELETE FROM files WHERE file_id = %s"
-        deleted_count = execute_delete(delete_query, (file_id,))
+        counts = delete_file_in_db(file_id)
         
-        if deleted_count == 0:
+        if counts["deleted_files"] == 0:
             raise HTTPException(status_code=404, detail="File not found")
         
-        documents_logger.info(f"Deleted file ID: {file_id} ({file_name}) with {deleted_texts_count} text entries")
-        
         return {
             "message": "File and associated text entries deleted successfully",
             "file_name": file_name,
-            "deleted_texts_count": deleted_texts_count
+            "deleted_texts_count": counts["deleted_texts"]
         }
         
     except HTTPException:
@@ -353,6 +403,50 @@ async def delete_file(file_id: int, db_check=Depends(check_db_health)):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def move_file(file_id: int, move: FileMove, db_check=Depends(check_db_health)):
+    """Move a file to another category; the category of its vectors is updated with it."""
+    try:
+        file_info = execute_single_query("SELECT file_name, category_id FROM files WHERE file_id = %s", (file_id,))
+        if not file_info:
+            raise HTTPException(status_code=404, detail="File not found")
+        if not check_record_exists('categories', 'category_id', move.category_id):
+            raise HTTPException(status_code=404, detail="Category not found")
+        if file_info['category_id'] == move.category_id:
+            raise HTTPException(status_code=400, detail="File is already in this category")
+        
+        duplicate_check_query = """
+            SELECT 1 FROM files 
+            WHERE category_id = %s AND file_name = %s
+        """
+        if execute_single_query(duplicate_check_query, (move.category_id, file_info['file_name'])):
+            raise HTTPException(
+                status_code=409,
+                detail=f"File '{file_info['file_name']}' already exists in the target category"
+            )
+        
+        counts = move_file_in_db(file_id, move.category_id)
+        
+        if counts["moved_files"] == 0:
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        return {
+            "message": "File moved successfully",
+            "file_id": file_id,
+            "file_name": file_info['file_name'],
+            "category_id": move.category_id,
+            "updated_vectors_count": counts["updated_vectors"]
+        }
+        
+    except HTTPException:
+        raise
+    except DatabaseError as e:
+        documents_logger.error(f"Database error in move_file: {e}")
+        raise HTTPException(status_code=500, detail="Failed to move file")
+    except Exception as e:
+        documents_logger.error(f"Unexpected error in move_file: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 # ==================== TEXT ENDPOINTS ====================
 
 async def search_texts(query: str, page: int = 1, size: int = 10, db_check=Depends(check_db_health)):
@@ -367,10 +461,16 @@ async def get_texts_by_file(file_id: int, db_check=Depends(check_db_health)):
     """Retrieve all texts for a file from the qa_texts table."""
     file_info = execute_single_query("SELECT file_name FROM files WHERE file_id = %s", (file_id,))
     if not file_info: raise HTTPException(status_code=404, detail="File not found")
-    texts = get_texts_from_qa_table(file_info['file_name'])
+    texts = get_texts_from_qa_table(file_id, file_info['file_name'])
     return FileTextsResponse(file_id=file_id, file_name=file_info['file_name'], texts=texts, total_count=len(texts))
 
 
+async def get_text_index_status(text_ids: List[str] = Query(...), db_check=Depends(check_db_health)):
+    """Retrieve the vector indexing status of text entries."""
+    if not text_ids: raise HTTPException(status_code=400, detail="No text IDs provided")
+    return get_index_status(text_ids)
+
+
 async def create_text_entries(file_id: int, data: Union[TextCreate, TextCreateBatch], db_check=Depends(check_db_health)):
     """Create new text entry(ies) in both qa_texts and the vector store."""
     file_info = execute_single_query("SELECT file_name FROM files WHERE file_id = %s", (file_id,))
@@ -379,13 +479,41 @@ async def create_text_entries(file_id: int, data: Union[TextCreate, TextCreateBa
     if not texts: raise HTTPException(status_code=400, detail="No text entries provided")
     
     to_create = [(t.question, t.answer, t.text_author) for t in texts]
-    text_ids = create_text_entries_in_db(to_create, file_info['file_name'])
+    text_ids = create_text_entries_in_db(to_create, file_id, file_info['file_name'])
     
     if isinstance(data, TextCreateBatch):
         return {"message": f"Successfully created {len(text_ids)} entries", "created_ids": text_ids}
     return {"message": "Text entry created", "text_id": text_ids[0]}
 
 
+async def upload_document(file_id: int, file: UploadFile = File(...), text_author: str = Form(..., min_length=1),
+                          db_check=Depends(check_db_health)):
+    """Upload a Q&A PDF to a file; pairs are extracted by a background job whose progress can be polled."""
+    file_info = execute_single_query("SELECT file_name FROM files WHERE file_id = %s", (file_id,))
+    if not file_info: raise HTTPException(status_code=404, detail="File not found")
+    if not (file.filename or "").lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+    
+    path = await save_upload(file, ".pdf")
+    job_id = submit_job("extract_upload", extract_uploaded_pdf, path, file_id, file_info['file_name'], text_author)
+    documents_logger.info(f"Scheduled extraction of {file.filename} into file ID: {file_id} as job {job_id}")
+    return JSONResponse(status_code=202, content={"message": "Upload accepted", "job_id": job_id})
+
+
+async def import_text_entries(file_id: int, file: UploadFile = File(...), db_check=Depends(check_db_health)):
+    """Import texts into a file from an NDJSON, CSV or XLSX upload; rows are upserted by a background job."""
+    file_info = execute_single_query("SELECT file_name FROM files WHERE file_id = %s", (file_id,))
+    if not file_info: raise HTTPException(status_code=404, detail="File not found")
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Supported formats: {', '.join(IMPORT_FORMATS)}")
+
+    path = await save_upload(file, suffix)
+    job_id = submit_job("import_texts", import_texts, path, IMPORT_FORMATS[suffix], file_id, file_info['file_name'])
+    documents_logger.info(f"Scheduled import of {file.filename} into file ID: {file_id} as job {job_id}")
+    return JSONResponse(status_code=202, content={"message": "Import accepted", "job_id": job_id})
+
+
 async def update_text_entries(text_data: Union[TextUpdate, TextUpdateBatch], db_check=Depends(check_db_health)):
     """Update existing text entry(ies) in both qa_texts and the vector store."""
     try:
@@ -449,12 +577,85 @@ async def delete_text_single(text_id: str, db_check=Depends(check_db_health)):
     return {"message": "Text entry deleted successfully", "text_id": text_id}
 
 
-async def delete_text_single(text_id: str, db_check=Depends(check_db_health)):
-    """Delete a single text entry."""
-    count = soft_delete_text_entries_in_db([text_id])
-    if count == 0: raise HTTPException(status_code=404, detail="Text ID not found")
-    return {"message": "Text entry deleted successfully", "text_id": text_id}
+async def restore_text_batch(data: TextRestoreBatch, db_check=Depends(check_db_health)):
+    """Restore a batch of soft-deleted text entries together with their existing vectors."""
+    if not data.text_ids: raise HTTPException(status_code=400, detail="No text IDs provided")
+    restored_ids = restore_text_entries_in_db(data.text_ids)
+    if not restored_ids: raise HTTPException(status_code=404, detail="No deleted texts found for the given IDs")
+    return {"message": f"Successfully restored {len(restored_ids)} entries", "restored_ids": restored_ids}
+    
+
+# ==================== INGESTION ENDPOINTS ====================
+
+def _ingest_folder_job(job, folder_path: str, category_id: int, text_author: str):
+    """Background job wrapper around the bulk PDF ingestion pipeline."""
+    return ingest_folder(folder_path, category_id, text_author, progress=job.report)
+
+
+async def ingest_documents(request: IngestRequest, db_check=Depends(check_db_health)):
+    """Start a background job that bulk-ingests the PDF files of a folder."""
+    root = Path(INGEST_ROOT_DIR).resolve()
+    folder = (root / request.folder_path).resolve()
+    if not folder.is_relative_to(root) or not folder.is_dir():
+        raise HTTPException(status_code=400, detail="Folder not found in the ingestion root")
+    if not check_record_exists('categories', 'category_id', request.category_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+    
+    job_id = submit_job("ingest_pdfs", _ingest_folder_job, str(folder), request.category_id, request.text_author)
+    documents_logger.info(f"Scheduled ingestion of {folder} as job {job_id}")
+    return JSONResponse(status_code=202, content={"message": "Ingestion scheduled", "job_id": job_id})
+
+
+# ==================== SNAPSHOT ENDPOINTS ====================
+
+def _resolve_snapshot_dir(snapshot_name: str) -> Path:
+    root = Path(SNAPSHOT_DIR).resolve()
+    snapshot_dir = (root / snapshot_name).resolve()
+    if not snapshot_dir.is_relative_to(root) or snapshot_dir == root:
+        raise HTTPException(status_code=400, detail="Snapshot must be inside the snapshot root")
+    return snapshot_dir
+
+
+def _export_snapshot_job(job, snapshot_dir: str):
+    return export_snapshot(snapshot_dir, progress=job.report)
+
+
+def _import_snapshot_job(job, snapshot_dir: str):
+    return import_snapshot(snapshot_dir, progress=job.report)
+
+
+async def create_snapshot(request: SnapshotRequest, db_check=Depends(check_db_health)):
+    """Start a background job that exports the knowledge base with its embeddings to Parquet."""
+    snapshot_dir = _resolve_snapshot_dir(request.snapshot_name or datetime.now().strftime("%Y%m%d-%H%M%S"))
+    if snapshot_dir.exists():
+        raise HTTPException(status_code=409, detail="Snapshot already exists")
     
+    job_id = submit_job("export_snapshot", _export_snapshot_job, str(snapshot_dir))
+    documents_logger.info(f"Scheduled snapshot export to {snapshot_dir} as job {job_id}")
+    return JSONResponse(status_code=202, content={"message": "Snapshot export scheduled", "job_id": job_id, "snapshot_name": snapshot_dir.name})
+
+
+async def restore_snapshot(request: SnapshotRequest, db_check=Depends(check_db_health)):
+    """Start a background job that loads a Parquet snapshot into an empty knowledge base."""
+    if not request.snapshot_name:
+        raise HTTPException(status_code=400, detail="snapshot_name is required")
+    snapshot_dir = _resolve_snapshot_dir(request.snapshot_name)
+    if not snapshot_dir.is_dir():
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    
+    job_id = submit_job("import_snapshot", _import_snapshot_job, str(snapshot_dir))
+    documents_logger.info(f"Scheduled snapshot import from {snapshot_dir} as job {job_id}")
+    return JSONResponse(status_code=202, content={"message": "Snapshot import scheduled", "job_id": job_id})
+
+
+# ==================== JOB ENDPOINTS ====================
+
+async def get_job_status(job_id: str, db_check=Depends(check_db_health)):
+    """Retrieve the status and progress of a background job."""
+    job = get_job(job_id)
+    if not job: raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 
 # ==================== INCIDENTS ENDPOINTS ====================
 async def get_all_incidents(db_check=Depends(check_db_health)):
@@ -595,4 +796,55 @@ async def delete_incident(incident_id: int, db_check=Depends(check_db_health)):
         raise HTTPException(status_code=500, detail="Failed to delete incident")
     except Exception as e:
         documents_logger.error(f"Unexpected error in delete_incident: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# ==================== ADMIN PROFILING ENDPOINTS ====================
+
+async def verify_admin_token(x_admin_token: str = Header(None)):
+    """Dependency that only lets requests carrying the admin token (SECRET_KEY) through."""
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, config.secret_key):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def profile_cpu(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(PROFILE_DEFAULT_INTERVAL_MS, ge=1, le=1000),
+    idle: bool = Query(False, description="Include threads waiting for work"),
+    admin=Depends(verify_admin_token)
+):
+    """
+    Sample the stacks of this worker for the given time and return them in collapsed format
+    (flamegraph.pl, speedscope). Runs in the threadpool, so the worker keeps serving requests.
+    """
+    stacks = cpu_profiler.profile(seconds, interval_ms / 1000, idle)
+    if stacks is None: raise HTTPException(status_code=409, detail="A CPU profile is already running in this worker")
+    logging.info(f"CPU profile of worker {os.getpid()} taken for {seconds} sec")
+    filename = f"cpu-{os.getpid()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+    return PlainTextResponse(stacks, headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Worker-Pid": str(os.getpid())})
+
+
+def start_memory_trace(admin=Depends(verify_admin_token)):
+    """Start tracemalloc in this worker and take the baseline snapshot."""
+    memory_tracer.start()
+    return {"message": "Memory tracing started", "pid": os.getpid()}
+
+
+def get_memory_trace(
+    top: int = Query(TRACEMALLOC_TOP_SITES, ge=1, le=500),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    reset: bool = Query(False, description="Use this snapshot as the new baseline"),
+    admin=Depends(verify_admin_token)
+):
+    """
+    Top allocation sites of this worker and their growth since the baseline snapshot. Snapshots take
+    seconds on a large heap, so like the other profiling views this runs in the threadpool.
+    """
+    if not memory_tracer.tracing: raise HTTPException(status_code=409, detail="Memory tracing is not running in this worker")
+    return {"pid": os.getpid(), **memory_tracer.report(top, group_by, reset)}
+
+
+def stop_memory_trace(admin=Depends(verify_admin_token)):
+    """Stop tracemalloc in this worker and drop its snapshots."""
+    memory_tracer.stop()
+    return {"message": "Memory tracing stopped", "pid": os.getpid()}